@@ -1,546 +1,421 @@
 # app.py
 import os
+import json
+import time
 import uuid
-import random
+import base64
+import asyncio
 import traceback
-from typing import Dict, Any, List
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
 
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
+from adaptive import adaptive_engine
+from batch_grader import grade_batch
+from evaluator import async_evaluator
+from metrics import SESSIONS, MetricsMiddleware, render as render_metrics, span
+from question_banks import pick_questions_for_role, question_banks
+from result_log import ResultLog, make_result_log
+from session import Session
+from rate_limit import (AdmissionControl, batch_limiter, check_answer_rate, client_key, start_limiter,
+                        too_many_requests)
+from session_store import SessionStore, make_session_store
+from static_assets import StaticAssets
+from summary_pipeline import SummaryPipeline
+
 # Load env
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-try:
-    import openai
-    openai.api_key = OPENAI_API_KEY
-    OPENAI_AVAILABLE = True
-except Exception:
-    OPENAI_AVAILABLE = False
-
-app = FastAPI()
-
-sessions: Dict[str, Dict[str, Any]] = {}
-
-QUESTION_BANKS: Dict[str, List[str]] = {
-    "Java Developer": [
-        "What is Java and what are its main features?",
-        "Explain the difference between JDK, JRE, and JVM.",
-        "What is the difference between == and equals() in Java?",
-        "What is inheritance in Java and why is it useful?",
-        "Explain polymorphism with an example.",
-        "What is encapsulation and how does Java support it?",
-        "What is an interface and how is it different from an abstract class?",
-        "Explain checked vs unchecked exceptions in Java.",
-        "What are Java collections? Name some collection interfaces.",
-        "What is the difference between ArrayList and LinkedList?",
-        "Explain HashMap and how it works internally (high-level).",
-        "What is multithreading and how do you create a thread in Java?",
-        "What is synchronization and why is it important?",
-        "What is the volatile keyword?",
-        "Describe the Java memory model (heap vs stack) briefly.",
-        "What is garbage collection and how does it work in Java (high-level)?",
-        "What are generics in Java and why are they useful?",
-        "Explain the Stream API in Java 8 briefly.",
-        "What is a lambda expression in Java?",
-        "What is the difference between final, finally, and finalize?",
-        "Explain dependency injection and how frameworks like Spring use it.",
-        "What is JDBC?",
-        "Explain the Singleton pattern and how to implement it safely in Java.",
-        "What is REST and how would you build a simple REST service in Java?",
-        "What is the difference between process and thread?"
-    ],
-    "Software Engineer": [
-        "Explain the software development lifecycle.",
-        "What is OOP and name its principles.",
-        "What is unit testing and why is it important?",
-        "Explain REST vs SOAP.",
-        "What are design patterns? Give an example.",
-        "How do you handle version control? (git basics)",
-        "What is continuous integration?",
-        "Explain time vs space complexity (big-O).",
-        "Describe a system design for a URL shortener (high-level).",
-        "What is load balancing?",
-        "Explain database indexing briefly.",
-        "What is eventual consistency?",
-        "Describe a cache and when to use it.",
-        "What is microservices architecture?",
-        "Explain an example of a race condition and how to prevent it.",
-        "What is a deadlock?",
-        "How do you design for failure in distributed systems?",
-        "Explain pagination strategies for APIs.",
-        "What is OAuth?",
-        "Explain the difference between SQL and NoSQL databases.",
-        "What is observability (logs/metrics/traces)?",
-        "How do you ensure API backward compatibility?",
-        "What is refactoring and when to do it?",
-        "Explain feature toggles and their use.",
-        "What is a message queue and when to use it?"
-    ],
-    "Data Analyst": [
-        "What is the difference between mean, median, and mode?",
-        "What is data cleaning and why is it important?",
-        "Explain correlation vs causation.",
-        "What is SQL and write a basic SELECT example.",
-        "What is normalization in databases?",
-        "Explain joins (INNER, LEFT, RIGHT).",
-        "What is a pivot table?",
-        "What is data visualization and name tools you use.",
-        "Explain A/B testing basics.",
-        "What is regression analysis?",
-        "How do you handle missing data?",
-        "What is outlier detection?",
-        "What is ETL?",
-        "Explain the difference between structured and unstructured data.",
-        "What is a time series?",
-        "What is PCA (in brief)?",
-        "Explain precision and recall.",
-        "What is hypothesis testing?",
-        "Describe a dashboard you've built.",
-        "What is a KPI?",
-        "Explain data sampling methods.",
-        "What is normalization vs standardization?",
-        "What is the role of a data analyst in a business?",
-        "What is clustering?",
-        "Explain the difference between supervised and unsupervised learning."
-    ],
-    "Python Developer": [
-        "What are Python's key features?",
-        "Explain list vs tuple.",
-        "What is GIL (Global Interpreter Lock)?",
-        "How do you manage dependencies in Python?",
-        "What is a decorator?",
-        "Explain generators and yield.",
-        "What is list comprehension?",
-        "How do you handle exceptions in Python?",
-        "What are virtual environments and why use them?",
-        "Explain the difference between deep copy and shallow copy.",
-        "What is a context manager?",
-        "What are type hints?",
-        "Explain Python's OOP basics.",
-        "What is a module and a package?",
-        "How to read/write files in Python?",
-        "What is the difference between == and is?",
-        "Explain the use of __init__.py file.",
-        "What is pip and PyPI?",
-        "How to optimize Python code performance?",
-        "Explain multiprocessing vs threading.",
-        "What are dataclasses?",
-        "What is pytest?",
-        "How to serialize objects (pickle, json)?",
-        "Explain HTTP requests in Python (e.g., requests library).",
-        "What is Flask vs Django?"
-    ],
-    "Web Developer": [
-        "What is HTML, CSS, and JavaScript?",
-        "Explain the box model in CSS.",
-        "What is responsive design?",
-        "What is the DOM?",
-        "Explain event delegation in JS.",
-        "What is AJAX?",
-        "What are RESTful APIs?",
-        "What is CORS and why it matters?",
-        "Explain CSS Flexbox.",
-        "What is CSS Grid?",
-        "What is progressive enhancement?",
-        "Explain single-page application (SPA).",
-        "What is a service worker?",
-        "Explain web accessibility basics.",
-        "What is HTTPS and why important?",
-        "What are cookies vs localStorage?",
-        "Explain frontend build tools (webpack, etc.).",
-        "What is cross-site scripting (XSS)?",
-        "What is SQL injection?",
-        "Explain SEO basics.",
-        "What is WebSockets?",
-        "What are HTTP status codes (200, 404, 500)?",
-        "What is REST vs GraphQL?",
-        "Explain progressive web apps (PWA).",
-        "What is redirection (301 vs 302)?"
-    ]
-}
-
-def pick_questions_for_role(role: str, count: int = 5) -> List[str]:
-    bank = QUESTION_BANKS.get(role, [])
-    if len(bank) >= count:
-        return random.sample(bank, count)
-    else:
-        return [random.choice(bank) for _ in range(count)]
+DISCONNECT_POLL_INTERVAL = 0.25  # seconds
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+ANSWER_MAX_CHARS = int(os.getenv("ANSWER_MAX_CHARS", "4000"))  # longer answers are rejected with 422
+QUESTION_MAX_CHARS = int(os.getenv("QUESTION_MAX_CHARS", "1000"))  # same, for /grade/batch questions
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "20"))  # seconds for LLM calls to finish
+
+
+# /healthz: "starting" until warm-up has finished, then "ready"; step timings in ms.
+readiness: Dict[str, Any] = {"status": "starting", "warm_up_ms": {}}
+
+
+def warm_questions() -> None:
+    for role in question_banks.roles():
+        pick_questions_for_role(role, count=1)
+
+
+async def seed_difficulties() -> None:
+    if result_log is not None:
+        # question difficulties start from historical pass rates
+        adaptive_engine.seed(await asyncio.to_thread(result_log.question_stats))
 
 
-def call_openai_evaluator(question: str, user_answer: str) -> Dict[str, str]:
+async def warm_up() -> None:
     """
-    Ask the model to grade the user's answer and return:
-    {
-        verdict: "Correct" / "Partially correct" / "Incorrect",
-        short_feedback: "one-line feedback",
-        correction: "Simple correct answer or correction in plain words"
-    }
+    What the first requests would otherwise pay for, done concurrently while
+    the worker already accepts connections: question sampling, compressed
+    assets, historical difficulties and the LLM client with one open
+    connection. A request that arrives first builds what it needs itself.
     """
-    if not OPENAI_AVAILABLE:
-        if len(user_answer.strip()) > 20:
-            return {
-                "verdict": "Partially correct",
-                "short_feedback": "You have some correct points but missed details.",
-                "correction": "Key idea: give concise definition and main points."
-            }
-        else:
-            return {
-                "verdict": "Incorrect",
-                "short_feedback": "Short answer — missing key points.",
-                "correction": "Try to mention the definition and 2–3 main features."
-            }
-
-    prompt = f"""
-You are a strict but fair interviewer assistant. I will give you a question and the candidate's answer.
-Return a JSON object with three keys: verdict, short_feedback, correction.
-- verdict: one of "Correct", "Partially correct", or "Incorrect".
-- short_feedback: 1-2 sentence feedback on what was good/missing.
-- correction: a single-paragraph, simple concise correct answer that the candidate can learn.
-
-Question: {question}
-Candidate answer: {user_answer}
-
-Keep each field short and in plain language.
-Return ONLY valid JSON.
-"""
-    try:
-        resp = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.0,
-            max_tokens=250
-        )
-        text = resp.choices[0].message.content.strip()
-        import json
-        jstart = text.find("{")
-        jtext = text[jstart:] if jstart != -1 else text
-        data = json.loads(jtext)
-        return {
-            "verdict": data.get("verdict", "Incorrect"),
-            "short_feedback": data.get("short_feedback", ""),
-            "correction": data.get("correction", "")
-        }
-    except Exception:
-        return {
-            "verdict": "Partially correct",
-            "short_feedback": "Couldn't fully evaluate — review key points.",
-            "correction": "Main idea: provide definition, example, and why it's useful."
-        }
+    async def step(name: str, work) -> None:
+        t0 = time.perf_counter()
+        try:
+            await work
+        except Exception:
+            traceback.print_exc()
+        readiness["warm_up_ms"][name] = round((time.perf_counter() - t0) * 1000, 1)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(step("questions", asyncio.to_thread(warm_questions)),
+                         step("assets", asyncio.to_thread(static_assets.preload)),
+                         step("difficulties", seed_difficulties()),
+                         step("llm", async_evaluator.llm.warm_up()))
+    readiness["warm_up_ms"]["total"] = round((time.perf_counter() - t0) * 1000, 1)
+    readiness["status"] = "ready"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warming = asyncio.create_task(warm_up())
+    yield
+    warming.cancel()
+    # The server has stopped accepting and finished its requests; let background
+    # summary steps and any other LLM calls finish, and hand running summaries
+    # to the session store for whichever worker picks the interview up.
+    deadline = time.monotonic() + SHUTDOWN_DRAIN_TIMEOUT
+    await summary_pipeline.handoff(sessions, SHUTDOWN_DRAIN_TIMEOUT)
+    await async_evaluator.llm.drain(max(0.0, deadline - time.monotonic()))
+    await summary_pipeline.close()
+    await async_evaluator.aclose()
+    await sessions.close()
+    if result_log is not None:
+        await asyncio.to_thread(result_log.close)
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+
+sessions: SessionStore = make_session_store()
+result_log: Optional[ResultLog] = make_result_log()
+summary_pipeline = SummaryPipeline(async_evaluator)
+# New interviews wait (then get 429) while the LLM queue is half full, so running ones keep their slots.
+start_admission = AdmissionControl(lambda: async_evaluator.llm.saturated(0.5))
 
 
 class StartRequest(BaseModel):
     role: str
     num_questions: int = 5  # default 5
+    candidate_id: Optional[str] = None  # avoids repeating questions this candidate saw recently
+    adaptive: bool = False  # pick each question from the answers so far instead of all up front
 
 
 class AnswerRequest(BaseModel):
     session_id: str
-    user_answer: str
+    user_answer: str = Field(max_length=ANSWER_MAX_CHARS)
+
+
+class BatchItem(BaseModel):
+    question: str = Field(max_length=QUESTION_MAX_CHARS)
+    answer: str = Field(max_length=ANSWER_MAX_CHARS)
+
+
+class BatchGradeRequest(BaseModel):
+    items: List[BatchItem]
+    mode: str = "pack"  # "pack" or "fanout"
 
 
 @app.post("/start")
-async def start_interview(req: StartRequest):
+async def start_interview(req: StartRequest, request: Request):
+    wait = start_limiter.acquire(client_key(request))
+    if wait:
+        return too_many_requests(wait, "/start", "client")
+    wait = await start_admission.admit()
+    if wait:
+        return too_many_requests(wait, "/start", "overload")
     role = req.role
     num = req.num_questions if req.num_questions and 1 <= req.num_questions <= 10 else 5
-    qs = pick_questions_for_role(role, count=num)
+    with span("questions.pick"):
+        if req.adaptive:
+            # questions are appended one at a time by record_answer
+            first = adaptive_engine.next_question(role, 0.0, candidate_id=req.candidate_id)
+            ids = [first.id] if first else []
+        else:
+            ids = [q.id for q in question_banks.pick(role, num, req.candidate_id)]
+    if not ids:
+        return JSONResponse({"error": "Unknown role"}, status_code=400)
+    session = Session(role, ids, req.candidate_id, total=num if req.adaptive else None, adaptive=req.adaptive)
     session_id = str(uuid.uuid4())
-    sessions[session_id] = {
-        "role": role,
-        "questions": qs,
-        "current": 0,
-        "answers": []
-    }
+    with span("session.put"):
+        await sessions.put(session_id, session)
     return {
         "session_id": session_id,
-        "question": qs[0],
-        "remaining": num - 1
+        "question": session.question,
+        "remaining": session.total - 1
+    }
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def run_until_disconnect(request: Request, coro):
+    """
+    Await `coro`, cancelling it if the HTTP client goes away first so an
+    abandoned request doesn't keep holding an LLM slot.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def next_adaptive_question(session: Session, verdict: str) -> None:
+    """Update the ability estimate from this verdict and queue the next question, if any."""
+    ids = session.question_ids
+    session.ability = adaptive_engine.update(session.role, ids[-1], session.ability,
+                                             len(session.answers) - 1, verdict)
+    if session.finished:
+        return
+    nxt = adaptive_engine.next_question(session.role, session.ability, ids, session.candidate_id)
+    if nxt is None:
+        session.total = session.current   # bank exhausted: end early
+        return
+    ids.append(nxt.id)
+
+
+def record_answer(session: Session, user_answer: str, eval_result: Dict[str, str]) -> bool:
+    """Append the graded answer and advance; returns True when the interview is over."""
+    session.add_answer(user_answer, eval_result)
+    if session.adaptive:
+        with span("questions.adapt"):
+            next_adaptive_question(session, eval_result["verdict"])
+    return session.finished
+
+
+def next_question_payload(session: Session) -> Dict[str, Any]:
+    return {
+        "next_question": session.question,
+        "remaining": session.total - session.current - 1,
+        "done": False
     }
 
 
 @app.post("/answer")
-async def answer_question(payload: AnswerRequest):
+async def answer_question(payload: AnswerRequest, request: Request):
     sid = payload.session_id
     user_answer = payload.user_answer or ""
-    if sid not in sessions:
+    limited = check_answer_rate(request, sid, "/answer")
+    if limited is not None:
+        return limited
+    with span("session.get"):
+        session = await sessions.get(sid)
+    if session is None:
         return JSONResponse({"error": "Invalid session_id"}, status_code=400)
 
-    session = sessions[sid]
-    idx = session["current"]
-    question = session["questions"][idx]
+    summary_pipeline.collect(sid, session)
+    question = session.question
 
-    eval_result = call_openai_evaluator(question, user_answer)
+    try:
+        eval_result = await run_until_disconnect(request, async_evaluator.evaluate(question, user_answer))
+    except ClientDisconnected:
+        # Session is untouched, so the candidate can resend the same answer.
+        return Response(status_code=499)
 
-    session["answers"].append({
-        "question": question,
-        "user_answer": user_answer,
+    finished = record_answer(session, user_answer, eval_result)
+    result = {
         "verdict": eval_result["verdict"],
         "feedback": eval_result["short_feedback"],
         "correction": eval_result["correction"]
-    })
-
-    session["current"] += 1
-    if session["current"] < len(session["questions"]):
-        next_q = session["questions"][session["current"]]
-        remaining = len(session["questions"]) - session["current"] - 1
-        return {
-            "verdict": eval_result["verdict"],
-            "feedback": eval_result["short_feedback"],
-            "correction": eval_result["correction"],
-            "next_question": next_q,
-            "remaining": remaining,
-            "done": False
-        }
+    }
+    if not finished:
+        with span("session.put"):
+            await sessions.put(sid, session)
+        summary_pipeline.schedule(sid, session)
+        return {**result, **next_question_payload(session)}
     else:
-        # Finished interview — generate a short summary using OpenAI if available
-        summary = "Interview complete."
-        if OPENAI_AVAILABLE:
-            try:
-                summary_prompt = f"""
-You are an interviewer. Provide a 3-sentence overall summary of the candidate based on these Q/A pairs.
-Candidate role: {session['role']}
-Q/A pairs:
-"""
-                for a in session["answers"]:
-                    summary_prompt += f"\nQ: {a['question']}\nA: {a['user_answer']}\nResult: {a['verdict']}\n"
-                summary_prompt += "\nKeep it short and constructive."
-                resp = openai.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": summary_prompt}],
-                    temperature=0.5,
-                    max_tokens=150
-                )
-                summary = resp.choices[0].message.content.strip()
-            except Exception:
-                summary = "Interview finished. Review answers for improvement."
-
-        log = session["answers"]
-
-        del sessions[sid]
+        # Finished interview — generate a short summary using OpenAI if available.
+        # The background pipeline already covers the earlier answers, so usually
+        # only the last verdict is added to it, without another model call.
+        notes, rest, budget = await summary_pipeline.final_input(sid, session)
+        summary = summary_pipeline.folded(notes, rest, session)
+        if summary is None:
+            summary = await async_evaluator.summarize(session.role, rest, notes, budget)
+
+        log = session.log()
+
+        await sessions.delete(sid)
+        if result_log is not None:
+            result_log.record(sid, session, summary)
         return {
-            "verdict": eval_result["verdict"],
-            "feedback": eval_result["short_feedback"],
-            "correction": eval_result["correction"],
+            **result,
             "done": True,
             "summary": summary,
             "log": log
         }
 
 
-#Serve UI (single-file)
-@app.get("/", response_class=HTMLResponse)
-async def ui():
-
-    return HTMLResponse("""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8" />
-    <title>Interview Practice Partner</title>
-    <meta name="viewport" content="width=device-width, initial-scale=1" />
-    <style>
-        body {
-            margin:0; padding:0; height:100vh;
-            font-family: Arial, Helvetica, sans-serif;
-            background: #0b0c10; color: #c5c6c7;
-            display:flex;
-        }
-        .sidebar {
-            width: 260px; background: #1f2833; padding:20px; border-right:2px solid #45a29e;
-        }
-        .sidebar h3 { color: #66fcf1; margin:0 0 12px 0; }
-        label { display:block; margin-top:12px; font-size:14px; }
-        select, input[type=number] {
-            width:100%; padding:10px; margin-top:6px; border-radius:6px; border:none; background:#0b0c10; color:#c5c6c7;
-        }
-        button {
-            width:100%; padding:10px; margin-top:16px; border-radius:6px; border:none; background:#45a29e; color:#0b0c10; cursor:pointer;
-        }
-        button:hover { background:#66fcf1; }
+def sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-        .main {
-            flex:1; padding:28px; display:flex; flex-direction:column;
-        }
-        .title { text-align:center; color:#66fcf1; font-size:20px; margin-bottom:12px; }
-        #chatBox {
-            flex:1; background:#0b0c10; border:1px solid #45a29e; padding:14px; border-radius:10px; overflow:auto;
-        }
-        .msg { margin:8px 0; padding:10px; border-radius:8px; max-width:80%; }
-        .msg.user { background:#111; color:#c5c6c7; margin-left:auto; text-align:right; }
-        .msg.bot { background:#092; color:#0b0c10; background:#142; color:#c7ffee; margin-right:auto; text-align:left; }
-        .controls { display:flex; gap:8px; margin-top:12px; }
-        .controls input[type=text] { flex:1; padding:12px; border-radius:6px; border:none; background:#1f2833; color:#c5c6c7; }
-        .controls button { padding:10px 16px; border-radius:6px; border:none; background:#45a29e; color:#0b0c10; cursor:pointer; }
-    </style>
-</head>
-<body>
-    <div class="sidebar">
-        <h3>Interview Setup</h3>
-        <label for="role">Role</label>
-        <select id="role">
-            <option>Java Developer</option>
-            <option>Software Engineer</option>
-            <option>Data Analyst</option>
-            <option>Python Developer</option>
-            <option>Web Developer</option>
-        </select>
-
-        <label for="num">Number of Questions (1-10)</label>
-        <input id="num" type="number" min="1" max="10" value="5" />
-
-        <button id="startBtn">Start Interview</button>
-
-        <hr style="margin-top:18px;border:0;border-top:1px solid #223;">
-        <div style="font-size:13px;color:#9fb8b0;margin-top:10px;">
-            <strong>Tip:</strong> Give concise answers. The bot will tell you if your answer is correct and show a simple correction when needed.
-        </div>
-        <div style="margin-top:8px;color:#9fb8b0;font-size:12px;">
-            Image: <br/><small style="color:#7fbeb0">local demo image shown to developer</small>
-            <div style="margin-top:8px;">
-                <img src="/static/placeholder.png" alt="placeholder" style="width:100%; border-radius:6px; opacity:0.9;">
-            </div>
-        </div>
-    </div>
-
-    <div class="main">
-        <div class="title">💬 Interview Practice Partner</div>
-
-        <div id="chatBox"></div>
-
-        <div class="controls">
-            <input id="answerInput" type="text" placeholder="Type your answer here..." />
-            <button id="sendBtn">Send</button>
-        </div>
-
-        <div style="margin-top:8px; font-size:13px; color:#99bfb6">
-            <span id="sessionInfo"></span>
-        </div>
-    </div>
-
-<script>
-let sessionId = null;
-let currentQuestion = null;
-
-function appendUser(text) {
-    const box = document.getElementById('chatBox');
-    const div = document.createElement('div');
-    div.className = 'msg user';
-    div.innerHTML = `<strong>You:</strong> ${escapeHtml(text)}`;
-    box.appendChild(div);
-    box.scrollTop = box.scrollHeight;
-}
-
-function appendBot(text) {
-    const box = document.getElementById('chatBox');
-    const div = document.createElement('div');
-    div.className = 'msg bot';
-    div.innerHTML = `<strong>Bot:</strong> ${escapeHtml(text)}`;
-    box.appendChild(div);
-    box.scrollTop = box.scrollHeight;
-}
-
-function escapeHtml(unsafe) {
-    return unsafe
-         .replaceAll('&', '&amp;')
-         .replaceAll('<', '&lt;')
-         .replaceAll('>', '&gt;');
-}
-
-document.getElementById('startBtn').addEventListener('click', async () => {
-    const role = document.getElementById('role').value;
-    const num = parseInt(document.getElementById('num').value) || 5;
-    // clear chat
-    document.getElementById('chatBox').innerHTML = '';
-    appendBot(`Starting interview for ${role} (${num} questions)...`);
-
-    const res = await fetch('/start', {
-        method: 'POST',
-        headers: {'Content-Type': 'application/json'},
-        body: JSON.stringify({ role: role, num_questions: num })
-    });
-    const data = await res.json();
-    sessionId = data.session_id;
-    currentQuestion = data.question;
-    document.getElementById('sessionInfo').textContent = `Session: ${sessionId}`;
-    appendBot(currentQuestion);
-});
-
-document.getElementById('sendBtn').addEventListener('click', async () => {
-    const val = document.getElementById('answerInput').value.trim();
-    if (!val || !sessionId) return;
-    appendUser(val);
-    document.getElementById('answerInput').value = '';
-    appendBot('Checking answer...');
-    try {
-        const res = await fetch('/answer', {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({ session_id: sessionId, user_answer: val })
-        });
-        const data = await res.json();
-        // remove the 'Checking answer...' last bot message
-        const box = document.getElementById('chatBox');
-        // remove last bot 'Checking answer...' by finding last bot class with that text
-        let nodes = box.querySelectorAll('.msg.bot');
-        if (nodes.length) {
-            let last = nodes[nodes.length - 1];
-            if (last && last.textContent.includes('Checking answer')) {
-                last.remove();
-            }
-        }
 
-        appendBot(`Verdict: ${data.verdict}`);
-        if (data.feedback) appendBot(`Feedback: ${data.feedback}`);
-        if (data.verdict !== 'Correct' && data.correction) appendBot(`Correction: ${data.correction}`);
-
-        if (data.done) {
-            appendBot("Interview complete.");
-            if (data.summary) appendBot(`Summary: ${data.summary}`);
-            // optional: show log
-            console.log('Interview log:', data.log);
-            sessionId = null;
-            currentQuestion = null;
-            document.getElementById('sessionInfo').textContent = '';
-        } else {
-            // next question
-            currentQuestion = data.next_question;
-            appendBot(currentQuestion);
-        }
-    } catch (err) {
-        appendBot('Error connecting to server.');
-        console.error(err);
-    }
-});
+@app.post("/answer/stream")
+async def answer_question_stream(payload: AnswerRequest, request: Request):
+    """
+    Same as /answer, as Server-Sent Events:
+        field     {"field": "verdict"|"feedback"|"correction", "delta": "..."}  (repeated)
+        verdict   {"verdict"} as soon as the model has written a valid one
+        result    final {"verdict", "feedback", "correction"}; replaces the deltas
+        next      {"next_question", "remaining", "done": false}
+    or, after the last question:
+        finished  {}
+        summary   {"delta": "..."}  (repeated)
+        done      {"done": true, "summary", "log"}
+    If the client disconnects the stream is cancelled and the session is left
+    as it was, unless grading had already finished.
+    """
+    sid = payload.session_id
+    user_answer = payload.user_answer or ""
+    limited = check_answer_rate(request, sid, "/answer/stream")
+    if limited is not None:
+        return limited
+    with span("session.get"):
+        session = await sessions.get(sid)
+    if session is None:
+        return JSONResponse({"error": "Invalid session_id"}, status_code=400)
 
-// allow enter to send
-document.getElementById('answerInput').addEventListener('keydown', function(e) {
-    if (e.key === 'Enter') {
-        e.preventDefault();
-        document.getElementById('sendBtn').click();
-    }
-});
-</script>
-</body>
-</html>
-    """, media_type="text/html")
+    summary_pipeline.collect(sid, session)
+    question = session.question
+
+    async def events():
+        eval_result: Dict[str, str] = {}
+        async for field, value in async_evaluator.stream_evaluate(question, user_answer):
+            if field == "result":
+                eval_result = value
+            elif field == "verdict_final":
+                yield sse("verdict", {"verdict": value})
+            else:
+                yield sse("field", {"field": field, "delta": value})
+        yield sse("result", {
+            "verdict": eval_result["verdict"],
+            "feedback": eval_result["short_feedback"],
+            "correction": eval_result["correction"]
+        })
+
+        if not record_answer(session, user_answer, eval_result):
+            await sessions.put(sid, session)
+            summary_pipeline.schedule(sid, session)
+            yield sse("next", next_question_payload(session))
+            return
+
+        await sessions.delete(sid)
+        yield sse("finished", {})
+        notes, rest, budget = await summary_pipeline.final_input(sid, session)
+        summary = summary_pipeline.folded(notes, rest, session)
+        if summary is not None:
+            yield sse("summary", {"delta": summary})
+        else:
+            async for kind, value in async_evaluator.stream_summarize(session.role, rest, notes, budget):
+                if kind == "delta":
+                    yield sse("summary", {"delta": value})
+                else:
+                    summary = value
+        if result_log is not None:
+            result_log.record(sid, session, summary)
+        yield sse("done", {"done": True, "summary": summary, "log": session.log()})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/grade/batch")
+async def grade_batch_endpoint(req: BatchGradeRequest, request: Request):
+    """Grade up to BATCH_MAX_ITEMS (question, answer) pairs without a session; rate-limited per item."""
+    if req.mode not in ("pack", "fanout"):
+        return JSONResponse({"error": "mode must be 'pack' or 'fanout'"}, status_code=400)
+    if len(req.items) > BATCH_MAX_ITEMS:
+        return JSONResponse({"error": f"At most {BATCH_MAX_ITEMS} items per request"}, status_code=400)
+    # a batch bigger than the whole bucket could never go through; it drains the bucket instead
+    wait = batch_limiter.acquire(client_key(request), cost=min(len(req.items), batch_limiter.burst))
+    if wait:
+        return too_many_requests(wait, "/grade/batch", "client")
+    results = await grade_batch([(item.question, item.answer) for item in req.items], mode=req.mode)
+    return {"results": results}
+
+
+def analytics_unavailable() -> JSONResponse:
+    return JSONResponse({"error": "Result log is disabled"}, status_code=404)
+
+
+@app.get("/analytics/roles")
+async def analytics_roles():
+    """Pass rate and score per role, over every logged answer."""
+    if result_log is None:
+        return analytics_unavailable()
+    return {"roles": await asyncio.to_thread(result_log.role_pass_rates)}
+
+
+@app.get("/analytics/questions")
+async def analytics_questions(role: Optional[str] = None, min_answers: int = 1, limit: int = 100):
+    """Per-question pass rates, hardest first."""
+    if result_log is None:
+        return analytics_unavailable()
+    limit = max(1, min(limit, 1000))
+    return {"questions": await asyncio.to_thread(result_log.question_pass_rates, role, min_answers, limit)}
+
+
+@app.get("/analytics/candidates/{candidate_id}")
+async def analytics_candidate(candidate_id: str, limit: int = 50):
+    """A candidate's finished interviews, newest first."""
+    if result_log is None:
+        return analytics_unavailable()
+    limit = max(1, min(limit, 500))
+    return {"interviews": await asyncio.to_thread(result_log.candidate_history, candidate_id, limit)}
+
+
+@app.get("/healthz")
+async def healthz():
+    """Readiness probe: 503 while this worker is still warming up, 200 once it's ready."""
+    return JSONResponse(readiness, status_code=200 if readiness["status"] == "ready" else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """This worker's counters in the Prometheus text format."""
+    SESSIONS.set(await sessions.count())
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+#Serve UI (single-file): Index.html, loaded and compressed once at startup
+UI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Index.html")
+UPLOADED_IMAGE_PATH = "/mnt/data/WhatsApp Image 2025-11-23 at 11.17.45_8fdc28b3.jpg"
+PLACEHOLDER_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR4nGNgYAIAAAoA"
+    "AYq3Y+0AAAAASUVORK5CYII="
+)
 
-import io, base64
-from fastapi.responses import Response
+static_assets = StaticAssets()
+static_assets.add_file("ui", UI_PATH, "text/html; charset=utf-8")
+if os.path.exists(UPLOADED_IMAGE_PATH):
+    static_assets.add_file("placeholder", UPLOADED_IMAGE_PATH, "image/jpeg", "public, max-age=86400")
+else:
+    static_assets.add("placeholder", PLACEHOLDER_PNG, "image/png", "public, max-age=86400")
 
-UPLOADED_IMAGE_PATH = "/mnt/data/WhatsApp Image 2025-11-23 at 11.17.45_8fdc28b3.jpg"
 
-@app.get("/static/placeholder.png")
-def serve_placeholder():
+@app.get("/", response_class=HTMLResponse)
+async def ui(request: Request):
+    return static_assets.get("ui").response(request)
 
-    if os.path.exists(UPLOADED_IMAGE_PATH):
-        return FileResponse(UPLOADED_IMAGE_PATH, media_type="image/jpeg")
 
-    png_base64 = (
-        "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR4nGNgYAIAAAoA"
-        "AYq3Y+0AAAAASUVORK5CYII="
-    )
-    png = base64.b64decode(png_base64)
-    return Response(content=png, media_type="image/png")
+@app.get("/static/placeholder.png")
+async def serve_placeholder(request: Request):
+    return static_assets.get("placeholder").response(request)
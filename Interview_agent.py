@@ -2,6 +2,8 @@ import os
 import random
 from typing import List, Dict, Any
 
+from llm_client import llm
+
 OPENAI_KEY = os.getenv("OPENAI_API_KEY")
 
 def fallback_model(prompt: str, messages: List[Dict[str, str]]) -> str:
@@ -11,15 +13,7 @@ def call_openai_system(user_prompt: str, messages: List[Dict[str, str]], max_tok
     try:
         if not OPENAI_KEY:
             raise Exception("No API key set")
-        import openai
-        openai.api_key = OPENAI_KEY
-        resp = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            max_tokens=max_tokens,
-            temperature=0.7,
-        )
-        return resp.choices[0].message.content.strip()
+        return llm.chat_sync(messages, 0.7, max_tokens, op="agent")
     except Exception as e:
         print("OpenAI call failed:", str(e))
         return fallback_model(user_prompt, messages)
@@ -0,0 +1,148 @@
+# adaptive.py
+import os
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from question_banks import Question, QuestionBanks, RoleBank, question_banks
+
+ADAPTIVE_TOP_K = int(os.getenv("ADAPTIVE_TOP_K", "5"))            # pick at random among the k best-matched
+ADAPTIVE_PRIOR_WEIGHT = float(os.getenv("ADAPTIVE_PRIOR_WEIGHT", "10"))  # answers the bank difficulty is worth
+ITEM_K_MIN = 0.02          # questions keep adapting slowly however many answers they've had
+ABILITY_K = 1.2            # candidate step size for the first answer; shrinks as answers accumulate
+DIFFICULTY_SCALE = 1.0     # logits per bank difficulty level (1 easy, 2 medium, 3 hard)
+
+OUTCOME = {"Correct": 1.0, "Partially correct": 0.5, "Incorrect": 0.0}
+
+
+def expected(ability: float, difficulty: float) -> float:
+    """Rasch model: chance a candidate of `ability` gets a question of `difficulty` right."""
+    return 1.0 / (1.0 + math.exp(difficulty - ability))
+
+
+class RoleDifficulty:
+    """One role's item difficulties (logits) and answer counts, aligned with a RoleBank's positions."""
+
+    __slots__ = ("signature", "difficulty", "answers")
+
+    def __init__(self, bank: RoleBank, previous: Optional[Tuple[List[str], "RoleDifficulty"]] = None):
+        self.signature = bank.signature
+        self.difficulty = (bank.difficulty.astype(np.float64) - 2.0) * DIFFICULTY_SCALE
+        self.answers = np.zeros(len(bank), dtype=np.int64)
+        if previous is not None:
+            ids, old = previous
+            position = {qid: i for i, qid in enumerate(bank.ids)}
+            for j, qid in enumerate(ids):
+                i = position.get(qid)
+                if i is not None:
+                    self.difficulty[i] = old.difficulty[j]
+                    self.answers[i] = old.answers[j]
+
+
+class AdaptiveEngine:
+    """
+    Picks each next question from the answers so far (computerised adaptive
+    testing with a Rasch/Elo model).
+
+    Every question has a difficulty and every session an ability, both in
+    logits. The prior difficulty comes from the bank's 1-3 level, is
+    replaced by historical pass rates when `seed`ed from the result log,
+    and moves Elo-style after every graded answer, with a step that shrinks
+    as the question accumulates answers. The next question is one of the
+    `top_k` unasked questions whose difficulty is nearest the candidate's
+    ability (where an answer tells us the most), chosen at random so
+    candidates of equal ability don't all get the same one.
+
+    State is per worker and in memory; selection is one vectorised pass
+    over the role's arrays (tens of microseconds at thousands of questions).
+    """
+
+    def __init__(self, banks: QuestionBanks = question_banks, top_k: int = ADAPTIVE_TOP_K,
+                 rng: Optional[np.random.Generator] = None):
+        self.banks = banks
+        self.top_k = top_k
+        self.rng = rng or np.random.default_rng()
+        self._roles: Dict[str, Tuple[List[str], RoleDifficulty]] = {}
+
+    def _state(self, bank: RoleBank) -> RoleDifficulty:
+        entry = self._roles.get(bank.role)
+        if entry is None or entry[1].signature != bank.signature:
+            # new role, or its questions changed on reload: carry difficulties over by id
+            entry = self._roles[bank.role] = (bank.ids, RoleDifficulty(bank, entry))
+        return entry[1]
+
+    def seed(self, stats: Dict[str, Tuple[int, int, int]]) -> int:
+        """
+        Set difficulties from historical (answers, correct, partial) per
+        question id, shrunk towards the bank prior by ADAPTIVE_PRIOR_WEIGHT
+        pseudo-answers. Returns how many questions were seeded.
+        """
+        seeded = 0
+        for bank in self.banks.index.roles.values():
+            state = self._state(bank)
+            for i, qid in enumerate(bank.ids):
+                row = stats.get(qid)
+                if not row or not row[0]:
+                    continue
+                n, correct, partial = row
+                prior = 1.0 - expected(0.0, state.difficulty[i])   # prior failure rate
+                fail = (n - correct - 0.5 * partial + ADAPTIVE_PRIOR_WEIGHT * prior) / (n + ADAPTIVE_PRIOR_WEIGHT)
+                fail = min(max(fail, 0.01), 0.99)
+                state.difficulty[i] = math.log(fail / (1.0 - fail))
+                state.answers[i] = n
+                seeded += 1
+        return seeded
+
+    def next_question(self, role: str, ability: float, asked: Sequence[str] = (),
+                      candidate_id: Optional[str] = None) -> Optional[Question]:
+        """The next question for a session at `ability`, never one in `asked` (ids)."""
+        bank = self.banks.index.roles.get(role)
+        if bank is None:
+            return None
+        state = self._state(bank)
+        distance = np.abs(state.difficulty - ability)
+        distance[bank.weights <= 0] = np.inf
+        seen = self.banks.seen.exclusion(candidate_id, bank) if candidate_id else None
+        if seen is not None and np.count_nonzero(~seen & np.isfinite(distance)) > len(asked):
+            distance[seen] = np.inf
+        for qid in asked:
+            loc = self.banks.index.by_id.get(qid)
+            if loc is not None and loc[0] == role:
+                distance[loc[1]] = np.inf
+        k = min(self.top_k, int(np.count_nonzero(np.isfinite(distance))))
+        if k <= 0:
+            return None
+        nearest = np.argpartition(distance, k - 1)[:k]
+        i = int(nearest[self.rng.integers(k)])
+        if candidate_id:
+            self.banks.seen.mark(candidate_id, bank, [i])
+        return bank.question(i)
+
+    def update(self, role: str, qid: str, ability: float, answered: int, verdict: str) -> float:
+        """
+        Fold one graded answer in: moves the question's difficulty and
+        returns the candidate's new ability. `answered` is how many answers
+        the session had before this one.
+        """
+        outcome = OUTCOME.get(verdict, 0.0)
+        bank = self.banks.index.roles.get(role)
+        loc = self.banks.index.by_id.get(qid)
+        if bank is None or loc is None or loc[0] != role:
+            return ability
+        state = self._state(bank)
+        i = loc[1]
+        surprise = outcome - expected(ability, state.difficulty[i])
+        item_k = max(ITEM_K_MIN, 1.0 / (state.answers[i] + ADAPTIVE_PRIOR_WEIGHT))
+        state.difficulty[i] -= item_k * surprise
+        state.answers[i] += 1
+        return ability + ABILITY_K / (1.0 + 0.5 * answered) * surprise
+
+    def difficulty(self, qid: str) -> Optional[float]:
+        loc = self.banks.index.by_id.get(qid)
+        if loc is None:
+            return None
+        return float(self._state(self.banks.index.roles[loc[0]]).difficulty[loc[1]])
+
+
+adaptive_engine = AdaptiveEngine()
@@ -0,0 +1,145 @@
+# batch_grader.py
+import os
+import asyncio
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from evaluator import AsyncEvaluator, alocal_evaluation, async_evaluator
+from metrics import GRADES, PARSE_FAILURES
+from structured_output import Grading, parse_grading_list
+from token_budget import count_tokens
+
+BATCH_TOKEN_BUDGET = int(os.getenv("BATCH_TOKEN_BUDGET", "3000"))     # prompt tokens per packed call
+BATCH_MAX_ITEMS_PER_CALL = int(os.getenv("BATCH_MAX_ITEMS_PER_CALL", "20"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_OUTPUT_TOKENS_PER_ITEM = 120
+
+BATCH_INSTRUCTIONS = """
+You are a strict but fair interviewer assistant. I will give you numbered interview questions, each with the candidate's answer.
+Grade every item independently.
+Return a JSON array with one object per item, in the same order, each with four keys: id, verdict, short_feedback, correction.
+- id: the item number.
+- verdict: one of "Correct", "Partially correct", or "Incorrect".
+- short_feedback: 1-2 sentence feedback on what was good/missing.
+- correction: a single-paragraph, simple concise correct answer that the candidate can learn.
+Keep each field short and in plain language.
+Return ONLY the JSON array.
+"""
+
+
+def format_item(n: int, question: str, answer: str) -> str:
+    return f"\nItem {n}\nQuestion: {question}\nCandidate answer: {answer}\n"
+
+
+def pack_batches(pairs: Sequence[Tuple[str, str]], token_budget: int = BATCH_TOKEN_BUDGET,
+                 max_items: int = BATCH_MAX_ITEMS_PER_CALL) -> List[List[int]]:
+    """
+    Group item indexes so each packed prompt stays under `token_budget`.
+    An item too big for the budget on its own still gets a batch of one.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    used = count_tokens(BATCH_INSTRUCTIONS)
+    for i, (question, answer) in enumerate(pairs):
+        cost = count_tokens(format_item(len(current) + 1, question, answer))
+        if current and (used + cost > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current = []
+            used = count_tokens(BATCH_INSTRUCTIONS)
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_prompt(pairs: Sequence[Tuple[str, str]]) -> str:
+    prompt = BATCH_INSTRUCTIONS
+    for n, (question, answer) in enumerate(pairs, start=1):
+        prompt += format_item(n, question, answer)
+    return prompt
+
+
+def parse_batch_response(text: str, count: int) -> List[Optional[Dict[str, str]]]:
+    """
+    Map the model's JSON array back to `count` items. Objects are matched by
+    `id` when present, otherwise by position; anything missing or malformed
+    comes back as None.
+    """
+    results: List[Optional[Dict[str, str]]] = [None] * count
+    for pos, obj in enumerate(parse_grading_list(text)):
+        grading = Grading.from_obj(obj)
+        if grading is None:
+            continue
+        try:
+            idx = int(obj["id"]) - 1 if "id" in obj else pos
+        except (TypeError, ValueError):
+            idx = pos
+        if 0 <= idx < count and results[idx] is None:
+            results[idx] = grading.model_dump()
+    return results
+
+
+async def grade_batch(pairs: Sequence[Tuple[str, str]], mode: str = "pack",
+                      token_budget: int = BATCH_TOKEN_BUDGET, concurrency: int = BATCH_CONCURRENCY,
+                      evaluator: AsyncEvaluator = async_evaluator) -> List[Dict[str, str]]:
+    """
+    Grade many (question, answer) pairs; results come back in input order in
+    `call_openai_evaluator`'s shape.
+
+    mode="pack":   several items per model call, up to `token_budget` prompt
+                   tokens each; items the model skipped or mangled are
+                   re-graded one at a time.
+    mode="fanout": one call per item, `concurrency` at a time.
+    Pre-grader verdicts and cached single-item gradings are reused in both
+    modes; packed gradings come from a different prompt and aren't cached.
+    """
+    if mode not in ("pack", "fanout"):
+        raise ValueError(f"Unknown batch mode: {mode}")
+    results: List[Optional[Dict[str, str]]] = list(
+        await asyncio.gather(*(alocal_evaluation(q, a) for q, a in pairs)))
+    todo = [i for i, r in enumerate(results) if r is None]
+    sem = asyncio.Semaphore(concurrency)
+
+    async def grade_one(i: int) -> None:
+        async with sem:
+            results[i] = await evaluator.evaluate(*pairs[i])
+
+    if mode == "fanout":
+        await asyncio.gather(*(grade_one(i) for i in todo))
+        return results
+
+    async def grade_packed(batch: List[int]) -> List[int]:
+        sub = [pairs[i] for i in batch]
+        async with sem:
+            try:
+                text = await evaluator.complete(build_batch_prompt(sub), 0.0,
+                                                BATCH_OUTPUT_TOKENS_PER_ITEM * len(batch), op="batch")
+            except Exception:
+                return batch
+        missing = []
+        for i, parsed in zip(batch, parse_batch_response(text, len(batch))):
+            if parsed is None:
+                missing.append(i)
+            else:
+                results[i] = parsed
+        GRADES.inc("batch", amount=len(batch) - len(missing))
+        if missing:
+            PARSE_FAILURES.inc("batch", amount=len(missing))
+        return missing
+
+    missing_lists = await asyncio.gather(*(grade_packed(
+        [todo[j] for j in batch]) for batch in pack_batches([pairs[i] for i in todo], token_budget)))
+    await asyncio.gather(*(grade_one(i) for missing in missing_lists for i in missing))
+    return results
+
+
+def grade_batch_sync(pairs: Sequence[Tuple[str, str]], **kwargs) -> List[Dict[str, str]]:
+    """`grade_batch` for scripts that aren't running an event loop."""
+    async def run() -> List[Dict[str, str]]:
+        evaluator = AsyncEvaluator()   # the shared client is bound to the server's loop
+        try:
+            return await grade_batch(pairs, evaluator=evaluator, **kwargs)
+        finally:
+            await evaluator.aclose()
+
+    return asyncio.run(run())
@@ -0,0 +1,79 @@
+# bench_adaptive.py
+"""
+Adaptive question selection vs the fixed up-front pick.
+
+    python benchmarks/bench_adaptive.py [--per-role 5000] [--interviews 2000]
+
+Times `AdaptiveEngine.next_question` and `update` on a synthetic bank, and
+checks the model is useful: simulated candidates of known ability answer
+questions of known true difficulty, and we report how well the estimated
+abilities and learned difficulties track the true ones.
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adaptive import AdaptiveEngine, expected  # noqa: E402
+from bench_question_bank import timeit, write_banks  # noqa: E402
+from question_banks import QuestionBanks  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--per-role", type=int, default=5000)
+    parser.add_argument("--interviews", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_banks(tmp, 1, args.per_role)
+        banks = QuestionBanks(tmp, reload_interval=0)
+        engine = AdaptiveEngine(banks)
+        role = "Role 0"
+        bank = banks.index.roles[role]
+        asked = [bank.ids[i] for i in range(9)]
+
+        print(f"{args.per_role} questions")
+        print(f"fixed pick 10          {timeit(lambda: banks.pick(role, 10), args.repeat):8.1f} us per interview")
+        print(f"adaptive next_question {timeit(lambda: engine.next_question(role, 0.3, asked), args.repeat):8.1f} us"
+              f" per question")
+        print(f"adaptive update        {timeit(lambda: engine.update(role, asked[0], 0.3, 3, 'Correct'), args.repeat):8.1f} us"
+              f" per answer")
+
+        # simulated interviews against a hidden true difficulty per question
+        engine = AdaptiveEngine(banks, rng=np.random.default_rng(1))
+        rng = random.Random(1)
+        truth = {qid: (int(bank.difficulty[i]) - 2) + rng.gauss(0, 1) for i, qid in enumerate(bank.ids)}
+        errors, abilities, estimates = [], [], []
+        for _ in range(args.interviews):
+            ability, estimate, ids = rng.gauss(0, 1.2), 0.0, []
+            for n in range(args.questions):
+                q = engine.next_question(role, estimate, ids)
+                ids.append(q.id)
+                p = expected(ability, truth[q.id])
+                verdict = "Correct" if rng.random() < p else "Incorrect"
+                estimate = engine.update(role, q.id, estimate, n, verdict)
+            abilities.append(ability)
+            estimates.append(estimate)
+            errors.append(abs(estimate - ability))
+        state = engine._state(bank)
+        answered = np.flatnonzero(state.answers >= 5)
+        true_difficulty = [truth[bank.ids[i]] for i in answered]
+        ability_r = np.corrcoef(abilities, estimates)[0, 1]
+        learned_r = np.corrcoef(true_difficulty, state.difficulty[answered])[0, 1]
+        prior_r = np.corrcoef(true_difficulty, bank.difficulty[answered])[0, 1]
+        print(f"ability after {args.questions} questions: corr {ability_r:.2f}, "
+              f"mean abs error {sum(errors) / len(errors):.2f} logits (prior sd 1.2)")
+        print(f"difficulty of {len(answered)} questions with >=5 answers: corr {learned_r:.2f} with the truth "
+              f"(bank level alone: {prior_r:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# bench_answer_latency.py
+"""
+/answer latency under concurrent sessions, against the local stub LLM.
+
+    python benchmarks/bench_answer_latency.py [--levels 1,50,500] [--latency-ms 300]
+
+Starts benchmarks/stub_llm.py and the app with uvicorn, runs one interview
+per simulated candidate (all candidates at once) and prints p50/p99 of every
+/answer call for each concurrency level.
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import asyncio
+import statistics
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# the load generators are one client hammering a handful of sessions
+NO_RATE_LIMITS = {"START_RATE_PER_IP": "0", "ANSWER_RATE_PER_IP": "0", "ANSWER_RATE_PER_SESSION": "0",
+                  "BATCH_RATE_PER_IP": "0"}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(module: str, app_dir: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", module, "--app-dir", app_dir,
+         "--port", str(port), "--log-level", "warning", "--no-access-log",
+         "--timeout-keep-alive", "120"],
+        env={**os.environ, **env},
+    )
+
+
+def wait_ready(url: str, timeout: float = 15.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server at {url} did not come up")
+
+
+def percentile(samples, p: float) -> float:
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))
+    return ordered[k]
+
+
+async def interview(client: httpx.AsyncClient, num_questions: int, latencies: list) -> None:
+    r = await client.post("/start", json={"role": "Python Developer", "num_questions": num_questions})
+    sid = r.json()["session_id"]
+    for _ in range(num_questions):
+        t0 = time.perf_counter()
+        r = await client.post("/answer", json={"session_id": sid, "user_answer": "A decorator wraps a function."})
+        r.raise_for_status()
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+
+async def run_level(base_url: str, sessions: int, num_questions: int) -> dict:
+    limits = httpx.Limits(max_connections=sessions, max_keepalive_connections=sessions)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        latencies: list = []
+        t0 = time.perf_counter()
+        await asyncio.gather(*(interview(client, num_questions, latencies) for _ in range(sessions)))
+        wall = time.perf_counter() - t0
+    return {
+        "sessions": sessions,
+        "answers": len(latencies),
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 99),
+        "answers_per_s": len(latencies) / wall,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", default="1,50,500")
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    stub_port, app_port = free_port(), free_port()
+    stub = start_server("stub_llm:app", HERE, stub_port, {"STUB_LATENCY_MS": str(args.latency_ms)})
+    app = start_server("App:app", ROOT, app_port, {
+        **NO_RATE_LIMITS,
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+    })
+    try:
+        wait_ready(f"http://127.0.0.1:{stub_port}/docs")
+        wait_ready(f"http://127.0.0.1:{app_port}/docs")
+        print(f"stub latency {args.latency_ms:.0f} ms, {args.questions} answers per session")
+        print(f"{'sessions':>9} {'answers':>8} {'p50 ms':>9} {'p99 ms':>9} {'answers/s':>10}")
+        for level in (int(x) for x in args.levels.split(",")):
+            r = asyncio.run(run_level(f"http://127.0.0.1:{app_port}", level, args.questions))
+            print(f"{r['sessions']:>9} {r['answers']:>8} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['answers_per_s']:>10.1f}")
+    finally:
+        app.terminate()
+        stub.terminate()
+        app.wait()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
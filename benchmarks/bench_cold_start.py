@@ -0,0 +1,142 @@
+# bench_cold_start.py
+"""
+Cold start of one worker: import time, time to first response, warm-up and RSS.
+
+    python benchmarks/bench_cold_start.py [--runs 5] [--interviews 20]
+                                          [--max-import-ms 800] [--max-ready-ms 2000] [--max-rss-mib 200]
+
+- import: `import App` in a fresh interpreter (median of `--runs`), with the
+  slowest top-level modules from `-X importtime`;
+- first response: from spawning uvicorn to the first answered /healthz,
+  then to /healthz reporting ready, and the first interview's latency;
+- RSS: the worker's resident memory once ready, and after `--interviews`
+  interviews against the stub LLM (steady state).
+
+Exits 1 if a `--max-*` budget is exceeded, so it can run in CI.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+import httpx
+
+from bench_answer_latency import HERE, NO_RATE_LIMITS, ROOT, free_port, start_server, wait_ready
+
+IMPORT_ENV = {"RESULT_LOG": "", "PYTHONPATH": ROOT}
+
+
+def import_ms() -> float:
+    code = "import time; t = time.perf_counter(); import App; print((time.perf_counter() - t) * 1000)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env={**os.environ, **IMPORT_ENV},
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int = 8) -> list:
+    """(module, cumulative ms) of App's direct imports, slowest first."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import App"], cwd=ROOT,
+                         env={**os.environ, **IMPORT_ENV}, capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        _, cumulative, name = line[12:].split("|")
+        if not cumulative.strip().isdigit():
+            continue   # header
+        depth = (len(name) - len(name.lstrip())) // 2   # children are listed before their parent
+        if depth == 0 and name.strip() == "App":
+            break
+        if depth == 0:
+            rows = []   # the interpreter's own startup imports
+        elif depth == 1:
+            rows.append((name.strip(), int(cumulative) / 1000))
+    return sorted(rows, key=lambda r: -r[1])[:top]
+
+
+def rss_mib(client: httpx.Client) -> float:
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith("process_resident_memory_bytes "):
+            return float(line.split()[1]) / 2**20
+    return float("nan")
+
+
+def interview(client: httpx.Client) -> None:
+    sid = client.post("/start", json={"role": "Python Developer", "num_questions": 3}).json()["session_id"]
+    for _ in range(3):
+        client.post("/answer", json={"session_id": sid, "user_answer": "A decorator wraps a function."}) \
+            .raise_for_status()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--interviews", type=int, default=20)
+    parser.add_argument("--max-import-ms", type=float, default=0)
+    parser.add_argument("--max-ready-ms", type=float, default=0)
+    parser.add_argument("--max-rss-mib", type=float, default=0)
+    args = parser.parse_args()
+
+    imports = [import_ms() for _ in range(args.runs)]
+    result = {"import_ms": statistics.median(imports)}
+    print(f"import App       {result['import_ms']:8.0f} ms (median of {args.runs}, min {min(imports):.0f})")
+    for name, ms in slowest_imports():
+        print(f"  {name:22} {ms:6.0f} ms")
+
+    stub_port, app_port = free_port(), free_port()
+    stub = start_server("stub_llm:app", HERE, stub_port, {"STUB_LATENCY_MS": "50"})
+    try:
+        wait_ready(f"http://127.0.0.1:{stub_port}/docs")
+        t0 = time.perf_counter()
+        app = start_server("App:app", ROOT, app_port, {
+            **NO_RATE_LIMITS, "RESULT_LOG": "", "PREGRADER": "0",
+            "OPENAI_API_KEY": "stub", "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+        })
+        try:
+            with httpx.Client(base_url=f"http://127.0.0.1:{app_port}", timeout=30.0) as client:
+                first = ready = None
+                while ready is None and time.perf_counter() - t0 < 60:
+                    try:
+                        r = client.get("/healthz")
+                    except httpx.HTTPError:
+                        time.sleep(0.005)
+                        continue
+                    first = first or time.perf_counter() - t0
+                    if r.status_code == 200:
+                        ready = time.perf_counter() - t0
+                        warm_up = r.json()["warm_up_ms"]
+                    else:
+                        time.sleep(0.005)
+                if ready is None:
+                    raise RuntimeError("worker never became ready")
+                t1 = time.perf_counter()
+                interview(client)
+                first_interview = time.perf_counter() - t1
+                result.update(first_response_ms=first * 1000, ready_ms=ready * 1000, rss_ready_mib=rss_mib(client))
+                for _ in range(args.interviews):
+                    interview(client)
+                result["rss_steady_mib"] = rss_mib(client)
+        finally:
+            app.terminate()
+            app.wait()
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    print(f"first response   {result['first_response_ms']:8.0f} ms after spawn")
+    print(f"ready            {result['ready_ms']:8.0f} ms after spawn; warm-up "
+          + ", ".join(f"{k} {v:.0f}" for k, v in warm_up.items()) + " ms")
+    print(f"first interview  {first_interview * 1000:8.0f} ms (start + 3 answers, 50 ms stub)")
+    print(f"RSS              {result['rss_ready_mib']:8.1f} MiB ready, {result['rss_steady_mib']:.1f} MiB "
+          f"after {args.interviews} interviews")
+
+    over = [f"{key} {result[key]:.0f} > {limit:.0f}" for key, limit in
+            (("import_ms", args.max_import_ms), ("ready_ms", args.max_ready_ms), ("rss_steady_mib", args.max_rss_mib))
+            if limit and result[key] > limit]
+    if over:
+        print("over budget: " + "; ".join(over))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
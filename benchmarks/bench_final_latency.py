@@ -0,0 +1,79 @@
+# bench_final_latency.py
+"""
+End-of-interview latency with and without the background summary pipeline.
+
+    python benchmarks/bench_final_latency.py [--sessions 20] [--questions 5] [--latency-ms 300]
+
+Runs the app twice against the stub LLM, once with SUMMARY_PIPELINE=0 (grade,
+then summarise) and once with it on (grade, then append the last verdict to
+the running summary), and reports the latency of the final /answer call.
+Candidates "think" between answers so background work has time to run, as
+it would with real users.
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+from bench_answer_latency import NO_RATE_LIMITS, ROOT, HERE, free_port, start_server, wait_ready, percentile
+
+
+async def interview(client: httpx.AsyncClient, num_questions: int, think_s: float, finals: list) -> None:
+    r = await client.post("/start", json={"role": "Java Developer", "num_questions": num_questions})
+    sid = r.json()["session_id"]
+    for i in range(num_questions):
+        await asyncio.sleep(think_s)
+        t0 = time.perf_counter()
+        r = await client.post("/answer", json={"session_id": sid, "user_answer": f"Answer number {i} with some detail."})
+        r.raise_for_status()
+        if r.json()["done"]:
+            finals.append((time.perf_counter() - t0) * 1000.0)
+
+
+async def run(base_url: str, sessions: int, num_questions: int, think_s: float) -> list:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as client:
+        finals: list = []
+        await asyncio.gather(*(interview(client, num_questions, think_s, finals) for _ in range(sessions)))
+    return finals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--think-ms", type=float, default=1000.0)
+    args = parser.parse_args()
+
+    stub_port = free_port()
+    stub = start_server("stub_llm:app", HERE, stub_port, {"STUB_LATENCY_MS": str(args.latency_ms)})
+    try:
+        wait_ready(f"http://127.0.0.1:{stub_port}/docs")
+        print(f"stub latency {args.latency_ms:.0f} ms, {args.sessions} sessions x {args.questions} answers")
+        print(f"{'pipeline':>9} {'final p50 ms':>13} {'final p99 ms':>13}")
+        for enabled in ("0", "1"):
+            port = free_port()
+            app = start_server("App:app", ROOT, port, {
+                **NO_RATE_LIMITS,
+                "OPENAI_API_KEY": "stub",
+                "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+                "SUMMARY_PIPELINE": enabled,
+            })
+            try:
+                wait_ready(f"http://127.0.0.1:{port}/docs")
+                finals = asyncio.run(run(f"http://127.0.0.1:{port}", args.sessions, args.questions,
+                                         args.think_ms / 1000.0))
+                label = "on" if enabled == "1" else "off"
+                print(f"{label:>9} {statistics.median(finals):>13.1f} {percentile(finals, 99):>13.1f}")
+            finally:
+                app.terminate()
+                app.wait()
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
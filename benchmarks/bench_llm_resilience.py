@@ -0,0 +1,101 @@
+# bench_llm_resilience.py
+"""
+Success rate and tail latency of LLMClient against a faulty stub provider.
+
+    python benchmarks/bench_llm_resilience.py [--calls 400] [--error-rate 0.1] [--slow-rate 0.05]
+
+Starts benchmarks/stub_llm.py with injected 503s and slow responses, then
+runs the same batch of calls with no retries, with retries, and with
+retries plus hedging, printing success rate, p50 and p99. Finally the stub
+fails every request and the time to fail fast once the breaker opens is
+reported.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+from bench_answer_latency import HERE, ROOT, free_port, percentile, start_server, wait_ready
+
+sys.path.insert(0, ROOT)
+
+
+async def run_calls(client, calls: int, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one() -> None:
+        nonlocal failures
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                await client.complete("Grade this answer.", 0.0, 50, op="bench")
+            except Exception:
+                failures += 1
+                return
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return {"ok": len(latencies) / calls, "p50": statistics.median(latencies) if latencies else 0.0,
+            "p99": percentile(latencies, 99) if latencies else 0.0}
+
+
+async def main_async(args, stub_url: str) -> None:
+    from llm_client import CircuitBreaker, LLMClient
+
+    configs = [
+        ("no retries", dict(retries=0, hedge_after=0)),
+        ("retries=2", dict(retries=2, hedge_after=0)),
+        (f"retries=2 hedge@{args.hedge_ms:.0f}ms", dict(retries=2, hedge_after=args.hedge_ms / 1000.0)),
+    ]
+    for name, kwargs in configs:
+        client = LLMClient(timeout=10.0, breaker=CircuitBreaker(failures=0), **kwargs)
+        res = await run_calls(client, args.calls, args.concurrency)
+        await client.aclose()
+        print(f"{name:24s} ok {res['ok'] * 100:5.1f}%   p50 {res['p50']:7.1f} ms   p99 {res['p99']:7.1f} ms")
+
+    httpx.post(stub_url + "/stub/faults", json={"error_rate": 1.0, "slow_rate": 0.0})
+    breaker = CircuitBreaker(failures=5, cooldown=30)
+    client = LLMClient(timeout=10.0, retries=2, breaker=breaker)
+    timings = []
+    for _ in range(20):
+        t0 = time.perf_counter()
+        try:
+            await client.complete("Grade this answer.", 0.0, 50, op="bench")
+        except Exception as exc:
+            timings.append(((time.perf_counter() - t0) * 1000.0, type(exc).__name__))
+    await client.aclose()
+    print("outage: first call {:.1f} ms ({}), once open {:.3f} ms ({})".format(*timings[0], *timings[-1]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-ms", type=float, default=2000)
+    parser.add_argument("--hedge-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    port = free_port()
+    stub = start_server("stub_llm:app", HERE, port, {
+        "STUB_LATENCY_MS": str(args.latency_ms), "STUB_ERROR_RATE": str(args.error_rate),
+        "STUB_SLOW_RATE": str(args.slow_rate), "STUB_SLOW_MS": str(args.slow_ms)})
+    stub_url = f"http://127.0.0.1:{port}"
+    os.environ.update({"OPENAI_BASE_URL": stub_url + "/v1", "OPENAI_API_KEY": "stub"})
+    try:
+        wait_ready(stub_url + "/docs")
+        asyncio.run(main_async(args, stub_url))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
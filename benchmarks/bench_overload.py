@@ -0,0 +1,126 @@
+# bench_overload.py
+"""
+/answer latency at a multiple of the LLM capacity, with and without load
+shedding.
+
+    python benchmarks/bench_overload.py [--overload 10] [--seconds 10] [--latency-ms 300]
+
+The app gets LLM_MAX_CONCURRENCY slots against a stub that takes
+`--latency-ms` per call, so it can grade about slots / latency answers per
+second with the model. Answers (plus 10% new /start calls) then arrive
+open-loop at `--overload` times that rate. With shedding (LLM_MAX_QUEUE
+small) excess answers get the local fallback grade at once and new
+interviews are queued then refused with 429; without it (an unbounded
+queue) every answer waits its turn for the model.
+"""
+import re
+import time
+import random
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+from bench_answer_latency import NO_RATE_LIMITS, ROOT, HERE, free_port, percentile, start_server, wait_ready
+
+WORDS = "wraps function returns callable closure state arguments behaviour logging timing cache".split()
+
+
+def answer_text() -> str:
+    # varied text so the cache can't answer it (the pre-grader is switched off)
+    return "It " + " ".join(random.choice(WORDS) for _ in range(12)) + f" case {random.random():.6f}."
+
+
+async def run(base_url: str, rate: float, seconds: float) -> dict:
+    limits = httpx.Limits(max_connections=2000, max_keepalive_connections=2000)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        total = int(rate * seconds)
+        sids = []
+        for _ in range(total):
+            r = await client.post("/start", json={"role": "Python Developer", "num_questions": 10})
+            sids.append(r.json()["session_id"])
+        before = await client.get("/metrics")
+
+        answers, starts = [], []
+
+        async def answer(sid: str) -> None:
+            t0 = time.perf_counter()
+            r = await client.post("/answer", json={"session_id": sid, "user_answer": answer_text()})
+            answers.append(((time.perf_counter() - t0) * 1000.0, r.status_code))
+
+        async def start() -> None:
+            t0 = time.perf_counter()
+            r = await client.post("/start", json={"role": "Python Developer", "num_questions": 3})
+            starts.append(((time.perf_counter() - t0) * 1000.0, r.status_code))
+
+        tasks = []
+        t_start = time.perf_counter()
+        for i, sid in enumerate(sids):
+            delay = t_start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(answer(sid)))
+            if i % 10 == 0:
+                tasks.append(asyncio.ensure_future(start()))
+        await asyncio.gather(*tasks)
+        after = await client.get("/metrics")
+
+    def grades(text: str) -> dict:
+        return {m.group(1): float(m.group(2)) for m in re.finditer(r'grades_total\{source="(\w+)"\} (\S+)', text)}
+
+    g0, g1 = grades(before.text), grades(after.text)
+    graded = {k: g1.get(k, 0) - g0.get(k, 0) for k in g1}
+    latencies = [ms for ms, status in answers if status == 200]
+    return {
+        "p50": statistics.median(latencies), "p99": percentile(latencies, 99), "max": max(latencies),
+        "llm_share": graded.get("llm", 0) / max(1, sum(graded.values())),
+        "start_429": sum(status == 429 for _, status in starts) / max(1, len(starts)),
+        "start_p99": percentile([ms for ms, _ in starts], 99),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--overload", type=float, default=10.0)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--latency-ms", type=float, default=1000)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--queue", type=int, default=8)
+    args = parser.parse_args()
+
+    capacity = args.slots / (args.latency_ms / 1000.0)
+    rate = capacity * args.overload
+    stub_port = free_port()
+    stub = start_server("stub_llm:app", HERE, stub_port, {"STUB_LATENCY_MS": str(args.latency_ms)})
+    try:
+        wait_ready(f"http://127.0.0.1:{stub_port}/docs")
+        print(f"capacity ~{capacity:.0f} answers/s, offering {rate:.0f}/s for {args.seconds:.0f} s")
+        for name, queue in (("shedding", args.queue), ("no shedding", 1_000_000)):
+            port = free_port()
+            app = start_server("App:app", ROOT, port, {
+                **NO_RATE_LIMITS,
+                "OPENAI_API_KEY": "stub",
+                "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+                "LLM_MAX_CONCURRENCY": str(args.slots),
+                "LLM_MAX_QUEUE": str(queue),
+                "LLM_TIMEOUT": "60",
+                "SUMMARY_PIPELINE": "0",
+                "PREGRADER": "0",
+            })
+            try:
+                wait_ready(f"http://127.0.0.1:{port}/")
+                res = asyncio.run(run(f"http://127.0.0.1:{port}", rate, args.seconds))
+            finally:
+                app.terminate()
+                app.wait()
+            print(f"{name:12s} answer p50 {res['p50']:7.0f} ms  p99 {res['p99']:7.0f} ms  max {res['max']:7.0f} ms"
+                  f"  model-graded {res['llm_share'] * 100:4.0f}%  /start 429 {res['start_429'] * 100:4.0f}%"
+                  f"  /start p99 {res['start_p99']:6.0f} ms")
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
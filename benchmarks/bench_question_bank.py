@@ -0,0 +1,77 @@
+# bench_question_bank.py
+"""
+Question bank index at 100k questions per role.
+
+    python benchmarks/bench_question_bank.py [--per-role 100000] [--roles 3]
+
+Writes synthetic banks to a temp dir, then reports load time, index memory,
+and the cost of picking an interview (10 questions, weighted, without
+replacement), with and without a candidate's seen-bitset, plus hot reload.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from question_banks import QuestionBanks  # noqa: E402
+
+
+def write_banks(directory: str, roles: int, per_role: int) -> None:
+    for r in range(roles):
+        questions = [{
+            "id": f"r{r}-{i:06d}",
+            "text": f"Synthetic question {i} for role {r}?",
+            "tags": [f"tag{i % 17}"],
+            "difficulty": 1 + i % 3,
+            "weight": 0.5 + random.random(),
+        } for i in range(per_role)]
+        with open(os.path.join(directory, f"role{r}.json"), "w") as f:
+            json.dump({"role": f"Role {r}", "questions": questions}, f)
+
+
+def timeit(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--per-role", type=int, default=100_000)
+    parser.add_argument("--roles", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_banks(tmp, args.roles, args.per_role)
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        banks = QuestionBanks(tmp, reload_interval=0)
+        load_s = time.perf_counter() - t0
+        heap = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{args.roles} roles x {args.per_role} questions")
+        print(f"load            {load_s * 1000:10.1f} ms   index heap {heap / 2**20:.1f} MiB")
+
+        role = "Role 0"
+        print(f"pick 10         {timeit(lambda: banks.pick(role, 10), args.repeat):10.1f} us")
+        counter = iter(range(10**9))
+        print(f"pick 10 + seen  {timeit(lambda: banks.pick(role, 10, f'c{next(counter) % 1000}'), args.repeat):10.1f} us"
+              f"   ({len(banks.seen._bits)} candidates, {args.per_role // 8} B bitset each)")
+        print(f"get by id       {timeit(lambda: banks.get('r0-054321'), args.repeat * 100):10.3f} us")
+
+        os.utime(os.path.join(tmp, "role0.json"))
+        t0 = time.perf_counter()
+        banks.reload()
+        print(f"hot reload      {(time.perf_counter() - t0) * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
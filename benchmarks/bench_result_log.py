@@ -0,0 +1,92 @@
+# bench_result_log.py
+"""
+Interview result log at millions of answers.
+
+    python benchmarks/bench_result_log.py [--interviews 200000] [--questions 5]
+
+Records synthetic finished interviews into a fresh SQLite file as fast as
+possible, then reports the cost of `record()` on the caller's side (what
+/answer pays), writer throughput, file size, and the latency of each
+analytics query.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_log import ResultLog  # noqa: E402
+from session import Session, Verdict  # noqa: E402
+
+ROLES = ["Backend Engineer", "Data Scientist", "Frontend Engineer", "DevOps Engineer"]
+QUESTIONS_PER_ROLE = 200
+CANDIDATES = 50000
+
+
+def session(rng: random.Random, questions: int) -> Session:
+    role = rng.choice(ROLES)
+    picked = [rng.randrange(QUESTIONS_PER_ROLE) for _ in range(questions)]
+    # not bank ids, so they're logged as question text, like sessions from before question ids
+    s = Session(role, [f"{role} question {q}: explain the trade-offs?" for q in picked],
+                candidate_id=f"c{rng.randrange(CANDIDATES)}")
+    for q in picked:
+        verdict = Verdict(min(2, int(rng.random() * 3 * (0.5 + q / QUESTIONS_PER_ROLE))))
+        s.add_answer("A short synthetic answer about the trade-offs involved.",
+                     {"verdict": verdict.label, "short_feedback": "Synthetic feedback.", "correction": ""})
+    return s
+
+
+def timed(fn, repeat: int = 50) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--interviews", type=int, default=200000)
+    parser.add_argument("--questions", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    sessions = [session(rng, args.questions) for _ in range(min(args.interviews, 10000))]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "results.db")
+        log = ResultLog(path, max_pending=args.interviews)
+        record_cost = []
+        t0 = time.perf_counter()
+        for i in range(args.interviews):
+            s = sessions[i % len(sessions)]
+            r0 = time.perf_counter()
+            log.record(f"s{i}", s, "summary")
+            record_cost.append(time.perf_counter() - r0)
+        log.flush(timeout=3600)
+        elapsed = time.perf_counter() - t0
+        answers = args.interviews * args.questions
+        record_cost.sort()
+        print(f"record(): median {statistics.median(record_cost) * 1e6:.1f} us, "
+              f"p99 {record_cost[int(len(record_cost) * 0.99)] * 1e6:.1f} us  (dropped {log.stats['dropped']})")
+        print(f"ingest: {args.interviews} interviews / {answers} answers in {elapsed:.1f}s "
+              f"= {answers / elapsed:,.0f} answers/s in {log.stats['batches']} batches")
+        print(f"file: {os.path.getsize(path) / 1e6:.0f} MB")
+
+        candidate = sessions[0].candidate_id
+        print(f"role_pass_rates:            {timed(log.role_pass_rates):.2f} ms")
+        print(f"question_pass_rates(all):   {timed(lambda: log.question_pass_rates(limit=100)):.2f} ms")
+        print(f"question_pass_rates(role):  {timed(lambda: log.question_pass_rates(ROLES[0])):.2f} ms")
+        print(f"candidate_history:          {timed(lambda: log.candidate_history(candidate)):.2f} ms")
+        t0 = time.perf_counter()
+        log.rebuild_stats()
+        print(f"rebuild_stats (full scan):  {(time.perf_counter() - t0) * 1000:.0f} ms")
+        log.close()
+
+
+if __name__ == "__main__":
+    main()
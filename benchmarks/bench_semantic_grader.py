@@ -0,0 +1,100 @@
+# bench_semantic_grader.py
+"""
+Similarity grader: index build, startup and grading throughput.
+
+    python benchmarks/bench_semantic_grader.py [--per-role 2000] [--roles 5] [--answers 20000]
+
+Writes synthetic banks whose questions all have a reference answer, builds
+the hashed reference matrix, then times opening it (memory-mapped, as at
+startup) and grading answers one at a time, and shows the verdict mix.
+The real banks are graded too, against a few hand-written answers.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import resident_memory_bytes  # noqa: E402
+from question_banks import QuestionBanks, question_banks  # noqa: E402
+from semantic_grader import SemanticGrader, build_index  # noqa: E402
+
+WORDS = ("thread process memory garbage collector heap stack bytecode compiler interface class object method "
+         "inheritance polymorphism encapsulation abstraction index query join transaction lock cache network "
+         "latency throughput request response server client session cookie token hash table list tree graph "
+         "queue sort search recursion iterator generator decorator closure scope module package dependency").split()
+
+SAMPLES = [
+    ("What is Java and what are its main features?",
+     "Java is an object oriented language compiled to bytecode that runs on the JVM, with garbage collection "
+     "and static typing."),
+    ("What is Java and what are its main features?", "Java is a programming language."),
+    ("What is Java and what are its main features?", "A set has no duplicates and a list keeps order."),
+]
+
+
+def write_banks(directory: str, roles: int, per_role: int, rng: random.Random) -> None:
+    for r in range(roles):
+        questions = [{"id": f"r{r}-{i:06d}", "text": f"Explain topic {i} of role {r}?",
+                      "reference": " ".join(rng.choice(WORDS) for _ in range(30))} for i in range(per_role)]
+        with open(os.path.join(directory, f"role{r}.json"), "w") as f:
+            json.dump({"role": f"Role {r}", "questions": questions}, f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--per-role", type=int, default=2000)
+    parser.add_argument("--roles", type=int, default=5)
+    parser.add_argument("--answers", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as tmp:
+        bank_dir, index_dir = os.path.join(tmp, "banks"), os.path.join(tmp, "index")
+        os.makedirs(bank_dir)
+        write_banks(bank_dir, args.roles, args.per_role, rng)
+        banks = QuestionBanks(bank_dir, reload_interval=0)
+        references = banks.references()
+
+        t0 = time.perf_counter()
+        build_index(references, index_dir)
+        build_s = time.perf_counter() - t0
+        size = os.path.getsize(os.path.join(index_dir, "vectors.npy"))
+        rss0 = resident_memory_bytes()
+        t0 = time.perf_counter()
+        grader = SemanticGrader(index_dir, banks)
+        load_ms = (time.perf_counter() - t0) * 1000
+        print(f"{args.roles} roles x {args.per_role} questions: build {build_s:.1f} s, matrix {size / 2**20:.0f} MiB")
+        print(f"open (mmap)      {load_ms:8.1f} ms, RSS +{(resident_memory_bytes() - rss0) / 2**20:.1f} MiB")
+
+        pairs = []
+        for _ in range(args.answers):
+            role = rng.choice(list(references))
+            question, reference = rng.choice(list(references[role].items()))
+            words = reference.split()
+            keep = rng.random()
+            answer = " ".join(w if rng.random() < keep else rng.choice(WORDS) for w in words[:rng.randint(5, 30)])
+            pairs.append((question, answer))
+        t0 = time.perf_counter()
+        verdicts = [grader.grade(q, a)["verdict"] for q, a in pairs]
+        elapsed = time.perf_counter() - t0
+        print(f"grade            {elapsed / len(pairs) * 1e6:8.1f} us/answer = {len(pairs) / elapsed:,.0f} answers/s "
+              f"(one core), RSS +{(resident_memory_bytes() - rss0) / 2**20:.1f} MiB")
+        mix = {v: verdicts.count(v) / len(verdicts) for v in ("Correct", "Partially correct", "Incorrect")}
+        print("verdicts         " + ", ".join(f"{v} {share:.0%}" for v, share in mix.items()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build_index(question_banks.references(), tmp)
+        grader = SemanticGrader(tmp, question_banks)
+        print("\nreal banks:")
+        for question, answer in SAMPLES:
+            own, other = grader.similarities(question, answer)
+            print(f"  {own:5.2f} (other {other:4.2f}) {grader.grade(question, answer)['verdict']:18} {answer[:60]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# bench_session_memory.py
+"""
+Bytes per live session: the old dict-of-dicts sessions against `Session`.
+
+    python benchmarks/bench_session_memory.py [--sessions 20000] [--questions 5] [--long 0.2]
+
+Builds the same interviews both ways, each at three stages (just started,
+half answered, fully answered with a running summary), and reports the
+Python heap per session (tracemalloc), the serialised size for the shared
+stores (old: JSON dict; new: `Session.dumps`) and the cost of a
+dumps + loads round trip. Answers are bank reference answers or vague
+one-liners, `--long` of them padded to ~1,500 characters; half the
+corrections come from the model, the rest are the reference answer (as
+the local graders return it).
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from question_banks import question_banks  # noqa: E402
+from session import MSGPACK_AVAILABLE, Session  # noqa: E402
+
+ROLE = "Python Developer"
+FEEDBACK = "Covers the main idea, but the example is missing and the second half drifts off topic."
+CORRECTION = ("A decorator is a function that takes another function and returns a new one that adds "
+              "behaviour before or after calling it, applied with the @name syntax above a definition.")
+
+
+def interview(rng: random.Random, questions: int, long_share: float) -> list:
+    """
+    [(question, answer, verdict, model?)] for one candidate. Text arriving
+    in requests and model replies is kept encoded, and decoded (a fresh
+    string, as in the app) when a session is built.
+    """
+    out = []
+    for q in question_banks.pick(ROLE, questions):
+        answer = q.reference if rng.random() < 0.6 else "I think it is used to make code faster."
+        if rng.random() < long_share:
+            answer = (answer + " ") * (1500 // (len(answer) + 1) + 1)
+        out.append((q, answer.encode("utf-8"), rng.choice(("Correct", "Partially correct", "Incorrect")),
+                    rng.random() < 0.5))
+    return out
+
+
+def grading(q, verdict: str, model: bool) -> dict:
+    if model:
+        return {"verdict": verdict, "short_feedback": FEEDBACK.encode("utf-8").decode("utf-8"),
+                "correction": CORRECTION.encode("utf-8").decode("utf-8")}
+    return {"verdict": verdict, "short_feedback": "Covers the key points.", "correction": q.reference}
+
+
+def old_session(items: list, answered: int, summary: bool) -> dict:
+    """What App used to keep: question texts, and every answer as a dict of full strings."""
+    session = {"role": ROLE, "candidate_id": None, "started": time.time(),
+               "questions": [q.text for q, _, _, _ in items], "current": answered, "answers": []}
+    for q, answer, verdict, model in items[:answered]:
+        g = grading(q, verdict, model)
+        session["answers"].append({"question": q.text, "user_answer": answer.decode("utf-8"),
+                                   "verdict": g["verdict"], "feedback": g["short_feedback"],
+                                   "correction": g["correction"]})
+    if summary:
+        session["summary_state"] = {"text": FEEDBACK.encode("utf-8").decode("utf-8"), "upto": answered,
+                                    "tokens": 400}
+    return session
+
+
+def new_session(items: list, answered: int, summary: bool) -> Session:
+    session = Session(ROLE, [q.id for q, _, _, _ in items])
+    for q, answer, verdict, model in items[:answered]:
+        session.add_answer(answer.decode("utf-8"), grading(q, verdict, model))
+    if summary:
+        session.summary_state = {"text": FEEDBACK.encode("utf-8").decode("utf-8"), "upto": answered,
+                                 "tokens": 400}
+    return session
+
+
+def heap_per_session(build, interviews: list, answered: int, summary: bool) -> float:
+    tracemalloc.start()
+    kept = [build(items, answered, summary) for items in interviews]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size / len(interviews)
+
+
+def round_trip_us(dump, load, sessions: list) -> float:
+    t0 = time.perf_counter()
+    for s in sessions:
+        load(dump(s))
+    return (time.perf_counter() - t0) / len(sessions) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--long", type=float, default=0.2)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    interviews = [interview(rng, args.questions, args.long) for _ in range(args.sessions)]
+    dump_json = lambda s: json.dumps(s, separators=(",", ":"))   # noqa: E731
+    print(f"{args.sessions} sessions of {args.questions} questions, {args.long:.0%} long answers, "
+          f"serialised with {'msgpack' if MSGPACK_AVAILABLE else 'JSON'}")
+    print(f"{'stage':<22} {'heap old':>9} {'heap new':>9} {'':>6} {'wire old':>9} {'wire new':>9} {'':>6} "
+          f"{'rt old us':>9} {'rt new us':>9}")
+    for stage, answered, summary in (("started", 0, False), ("half answered", args.questions // 2, False),
+                                     ("answered + summary", args.questions, True)):
+        heap_old = heap_per_session(old_session, interviews, answered, summary)
+        heap_new = heap_per_session(new_session, interviews, answered, summary)
+        sample = interviews[:2000]
+        olds = [old_session(items, answered, summary) for items in sample]
+        news = [new_session(items, answered, summary) for items in sample]
+        wire_old = sum(len(dump_json(s).encode("utf-8")) for s in olds) / len(olds)
+        wire_new = sum(len(s.dumps()) for s in news) / len(news)
+        rt_old = round_trip_us(dump_json, json.loads, olds)
+        rt_new = round_trip_us(Session.dumps, Session.loads, news)
+        print(f"{stage:<22} {heap_old:>8.0f}B {heap_new:>8.0f}B {heap_new / heap_old - 1:>+6.0%} "
+              f"{wire_old:>8.0f}B {wire_new:>8.0f}B {wire_new / wire_old - 1:>+6.0%} {rt_old:>9.1f} {rt_new:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
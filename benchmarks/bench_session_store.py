@@ -0,0 +1,79 @@
+# bench_session_store.py
+"""
+Memory and throughput of the session stores at 100k live sessions.
+
+    python benchmarks/bench_session_store.py [--sessions 100000] [--redis redis://localhost:6379/0]
+
+For each store: inserts N five-question sessions, then runs N answer-shaped
+get + put round trips, and reports ops/s plus the memory the sessions cost
+(Python heap for the in-memory store, database size for SQLite).
+"""
+import os
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from question_banks import question_banks  # noqa: E402
+from session import Session  # noqa: E402
+from session_store import MemorySessionStore, SQLiteSessionStore, RedisSessionStore  # noqa: E402
+
+QUESTION_IDS = [q.id for q in question_banks.pick("Python Developer", 5)]
+
+
+def new_session() -> Session:
+    return Session("Python Developer", QUESTION_IDS)
+
+
+async def bench(name: str, store, n: int, measure_heap: bool) -> None:
+    sids = [str(uuid.uuid4()) for _ in range(n)]
+    if measure_heap:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    for sid in sids:
+        await store.put(sid, new_session())
+    insert_s = time.perf_counter() - t0
+    heap = tracemalloc.get_traced_memory()[0] if measure_heap else None
+    if measure_heap:
+        tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    for sid in sids:
+        session = await store.get(sid)
+        session.add_answer("A decorator wraps a function to extend its behaviour.",
+                           {"verdict": "Correct", "short_feedback": "Clear and accurate.", "correction": ""})
+        await store.put(sid, session)
+    update_s = time.perf_counter() - t0
+
+    live = await store.count()
+    line = f"{name:<8} live={live:<7} insert {n / insert_s:>9.0f}/s  get+put {n / update_s:>9.0f}/s"
+    if heap is not None:
+        line += f"  heap {heap / 2**20:7.1f} MiB ({heap / n:.0f} B/session)"
+    if isinstance(store, SQLiteSessionStore):
+        size = sum(os.path.getsize(store.path + ext) for ext in ("", "-wal") if os.path.exists(store.path + ext))
+        line += f"  db {size / 2**20:7.1f} MiB"
+    print(line)
+    await store.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--redis", default=os.getenv("REDIS_URL"))
+    args = parser.parse_args()
+    n = args.sessions
+
+    await bench("memory", MemorySessionStore(max_sessions=n), n, measure_heap=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        await bench("sqlite", SQLiteSessionStore(os.path.join(tmp, "sessions.db")), n, measure_heap=False)
+    if args.redis:
+        await bench("redis", RedisSessionStore(args.redis), n, measure_heap=False)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+# bench_static.py
+"""
+Requests/s and bytes on the wire for GET / (and its 304 revalidation).
+
+    python benchmarks/bench_static.py [--baseline HEAD~1] [--seconds 5] [--concurrency 32]
+
+Runs the app under uvicorn and hammers `/` as a browser would (gzip + br
+accepted), as a plain client, and with If-None-Match. With `--baseline`
+the same load is run against that git revision first (checked out into a
+temporary worktree) for a before/after comparison.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import httpx
+
+from bench_answer_latency import ROOT, free_port, start_server, wait_ready
+
+CASES = {
+    "browser": {"accept-encoding": "gzip, deflate, br"},
+    "identity": {"accept-encoding": "identity"},
+}
+
+
+async def hammer(base_url: str, headers: dict, seconds: float, concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    counts = {"requests": 0, "bytes": 0, "status": set()}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        deadline = time.perf_counter() + seconds
+
+        async def worker() -> None:
+            while time.perf_counter() < deadline:
+                async with client.stream("GET", "/", headers=headers) as r:
+                    async for chunk in r.aiter_raw():
+                        counts["bytes"] += len(chunk)
+                    counts["status"].add(r.status_code)
+                counts["requests"] += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - t0
+    return {"rps": counts["requests"] / wall, "bytes": counts["bytes"] / max(1, counts["requests"]),
+            "status": sorted(counts["status"])}
+
+
+def run(label: str, app_dir: str, seconds: float, concurrency: int) -> None:
+    port = free_port()
+    server = start_server("App:app", app_dir, port, {"PYTHONPATH": app_dir})
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(base_url + "/")
+        etag = httpx.get(base_url + "/").headers.get("etag")
+        cases = dict(CASES)
+        if etag:
+            cases["revalidate"] = {"accept-encoding": "gzip, deflate, br", "if-none-match": etag}
+        for name, headers in cases.items():
+            res = asyncio.run(hammer(base_url, headers, seconds, concurrency))
+            print(f"{label:10s} {name:11s} {res['rps']:9.0f} req/s {res['bytes']:8.0f} B/resp  status {res['status']}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baseline", help="git revision to compare against, e.g. HEAD~1")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tmp:
+            worktree = os.path.join(tmp, "baseline")
+            subprocess.run(["git", "-C", ROOT, "worktree", "add", "--detach", worktree, args.baseline],
+                           check=True, capture_output=True)
+            try:
+                run("before", worktree, args.seconds, args.concurrency)
+            finally:
+                subprocess.run(["git", "-C", ROOT, "worktree", "remove", "--force", worktree], check=True)
+    run("after", ROOT, args.seconds, args.concurrency)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# bench_structured_output.py
+"""
+Parse-failure rate of model replies, old parser vs structured_output.
+
+    python benchmarks/bench_structured_output.py [--corpus benchmarks/malformed_outputs.jsonl]
+
+Every case in the corpus is a reply a model has been seen to produce, with
+the verdict a human would read from it (null if there is none to recover
+without asking the model again). Prints each case both parsers got wrong,
+the failure rate of each, how many replies would still need a repair call,
+parse cost per reply, and how far into a streamed reply the verdict becomes
+usable.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import StreamingFieldParser  # noqa: E402
+from structured_output import ParseError, parse_grading  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def legacy_parse(text: str) -> str:
+    """What evaluator.parse_eval_response did before: first `{` to the end, json.loads."""
+    jstart = text.find("{")
+    data = json.loads(text[jstart:] if jstart != -1 else text)
+    return data.get("verdict", "Incorrect")
+
+
+def new_parse(text: str) -> str:
+    return parse_grading(text).verdict
+
+
+def outcome(parse, text: str, expected):
+    try:
+        got = parse(text)
+    except (ValueError, ParseError, AttributeError, TypeError):
+        got = None
+    return got, got == expected
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=os.path.join(HERE, "malformed_outputs.jsonl"))
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+    recoverable = [c for c in cases if c["verdict"] is not None]
+
+    print(f"{'case':34} {'expected':18} {'legacy':18} {'new':18}")
+    wrong = {"legacy": 0, "new": 0}
+    repairs = 0
+    for c in cases:
+        legacy, legacy_ok = outcome(legacy_parse, c["text"], c["verdict"])
+        new, new_ok = outcome(new_parse, c["text"], c["verdict"])
+        wrong["legacy"] += not legacy_ok
+        wrong["new"] += not new_ok
+        repairs += new is None
+        if not (legacy_ok and new_ok):
+            print(f"{c['case']:34} {str(c['verdict']):18} {str(legacy):18} {str(new):18}")
+
+    print(f"\n{len(cases)} replies, {len(recoverable)} with a verdict to recover")
+    for name in ("legacy", "new"):
+        print(f"{name:7} wrong or failed: {wrong[name]:3} = {wrong[name] / len(cases):6.1%}")
+    print(f"new parser leaves {repairs} replies ({repairs / len(cases):.1%}) for a repair call; "
+          f"the old one sent {sum(outcome(legacy_parse, c['text'], None)[0] is None for c in cases)} to the canned fallback")
+
+    for name, parse in (("legacy", legacy_parse), ("new", new_parse)):
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for c in cases:
+                outcome(parse, c["text"], c["verdict"])
+        print(f"{name:7} parse cost: {(time.perf_counter() - t0) / (args.repeat * len(cases)) * 1e6:6.1f} us/reply")
+
+    clean = next(c["text"] for c in cases if c["case"] == "clean")
+    stream = StreamingFieldParser()
+    for i in range(0, len(clean), 4):
+        stream.feed(clean[i:i + 4])
+        if "verdict" in stream.complete:
+            print(f"streamed verdict usable after {i + 4}/{len(clean)} chars ({(i + 4) / len(clean):.0%} of the reply)")
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# bench_workers.py
+"""
+Throughput of serve.py as the worker count grows.
+
+    python benchmarks/bench_workers.py [--workers 1,2,4] [--sessions 64] [--seconds 15]
+
+For each worker count, starts the stub LLM and `serve.py --workers N` with
+sessions in a fresh SQLite file, then runs `--sessions` concurrent
+interviews from several load-generator processes for `--seconds` and
+prints completed answers per second and latency. Every /answer goes
+through a different connection than its /start half the time, so sessions
+really do move between workers. Throughput should grow with the worker
+count up to the number of cores; on a single core it can't.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+
+import httpx
+
+from bench_answer_latency import HERE, NO_RATE_LIMITS, ROOT, free_port, percentile, start_server, wait_ready
+
+
+async def load(base_url: str, sessions: int, seconds: float, questions: int) -> list:
+    latencies: list = []
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=sessions * 2, max_keepalive_connections=sessions * 2)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as a, \
+            httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as b:
+
+        async def candidate() -> None:
+            while time.perf_counter() < deadline:
+                r = await a.post("/start", json={"role": "Python Developer", "num_questions": questions})
+                sid = r.json()["session_id"]
+                for n in range(questions):
+                    client = random.choice((a, b))
+                    t0 = time.perf_counter()
+                    r = await client.post("/answer", json={
+                        "session_id": sid, "user_answer": f"A decorator wraps a function ({n} {random.random()})."})
+                    r.raise_for_status()
+                    latencies.append(time.perf_counter() - t0)
+
+        await asyncio.gather(*(candidate() for _ in range(sessions)))
+    return latencies
+
+
+def load_process(args) -> list:
+    return asyncio.run(load(*args))
+
+
+def run_level(workers: int, sessions: int, seconds: float, questions: int, generators: int,
+              stub_url: str) -> dict:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ, **NO_RATE_LIMITS,
+            "OPENAI_API_KEY": "stub", "OPENAI_BASE_URL": stub_url, "PREGRADER": "0", "EVAL_CACHE_SIZE": "0",
+            "SESSION_STORE": f"sqlite:///{tmp}/sessions.db", "RESULT_LOG": f"{tmp}/results.db",
+        }
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "serve.py"), "--workers", str(workers),
+                                   "--port", str(port), "--log-level", "warning", "--no-access-log"], env=env)
+        try:
+            wait_ready(f"http://127.0.0.1:{port}/docs", timeout=60)
+            base = f"http://127.0.0.1:{port}"
+            per = max(1, sessions // generators)
+            t0 = time.perf_counter()
+            with multiprocessing.Pool(generators) as pool:
+                parts = pool.map(load_process, [(base, per, seconds, questions)] * generators)
+            wall = time.perf_counter() - t0
+        finally:
+            server.terminate()
+            server.wait()
+    latencies = [x for part in parts for x in part]
+    return {"workers": workers, "answers": len(latencies), "answers_per_s": len(latencies) / wall,
+            "p50_ms": percentile(latencies, 50) * 1000, "p99_ms": percentile(latencies, 99) * 1000}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--generators", type=int, default=max(1, min(4, (os.cpu_count() or 1) // 2)))
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    stub_port = free_port()
+    stub = start_server("stub_llm:app", HERE, stub_port, {"STUB_LATENCY_MS": str(args.latency_ms)})
+    try:
+        wait_ready(f"http://127.0.0.1:{stub_port}/docs")
+        print(f"{os.cpu_count()} cores, {args.sessions} concurrent interviews, stub latency {args.latency_ms:.0f} ms")
+        print(f"{'workers':>8} {'answers':>8} {'answers/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+        for workers in (int(x) for x in args.workers.split(",")):
+            r = run_level(workers, args.sessions, args.seconds, args.questions, args.generators,
+                          f"http://127.0.0.1:{stub_port}/v1")
+            print(f"{r['workers']:>8} {r['answers']:>8} {r['answers_per_s']:>10.1f} "
+                  f"{r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+# load_test.py
+"""
+End-to-end load test: whole interviews against the app and the stub LLM.
+
+    python benchmarks/load_test.py [--concurrency 1,20,100] [--interviews 100] [--questions 5]
+                                   [--stream 0.3] [--adaptive 0.2] [--workers 1]
+                                   [--latency-ms 300] [--latency-dist lognormal] [--verdict hash]
+                                   [--error-rate 0] [--malformed-rate 0] [--disconnect-rate 0]
+                                   [--env KEY=VALUE ...] [--output report.json] [--compare old.json]
+
+Starts benchmarks/stub_llm.py and the app (`serve.py --workers N`, sessions
+in a fresh SQLite file), then for each concurrency level runs
+`--interviews` interviews from that many simulated candidates at once:
+/start, then `--questions` answers through /answer or, for `--stream` of
+the interviews, /answer/stream. Answers are drawn from the bank's
+reference answers (whole, cut short, vague or off-topic) with a fixed
+seed, so runs are comparable.
+
+Per level the report has throughput, latency percentiles per call type
+(first byte and verdict event for streams), status codes, LLM calls by
+kind from the stub (grade, batch, repair, summary) and per answer, the
+app's grade sources, and worker RSS. It is printed as a table and written
+as JSON with the git commit and settings; `--compare` prints the change
+against an earlier report, level by level.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from collections import Counter, defaultdict
+
+import httpx
+
+from bench_answer_latency import HERE, NO_RATE_LIMITS, ROOT, free_port, percentile, start_server, wait_ready
+
+sys.path.insert(0, ROOT)
+
+from question_banks import question_banks  # noqa: E402
+
+REPORT_VERSION = 1
+ROLES = ("Python Developer", "Java Developer", "Data Analyst", "Web Developer", "Software Engineer")
+VAGUE = ("I'm not sure, I think it depends on the situation.", "I don't know.", "It is used for performance.")
+COMPARED = (("answers_per_s",), ("answer", "p50_ms"), ("answer", "p99_ms"), ("stream.verdict", "p50_ms"),
+            ("llm_calls_per_answer",), ("errors",), ("rss_mib",))
+
+references = {q: a for role in question_banks.references().values() for q, a in role.items()}
+all_references = [a for a in references.values() if a]
+
+
+class Recorder:
+    """Latencies (ms) and status codes per call type."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def add(self, op: str, status, ms: float) -> None:
+        self.statuses[op][str(status)] += 1
+        if status == 200:
+            self.latencies[op].append(ms)
+
+
+def make_answer(question: str, rng: random.Random) -> str:
+    reference = references.get(question, "")
+    roll = rng.random()
+    if reference and roll < 0.4:
+        return reference
+    if reference and roll < 0.75:
+        words = reference.split()
+        return " ".join(words[:max(3, int(len(words) * rng.uniform(0.2, 0.7)))])
+    if roll < 0.9:
+        return rng.choice(VAGUE)
+    return rng.choice(all_references)   # most likely another question's answer
+
+
+async def answer_stream(client: httpx.AsyncClient, sid: str, answer: str, rec: Recorder) -> dict:
+    t0 = time.perf_counter()
+    first = verdict = None
+    event, final = None, {}
+    async with client.stream("POST", "/answer/stream", json={"session_id": sid, "user_answer": answer}) as r:
+        if r.status_code != 200:
+            await r.aread()
+            rec.add("stream", r.status_code, 0.0)
+            return {"done": True}
+        async for line in r.aiter_lines():
+            now = (time.perf_counter() - t0) * 1000
+            first = first or now
+            if line.startswith("event: "):
+                event = line[7:]
+                if event == "verdict" and verdict is None:
+                    verdict = now
+            elif line.startswith("data: ") and event in ("next", "done"):
+                final = json.loads(line[6:])
+    total = (time.perf_counter() - t0) * 1000
+    rec.add("stream", 200, total)
+    rec.latencies["stream.first_byte"].append(first or total)
+    if verdict is not None:
+        rec.latencies["stream.verdict"].append(verdict)
+    return final or {"done": True}
+
+
+async def interview(client: httpx.AsyncClient, n: int, args, rec: Recorder) -> int:
+    """One candidate's interview; returns the answers given."""
+    rng = random.Random(f"{args.seed}:{n}")
+    body = {"role": rng.choice(ROLES), "num_questions": args.questions,
+            "candidate_id": f"candidate-{n % 1000}", "adaptive": rng.random() < args.adaptive}
+    stream = rng.random() < args.stream
+    t0 = time.perf_counter()
+    r = await client.post("/start", json=body)
+    rec.add("start", r.status_code, (time.perf_counter() - t0) * 1000)
+    if r.status_code != 200:
+        return 0
+    sid, question = r.json()["session_id"], r.json()["question"]
+    answered = 0
+    while question:
+        answer = make_answer(question, rng)
+        if stream:
+            result = await answer_stream(client, sid, answer, rec)
+        else:
+            t0 = time.perf_counter()
+            r = await client.post("/answer", json={"session_id": sid, "user_answer": answer})
+            result = r.json() if r.status_code == 200 else {"done": True}
+            rec.add("answer_final" if result.get("done") else "answer", r.status_code,
+                    (time.perf_counter() - t0) * 1000)
+        answered += 1
+        question = None if result.get("done") else result.get("next_question")
+    return answered
+
+
+def scrape(client: httpx.Client) -> dict:
+    """RSS and grade sources from /metrics (the worker that answers)."""
+    out = {"grades": {}}
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith("process_resident_memory_bytes "):
+            out["rss_mib"] = round(float(line.split()[1]) / 2**20, 1)
+        elif line.startswith("grades_total{"):
+            source = line.split('source="', 1)[1].split('"', 1)[0]
+            out["grades"][source] = float(line.rsplit(" ", 1)[1])
+    return out
+
+
+async def run_level(base_url: str, stub_url: str, concurrency: int, args) -> dict:
+    httpx.post(stub_url + "/stub/reset")
+    with httpx.Client(base_url=base_url) as sync:
+        before = scrape(sync)
+    rec = Recorder()
+    tickets = iter(range(args.interviews))
+    answers = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async def candidate(client: httpx.AsyncClient) -> None:
+        nonlocal answers
+        for n in tickets:
+            try:
+                given = await interview(client, n, args, rec)
+                answers += given
+            except httpx.HTTPError as exc:
+                rec.add("start", type(exc).__name__, 0.0)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(candidate(client) for _ in range(concurrency)))
+        wall = time.perf_counter() - t0
+
+    llm = httpx.get(stub_url + "/stub/stats").json()
+    with httpx.Client(base_url=base_url) as sync:
+        after = scrape(sync)
+    level = {
+        "concurrency": concurrency, "interviews": args.interviews, "answers": answers, "seconds": round(wall, 2),
+        "answers_per_s": round(answers / wall, 1), "interviews_per_s": round(args.interviews / wall, 2),
+        "errors": sum(n for codes in rec.statuses.values() for code, n in codes.items() if code != "200"),
+        "statuses": {op: dict(codes) for op, codes in rec.statuses.items()},
+        "llm": llm, "llm_calls_per_answer": round(llm.get("calls", 0) / max(1, answers), 3),
+        "grades": {k: v - before["grades"].get(k, 0.0) for k, v in after["grades"].items()
+                   if v - before["grades"].get(k, 0.0)},
+        "rss_mib": after.get("rss_mib"),
+    }
+    for op, samples in rec.latencies.items():
+        if samples:
+            level[op] = {"n": len(samples), "p50_ms": round(percentile(samples, 50), 1),
+                         "p90_ms": round(percentile(samples, 90), 1), "p99_ms": round(percentile(samples, 99), 1),
+                         "max_ms": round(max(samples), 1)}
+    return level
+
+
+def lookup(level: dict, path: tuple):
+    for key in path:
+        level = level.get(key) if isinstance(level, dict) else None
+    return level
+
+
+def print_level(level: dict) -> None:
+    answer, verdict = level.get("answer", {}), level.get("stream.verdict", {})
+    print(f"{level['concurrency']:>6} {level['answers']:>8} {level['answers_per_s']:>10.1f} "
+          f"{answer.get('p50_ms', 0):>9.1f} {answer.get('p99_ms', 0):>9.1f} "
+          f"{verdict.get('p50_ms', 0):>11.1f} {level['llm_calls_per_answer']:>10.2f} "
+          f"{level['errors']:>7} {level['rss_mib'] or 0:>8.1f}")
+
+
+def compare(old: dict, new: dict) -> None:
+    previous = {lv["concurrency"]: lv for lv in old["levels"]}
+    print(f"\ncompared with {old.get('git', '?')} ({old.get('created', '?')}):")
+    for level in new["levels"]:
+        base = previous.get(level["concurrency"])
+        if base is None:
+            continue
+        print(f"  concurrency {level['concurrency']}:")
+        for path in COMPARED:
+            a, b = lookup(base, path), lookup(level, path)
+            if a is None or b is None:
+                continue
+            change = f"{(b - a) / a * 100:+.1f}%" if a else ""
+            print(f"    {'.'.join(path):24} {a:>10.2f} -> {b:>10.2f} {change:>8}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", default="1,20,100")
+    parser.add_argument("--interviews", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--stream", type=float, default=0.3, help="fraction of interviews using /answer/stream")
+    parser.add_argument("--adaptive", type=float, default=0.2, help="fraction of adaptive interviews")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--latency-dist", default="lognormal")
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--verdict", default="hash")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--disconnect-rate", type=float, default=0.0)
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE for the app, repeatable")
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    stub_port, app_port = free_port(), free_port()
+    stub = start_server("stub_llm:app", HERE, stub_port, {
+        "STUB_LATENCY_MS": str(args.latency_ms), "STUB_LATENCY_DIST": args.latency_dist,
+        "STUB_LATENCY_SPREAD": str(args.latency_spread), "STUB_VERDICT": args.verdict, "STUB_SEED": args.seed,
+        "STUB_ERROR_RATE": str(args.error_rate), "STUB_MALFORMED_RATE": str(args.malformed_rate),
+        "STUB_DISCONNECT_RATE": str(args.disconnect_rate)})
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    base_url = f"http://127.0.0.1:{app_port}"
+    report = {"version": REPORT_VERSION, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "git": git_commit(),
+              "host": {"cpus": os.cpu_count(), "python": platform.python_version()}, "settings": vars(args),
+              "levels": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, **NO_RATE_LIMITS, "OPENAI_API_KEY": "stub", "OPENAI_BASE_URL": stub_url + "/v1",
+               "SESSION_STORE": f"sqlite:///{tmp}/sessions.db", "RESULT_LOG": f"{tmp}/results.db",
+               **dict(kv.split("=", 1) for kv in args.env)}
+        app = subprocess.Popen([sys.executable, os.path.join(ROOT, "serve.py"), "--workers", str(args.workers),
+                                "--port", str(app_port), "--log-level", "warning", "--no-access-log"], env=env)
+        try:
+            wait_ready(stub_url + "/docs")
+            wait_ready(base_url + "/healthz", timeout=60)
+            print(f"stub {args.latency_dist} {args.latency_ms:.0f} ms, {args.questions} questions, "
+                  f"{args.stream:.0%} streamed, {args.adaptive:.0%} adaptive, {args.workers} worker(s)")
+            print(f"{'conc':>6} {'answers':>8} {'answers/s':>10} {'p50 ms':>9} {'p99 ms':>9} "
+                  f"{'verdict ms':>11} {'llm/ans':>10} {'errors':>7} {'RSS MiB':>8}")
+            for concurrency in (int(x) for x in args.concurrency.split(",")):
+                level = asyncio.run(run_level(base_url, stub_url, concurrency, args))
+                report["levels"].append(level)
+                print_level(level)
+        finally:
+            app.terminate()
+            stub.terminate()
+            app.wait()
+            stub.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"report written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# stub_llm.py
+"""
+OpenAI-compatible chat completions server for benchmarks and load tests.
+
+    STUB_LATENCY_MS=300 uvicorn stub_llm:app --app-dir benchmarks --port 8901
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8901/v1.
+
+Latency: STUB_LATENCY_MS is the median time to the first byte, drawn from
+STUB_LATENCY_DIST (fixed, uniform, normal, lognormal or exponential) with
+STUB_LATENCY_SPREAD (the relative half-width, relative standard deviation
+or lognormal sigma). Streamed replies then send one 8-character chunk every
+STUB_TOKEN_MS.
+
+Replies: gradings say STUB_VERDICT, or with STUB_VERDICT=hash a verdict
+picked from the candidate's answer, so the same answer always gets the
+same grade. Batch, repair and summary prompts get what they ask for.
+
+Fault injection: STUB_ERROR_RATE of requests fail with STUB_ERROR_STATUS,
+STUB_SLOW_RATE of requests take STUB_SLOW_MS instead, STUB_DISCONNECT_RATE
+of streams stop half-way without [DONE], and STUB_MALFORMED_RATE of JSON
+replies come back as STUB_MALFORMED_MODE (fenced, prose, trailing_comma,
+python, truncated, garbage, or mixed for any of them).
+
+Every random draw is seeded from STUB_SEED, the prompt and how many times
+that prompt was seen, so a run is reproducible whatever order concurrent
+requests arrive in, and a retry of a failed call is a new draw.
+
+At runtime: POST /stub/faults {"error_rate": 1.0, ...} changes any of the
+knobs above (lower-case, without the STUB_ prefix), GET /stub/stats counts
+calls by kind, faults and tokens, and POST /stub/reset zeroes the counts.
+"""
+import os
+import json
+import math
+import time
+import zlib
+import random
+import asyncio
+from collections import Counter
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.requests import ClientDisconnect
+
+LATENCY_DISTS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+MALFORMED_MODES = ("fenced", "prose", "trailing_comma", "python", "truncated", "garbage")
+VERDICTS = ("Correct", "Partially correct", "Incorrect")
+CHUNK_CHARS = 8
+MAX_TRACKED_PROMPTS = 100_000
+
+faults = {
+    "latency_ms": float(os.getenv("STUB_LATENCY_MS", "300")),
+    "latency_dist": os.getenv("STUB_LATENCY_DIST", "fixed"),
+    "latency_spread": float(os.getenv("STUB_LATENCY_SPREAD", "0.5")),
+    "token_ms": float(os.getenv("STUB_TOKEN_MS", "5")),
+    "verdict": os.getenv("STUB_VERDICT", "Partially correct"),
+    "seed": os.getenv("STUB_SEED", "0"),
+    "error_rate": float(os.getenv("STUB_ERROR_RATE", "0")),
+    "error_status": int(os.getenv("STUB_ERROR_STATUS", "503")),
+    "slow_rate": float(os.getenv("STUB_SLOW_RATE", "0")),
+    "slow_ms": float(os.getenv("STUB_SLOW_MS", "3000")),
+    "disconnect_rate": float(os.getenv("STUB_DISCONNECT_RATE", "0")),
+    "malformed_rate": float(os.getenv("STUB_MALFORMED_RATE", "0")),
+    "malformed_mode": os.getenv("STUB_MALFORMED_MODE", "mixed"),
+}
+stats: Counter = Counter()
+seen: Counter = Counter()   # prompt hash -> requests so far
+
+app = FastAPI()
+
+FEEDBACK = {
+    "Correct": "Accurate and complete.",
+    "Partially correct": "Covers the basics but misses an example.",
+    "Incorrect": "This doesn't answer the question.",
+}
+CORRECTION = "Give the definition, one example, and why it matters."
+SUMMARY = "The candidate knows the fundamentals. Answers were short. Practise adding examples."
+
+
+def latency_ms(rng: random.Random) -> float:
+    median, spread, dist = faults["latency_ms"], faults["latency_spread"], faults["latency_dist"]
+    if dist == "uniform":
+        return rng.uniform(median * (1 - spread), median * (1 + spread))
+    if dist == "normal":
+        return max(0.0, rng.gauss(median, median * spread))
+    if dist == "lognormal":
+        return median * math.exp(rng.gauss(0.0, spread))
+    if dist == "exponential":
+        return rng.expovariate(math.log(2) / median) if median else 0.0
+    return median
+
+
+def request_rng(prompt: str) -> random.Random:
+    key = zlib.crc32(prompt.encode("utf-8"))
+    if len(seen) > MAX_TRACKED_PROMPTS:
+        seen.clear()
+    seen[key] += 1
+    return random.Random(f"{faults['seed']}:{key}:{seen[key]}")
+
+
+def kind_of(prompt: str) -> str:
+    if "JSON array" in prompt:
+        return "batch"
+    if "Rewrite the text below" in prompt:
+        return "repair"
+    if "overall summary" in prompt:
+        return "summary"
+    return "grade"
+
+
+def grading(answer: str) -> dict:
+    verdict = faults["verdict"]
+    if verdict == "hash":
+        verdict = VERDICTS[zlib.crc32(answer.strip().encode("utf-8")) % len(VERDICTS)]
+    return {"verdict": verdict, "short_feedback": FEEDBACK.get(verdict, ""), "correction": CORRECTION}
+
+
+def reply(kind: str, prompt: str) -> str:
+    if kind == "summary":
+        return SUMMARY
+    if kind == "batch":
+        answers = [part.split("\n", 1)[0] for part in prompt.split("Candidate answer:")[1:]]
+        items = prompt.count("\nItem ")
+        return json.dumps([{"id": n, **grading(answers[n - 1] if n <= len(answers) else "")}
+                           for n in range(1, items + 1)])
+    if kind == "repair":
+        return json.dumps(grading(""))
+    answer = prompt.split("Candidate answer:", 1)[-1].split("\n", 1)[0]
+    return json.dumps(grading(answer))
+
+
+def malformed(content: str, mode: str, rng: random.Random) -> str:
+    if mode not in MALFORMED_MODES:
+        mode = rng.choice(MALFORMED_MODES)
+    if mode == "fenced":
+        return f"```json\n{content}\n```"
+    if mode == "prose":
+        return f"Here is my assessment:\n{content}\nLet me know if you need anything else."
+    if mode == "trailing_comma":
+        return content[:-1] + ",\n" + content[-1]
+    if mode == "python":
+        return repr(json.loads(content))
+    if mode == "truncated":
+        return content[:len(content) * 2 // 3]
+    return "The answer is on the right track but should mention an example."
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    try:
+        body = await request.json()
+    except ClientDisconnect:   # e.g. the losing half of a hedged request
+        return Response(status_code=499)
+    prompt = body["messages"][-1]["content"]
+    kind = kind_of(prompt)
+    rng = request_rng(prompt)
+    stats[f"calls_{kind}"] += 1
+    slow = rng.random() < faults["slow_rate"]
+    stats["slow"] += slow
+    await asyncio.sleep((faults["slow_ms"] if slow else latency_ms(rng)) / 1000.0)
+    if rng.random() < faults["error_rate"]:
+        stats["errors"] += 1
+        return JSONResponse({"error": {"message": "injected failure", "type": "server_error"}},
+                            status_code=faults["error_status"])
+    content = reply(kind, prompt)
+    if kind != "summary" and rng.random() < faults["malformed_rate"]:
+        stats["malformed"] += 1
+        content = malformed(content, faults["malformed_mode"], rng)
+    usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+             "total_tokens": (len(prompt) + len(content)) // 4}
+    stats["prompt_tokens"] += usage["prompt_tokens"]
+    stats["completion_tokens"] += usage["completion_tokens"]
+    if body.get("stream"):
+        stats["streamed"] += 1
+        cut = rng.random() < faults["disconnect_rate"]
+        stats["disconnects"] += cut
+        return StreamingResponse(stream_chunks(body, content, usage, cut), media_type="text/event-stream")
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": usage
+    }
+
+
+@app.get("/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "stub", "object": "model", "created": 0, "owned_by": "stub"}]}
+
+
+@app.post("/stub/faults")
+async def set_faults(request: Request):
+    faults.update({k: type(faults[k])(v) for k, v in (await request.json()).items() if k in faults})
+    return faults
+
+
+@app.get("/stub/stats")
+async def get_stats():
+    return {"calls": sum(v for k, v in stats.items() if k.startswith("calls_")), **stats}
+
+
+@app.post("/stub/reset")
+async def reset_stats():
+    stats.clear()
+    seen.clear()
+    return {}
+
+
+async def stream_chunks(body: dict, content: str, usage: dict, cut: bool = False):
+    end = len(content) // 2 if cut else len(content)
+    for i in range(0, end, CHUNK_CHARS):
+        chunk = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "delta": {"content": content[i:min(i + CHUNK_CHARS, end)]},
+                         "finish_reason": None}]
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(faults["token_ms"] / 1000.0)
+    if cut:
+        return   # the reply just stops, without finish_reason or [DONE]
+    if (body.get("stream_options") or {}).get("include_usage"):
+        chunk = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                 "model": body.get("model", "stub"), "choices": [], "usage": usage}
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
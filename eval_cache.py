@@ -0,0 +1,169 @@
+# eval_cache.py
+import os
+import re
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+EVAL_CACHE_SIZE = int(os.getenv("EVAL_CACHE_SIZE", "10000"))      # 0 disables the cache
+EVAL_CACHE_TTL = float(os.getenv("EVAL_CACHE_TTL", str(7 * 24 * 3600)))
+EVAL_CACHE_PATH = os.getenv("EVAL_CACHE_PATH", "")                # empty = memory tier only
+
+_WS = re.compile(r"\s+")
+_EDGE_PUNCT = ".,;:!?\"'`()[] "
+
+
+def normalize_answer(answer: str) -> str:
+    """
+    Fold answers that would get the same grade onto one string: case,
+    unicode width, apostrophes, whitespace runs and surrounding punctuation.
+    Symbols inside the answer (`==`, `!=`, `->`) are kept.
+    """
+    text = unicodedata.normalize("NFKC", answer).casefold()
+    text = text.replace("'", "").replace("’", "")
+    text = _WS.sub(" ", text)
+    return text.strip(_EDGE_PUNCT)
+
+
+def question_id(question: str) -> str:
+    return hashlib.sha1(question.encode("utf-8")).hexdigest()[:16]
+
+
+def fingerprint(*parts: str) -> str:
+    """Hash of everything that changes a grade (prompt template, model, ...)."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+class EvalCache:
+    """
+    Two-tier cache of gradings keyed on (question id, normalised answer).
+
+    The memory tier is an LRU of `max_entries`; the optional disk tier is a
+    SQLite file shared by every worker on the host. Keys include
+    `fingerprint`, so changing the prompt template or model never serves an
+    old grade, and the disk tier drops rows from other fingerprints on open.
+
+    Disk reads and writes run on the cache's own thread: `aget` awaits the
+    read without blocking the event loop, `put` queues the write and returns.
+    """
+
+    def __init__(self, fingerprint: str, max_entries: int = EVAL_CACHE_SIZE,
+                 ttl: float = EVAL_CACHE_TTL, path: str = EVAL_CACHE_PATH):
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._mem: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires, result)
+        self._db: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        if path and max_entries > 0:
+            self._db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS eval_cache "
+                "(key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, data TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM eval_cache WHERE fingerprint != ? OR expires <= ?",
+                             (fingerprint, time.time()))
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="eval-cache")
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def key(self, question: str, answer: str) -> str:
+        digest = hashlib.sha256(normalize_answer(answer).encode("utf-8")).hexdigest()[:32]
+        return f"{self.fingerprint}:{question_id(question)}:{digest}"
+
+    def _memory_get(self, key: str, now: float) -> Optional[Dict[str, str]]:
+        entry = self._mem.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._mem.move_to_end(key)
+                self.stats["hits"] += 1
+                return dict(entry[1])
+            del self._mem[key]
+        return None
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple]:
+        return self._db.execute("SELECT data, expires FROM eval_cache WHERE key = ? AND expires > ?",
+                                (key, now)).fetchone()
+
+    def _disk_put(self, key: str, data: str, expires: float) -> None:
+        self._db.execute("INSERT OR REPLACE INTO eval_cache (key, fingerprint, data, expires) VALUES (?, ?, ?, ?)",
+                         (key, self.fingerprint, data, expires))
+
+    def _from_disk(self, key: str, row: Optional[tuple]) -> Optional[Dict[str, str]]:
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        result = json.loads(row[0])
+        self._remember(key, row[1], result)
+        self.stats["disk_hits"] += 1
+        return dict(result)
+
+    def get(self, question: str, answer: str) -> Optional[Dict[str, str]]:
+        """Blocking lookup; on the event loop use `aget`."""
+        if not self.enabled:
+            return None
+        key = self.key(question, answer)
+        now = time.time()
+        result = self._memory_get(key, now)
+        if result is not None:
+            return result
+        if self._executor is None:
+            self.stats["misses"] += 1
+            return None
+        return self._from_disk(key, self._executor.submit(self._disk_get, key, now).result())
+
+    async def aget(self, question: str, answer: str) -> Optional[Dict[str, str]]:
+        if not self.enabled:
+            return None
+        key = self.key(question, answer)
+        now = time.time()
+        result = self._memory_get(key, now)
+        if result is not None:
+            return result
+        if self._executor is None:
+            self.stats["misses"] += 1
+            return None
+        row = await asyncio.get_running_loop().run_in_executor(self._executor, self._disk_get, key, now)
+        return self._from_disk(key, row)
+
+    def put(self, question: str, answer: str, result: Dict[str, str]) -> None:
+        if not self.enabled:
+            return
+        key = self.key(question, answer)
+        expires = time.time() + self.ttl
+        self._remember(key, expires, dict(result))
+        if self._executor is not None:
+            self._executor.submit(self._disk_put, key, json.dumps(result), expires)
+        self.stats["stores"] += 1
+
+    def _remember(self, key: str, expires: float, result: Dict[str, str]) -> None:
+        self._mem[key] = (expires, result)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        self._mem.clear()
+        if self._executor is not None:
+            self._executor.submit(self._db.execute, "DELETE FROM eval_cache").result()
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        hits = self.stats["hits"] + self.stats["disk_hits"]
+        return {**self.stats, "size": len(self._mem), "hit_rate": hits / lookups if lookups else 0.0}
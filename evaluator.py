@@ -0,0 +1,367 @@
+# evaluator.py
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+
+from eval_cache import EvalCache, fingerprint
+from json_stream import StreamingFieldParser
+from llm_client import (LLM_MAX_CONCURRENCY, LLM_MAX_CONNECTIONS, LLM_TIMEOUT, MODEL, OPENAI_AVAILABLE,
+                        LLMClient, LLMUnavailable, llm)
+from metrics import (GRADES, PARSE_FAILURES, PARSE_REPAIRS, PROMPT_TOKENS, PROMPT_TOKENS_SAVED, SUMMARIES,
+                     StatsGauges, span)
+from pregrader import pregrader
+from semantic_grader import semantic_grader
+from structured_output import (LLM_RESPONSE_FORMAT, Grading, ParseError, build_repair_prompt, parse_grading,
+                               response_format, truncated_grading)
+from token_budget import SUMMARY_TOKEN_BUDGET, compact_answers, count_tokens, truncate_tokens
+
+
+def build_eval_prompt(question: str, user_answer: str) -> str:
+    return f"""
+You are a strict but fair interviewer assistant. I will give you a question and the candidate's answer.
+Return a JSON object with three keys: verdict, short_feedback, correction.
+- verdict: one of "Correct", "Partially correct", or "Incorrect".
+- short_feedback: 1-2 sentence feedback on what was good/missing.
+- correction: a single-paragraph, simple concise correct answer that the candidate can learn.
+
+Question: {question}
+Candidate answer: {user_answer}
+
+Keep each field short and in plain language.
+Return ONLY valid JSON.
+"""
+
+
+def build_summary_prompt(role: str, answers: List[Dict[str, Any]], notes: str = "") -> str:
+    """`notes` is a summary of earlier answers that `answers` continues."""
+    summary_prompt = f"""
+You are an interviewer. Provide a 3-sentence overall summary of the candidate based on these Q/A pairs.
+Candidate role: {role}
+"""
+    if notes:
+        summary_prompt += f"Summary of the earlier answers: {notes}\nFurther Q/A pairs:\n"
+    else:
+        summary_prompt += "Q/A pairs:\n"
+    for a in answers:
+        summary_prompt += f"\nQ: {a['question']}\nA: {a['user_answer']}\nResult: {a['verdict']}\n"
+    summary_prompt += "\nKeep it short and constructive."
+    return summary_prompt
+
+
+def compact_summary_prompt(role: str, answers: List[Dict[str, Any]], notes: str = "",
+                           budget: int = SUMMARY_TOKEN_BUDGET, op: str = "summarize") -> str:
+    """
+    `build_summary_prompt`, with the answers (and, if need be, the notes)
+    shrunk so the prompt fits about `budget` tokens. Questions and verdicts
+    are always kept whole.
+    """
+    prompt = build_summary_prompt(role, answers, notes)
+    full = count_tokens(prompt)
+    if full > budget:
+        notes = truncate_tokens(notes, budget // 4)
+        overhead = count_tokens(build_summary_prompt(role, [{**a, "user_answer": ""} for a in answers], notes))
+        answers, _ = compact_answers(answers, budget - overhead)
+        prompt = build_summary_prompt(role, answers, notes)
+    tokens = count_tokens(prompt)
+    PROMPT_TOKENS.observe(tokens, op)
+    if tokens < full:
+        PROMPT_TOKENS_SAVED.inc(op, amount=full - tokens)
+    return prompt
+
+
+EVAL_MAX_TOKENS = 250
+REPAIR_MAX_TOKENS = 200
+EVAL_RESPONSE_FORMAT = response_format()
+
+
+def parse_eval_response(text: str) -> Dict[str, str]:
+    """The grading in the model's reply, validated. Raises ParseError (a ValueError) if there is none."""
+    return parse_grading(text).model_dump()
+
+
+def offline_evaluation(user_answer: str) -> Dict[str, str]:
+    """Grader used when OpenAI isn't installed, or the model is down or saturated."""
+    if len(user_answer.strip()) > 20:
+        return {
+            "verdict": "Partially correct",
+            "short_feedback": "You have some correct points but missed details.",
+            "correction": "Key idea: give concise definition and main points."
+        }
+    return {
+        "verdict": "Incorrect",
+        "short_feedback": "Short answer — missing key points.",
+        "correction": "Try to mention the definition and 2–3 main features."
+    }
+
+
+def failed_evaluation() -> Dict[str, str]:
+    """Grader used when the model call or its JSON fails."""
+    return {
+        "verdict": "Partially correct",
+        "short_feedback": "Couldn't fully evaluate — review key points.",
+        "correction": "Main idea: provide definition, example, and why it's useful."
+    }
+
+
+FAILED_SUMMARY = "Interview finished. Review answers for improvement."
+
+# model JSON key -> name used in API responses
+RESULT_FIELDS = {"verdict": "verdict", "short_feedback": "feedback", "correction": "correction"}
+
+# Only real model gradings are cached; fallbacks are cheap and shouldn't stick.
+eval_cache = EvalCache(fingerprint(build_eval_prompt("{question}", "{answer}"), MODEL, "temperature=0.0",
+                                   f"response_format={LLM_RESPONSE_FORMAT}"))
+StatsGauges("eval_cache", "Grading cache counters and hit rate.", eval_cache.metrics)
+if pregrader is not None:
+    StatsGauges("pregrader", "Pre-grader verdicts, escalations and thresholds.", pregrader.metrics)
+if semantic_grader is not None:
+    StatsGauges("semantic_grader", "Similarity grader verdicts and index size.", semantic_grader.metrics)
+
+
+def _graded_locally(question: str, user_answer: str) -> Optional[Dict[str, str]]:
+    if pregrader is not None:
+        result = pregrader.grade(question, user_answer)
+        if result is not None:
+            GRADES.inc("pregrader")
+            return result
+    if semantic_grader is not None:
+        result = semantic_grader.grade(question, user_answer)
+        if result is not None:
+            GRADES.inc("semantic")
+            return result
+    if not OPENAI_AVAILABLE:
+        GRADES.inc("offline")
+        return offline_evaluation(user_answer)
+    return None
+
+
+def local_evaluation(question: str, user_answer: str) -> Optional[Dict[str, str]]:
+    """
+    Grade without a model round-trip when possible: a confident pre-grader
+    verdict, the similarity grader (SEMANTIC_GRADER=1), the offline grader
+    when OpenAI isn't installed, or a cached grading. None means the model
+    has to be asked. Blocking on the disk cache; handlers use
+    `alocal_evaluation`.
+    """
+    with span("grade.local"):
+        result = _graded_locally(question, user_answer)
+        if result is not None:
+            return result
+        result = eval_cache.get(question, user_answer)
+    if result is not None:
+        GRADES.inc("cache")
+    return result
+
+
+async def alocal_evaluation(question: str, user_answer: str) -> Optional[Dict[str, str]]:
+    """`local_evaluation` with the disk cache read off the event loop."""
+    with span("grade.local"):
+        result = _graded_locally(question, user_answer)
+        if result is not None:
+            return result
+        result = await eval_cache.aget(question, user_answer)
+    if result is not None:
+        GRADES.inc("cache")
+    return result
+
+
+def accept_grading(question: str, user_answer: str, result: Dict[str, str]) -> Dict[str, str]:
+    GRADES.inc("llm")
+    eval_cache.put(question, user_answer, result)
+    return result
+
+
+def model_evaluation(question: str, user_answer: str, text: str) -> Optional[Dict[str, str]]:
+    """Turn the model's reply into a grading (cached), or None if it needs a repair call."""
+    try:
+        result = parse_eval_response(text)
+    except ParseError:
+        PARSE_FAILURES.inc("evaluate")
+        return None
+    return accept_grading(question, user_answer, result)
+
+
+def repaired_evaluation(question: str, user_answer: str, text: Optional[str]) -> Dict[str, str]:
+    """The grading from a repair call's reply (None if the call failed), or the fallback."""
+    if text is not None:
+        try:
+            result = parse_eval_response(text)
+        except ParseError:
+            pass
+        else:
+            PARSE_REPAIRS.inc("evaluate", "fixed")
+            return accept_grading(question, user_answer, result)
+    PARSE_REPAIRS.inc("evaluate", "failed")
+    GRADES.inc("fallback")
+    return failed_evaluation()
+
+
+def call_openai_evaluator(question: str, user_answer: str) -> Dict[str, str]:
+    """
+    Ask the model to grade the user's answer and return:
+    {
+        verdict: "Correct" / "Partially correct" / "Incorrect",
+        short_feedback: "one-line feedback",
+        correction: "Simple correct answer or correction in plain words"
+    }
+    Blocking; request handlers should use `async_evaluator.evaluate` instead.
+    """
+    local = local_evaluation(question, user_answer)
+    if local is not None:
+        return local
+
+    try:
+        text = llm.chat_sync([{"role": "user", "content": build_eval_prompt(question, user_answer)}],
+                             0.0, EVAL_MAX_TOKENS, op="evaluate", response_format=EVAL_RESPONSE_FORMAT)
+    except LLMUnavailable:
+        GRADES.inc("shed")
+        return offline_evaluation(user_answer)
+    except Exception:
+        GRADES.inc("fallback")
+        return failed_evaluation()
+    result = model_evaluation(question, user_answer, text)
+    if result is not None:
+        return result
+    try:
+        repaired: Optional[str] = llm.chat_sync([{"role": "user", "content": build_repair_prompt(text)}], 0.0,
+                                                REPAIR_MAX_TOKENS, op="repair", response_format=EVAL_RESPONSE_FORMAT)
+    except Exception:
+        repaired = None
+    return repaired_evaluation(question, user_answer, repaired)
+
+
+class AsyncEvaluator:
+    """
+    Event-loop friendly grading engine on top of an LLMClient, which owns the
+    pooled connection, concurrency limit, timeout, retries and circuit
+    breaker. Cancelling the awaiting task cancels the upstream HTTP request.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 max_connections: int = LLM_MAX_CONNECTIONS,
+                 timeout: float = LLM_TIMEOUT, llm: Optional[LLMClient] = None):
+        self.llm = llm or LLMClient(max_concurrency, max_connections, timeout)
+
+    async def complete(self, prompt: str, temperature: float, max_tokens: int, op: str = "complete",
+                       response_format: Optional[Dict[str, Any]] = None) -> str:
+        """`op` names the call site in metrics and traces."""
+        return await self.llm.complete(prompt, temperature, max_tokens, op, response_format)
+
+    async def repair(self, text: str) -> Optional[str]:
+        """One cheap call asking the model to reformat a reply we couldn't parse; None if it fails."""
+        try:
+            return await self.complete(build_repair_prompt(text), 0.0, REPAIR_MAX_TOKENS, op="repair",
+                                       response_format=EVAL_RESPONSE_FORMAT)
+        except Exception:
+            return None
+
+    async def evaluate(self, question: str, user_answer: str) -> Dict[str, str]:
+        local = await alocal_evaluation(question, user_answer)
+        if local is not None:
+            return local
+        try:
+            text = await self.complete(build_eval_prompt(question, user_answer), 0.0, EVAL_MAX_TOKENS,
+                                       op="evaluate", response_format=EVAL_RESPONSE_FORMAT)
+        except LLMUnavailable:
+            GRADES.inc("shed")
+            return offline_evaluation(user_answer)
+        except Exception:
+            GRADES.inc("fallback")
+            return failed_evaluation()
+        result = model_evaluation(question, user_answer, text)
+        if result is None:
+            result = repaired_evaluation(question, user_answer, await self.repair(text))
+        return result
+
+    def stream_complete(self, prompt: str, temperature: float, max_tokens: int, op: str = "complete",
+                        response_format: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """Like `complete`, but yields text deltas as the model produces them."""
+        return self.llm.stream(prompt, temperature, max_tokens, op, response_format)
+
+    async def stream_evaluate(self, question: str, user_answer: str) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Yields ("verdict" | "feedback" | "correction", text delta) while the
+        model writes its JSON, ("verdict_final", verdict) as soon as the
+        verdict is complete and valid, then ("result", dict) with the final
+        grading in `call_openai_evaluator`'s shape. If the stream fails part
+        way the result is what was written so far when the verdict made it,
+        else the fallback grading; either replaces any partial text.
+        """
+        result = await alocal_evaluation(question, user_answer)
+        if result is not None:
+            for key, name in RESULT_FIELDS.items():
+                yield name, result[key]
+            yield "result", result
+            return
+
+        parser = StreamingFieldParser()
+        text = ""
+        verdict: Optional[Grading] = None
+        try:
+            async for delta in self.stream_complete(build_eval_prompt(question, user_answer), 0.0,
+                                                    EVAL_MAX_TOKENS, op="evaluate",
+                                                    response_format=EVAL_RESPONSE_FORMAT):
+                text += delta
+                for key, field_delta in parser.feed(delta):
+                    if key in RESULT_FIELDS:
+                        yield RESULT_FIELDS[key], field_delta
+                if verdict is None and "verdict" in parser.complete:
+                    verdict = Grading.from_obj({"verdict": parser.fields["verdict"]})
+                    if verdict is not None:
+                        yield "verdict_final", verdict.verdict
+        except LLMUnavailable:
+            GRADES.inc("shed")
+            yield "result", offline_evaluation(user_answer)
+            return
+        except Exception:
+            partial = truncated_grading(text) if verdict is not None else None
+            if partial is not None:
+                GRADES.inc("partial")   # not cached: feedback may be cut short
+                yield "result", partial.model_dump()
+                return
+            GRADES.inc("fallback")
+            yield "result", failed_evaluation()
+            return
+        result = model_evaluation(question, user_answer, text)
+        if result is None:
+            result = repaired_evaluation(question, user_answer, await self.repair(text))
+        yield "result", result
+
+    async def stream_summarize(self, role: str, answers: List[Dict[str, Any]], notes: str = "",
+                               budget: int = SUMMARY_TOKEN_BUDGET) -> AsyncIterator[Tuple[str, str]]:
+        """Yields ("delta", text) as the summary is written, then ("summary", full text)."""
+        if not OPENAI_AVAILABLE:
+            SUMMARIES.inc("offline")
+            yield "summary", "Interview complete."
+            return
+        parts = []
+        try:
+            async for delta in self.stream_complete(compact_summary_prompt(role, answers, notes, budget),
+                                                    0.5, 150, op="summarize"):
+                parts.append(delta)
+                yield "delta", delta
+        except Exception:
+            SUMMARIES.inc("fallback")
+            yield "summary", FAILED_SUMMARY
+            return
+        SUMMARIES.inc("llm")
+        yield "summary", "".join(parts).strip()
+
+    async def summarize(self, role: str, answers: List[Dict[str, Any]], notes: str = "",
+                        budget: int = SUMMARY_TOKEN_BUDGET) -> str:
+        """Summary of the interview; the prompt is compacted to about `budget` tokens."""
+        if not OPENAI_AVAILABLE:
+            SUMMARIES.inc("offline")
+            return "Interview complete."
+        try:
+            summary = await self.complete(compact_summary_prompt(role, answers, notes, budget), 0.5, 150,
+                                          op="summarize")
+        except Exception:
+            SUMMARIES.inc("fallback")
+            return FAILED_SUMMARY
+        SUMMARIES.inc("llm")
+        return summary
+
+    async def aclose(self) -> None:
+        await self.llm.aclose()
+
+
+async_evaluator = AsyncEvaluator(llm=llm)
@@ -0,0 +1,206 @@
+# grade_transcripts.py
+"""
+Bulk-grade recorded interview transcripts outside the web app.
+
+    python grade_transcripts.py answers.jsonl -o graded.jsonl --workers 16
+    python grade_transcripts.py answers.csv -o graded.csv --resume
+
+Input is JSONL or CSV (by extension) with one record per answer:
+`role`, `question` (or the bank's `question_id`, or `question_index` into
+the role's bank, which shifts when bank files are edited) and `answer`.
+Extra fields are copied to the output, which gets `record`, `verdict`,
+`short_feedback`, `correction` and `error` added, in input order. A record
+that can't be graded (a JSONL line that isn't a JSON object, unknown id,
+bad index, a grading that raised) gets an empty grading and the reason in
+`error`; the run carries on.
+
+Records are read lazily and at most `--window` are in flight, so memory stays
+flat however large the input is. Output is flushed as it goes and is itself
+the checkpoint: `--resume` counts the records already written (dropping a
+torn last line), skips that many input records and appends.
+
+Point it at the local stub with OPENAI_BASE_URL=http://127.0.0.1:8901/v1
+OPENAI_API_KEY=stub (see benchmarks/stub_llm.py).
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterator, Optional, TextIO, Tuple, Union
+
+from evaluator import call_openai_evaluator
+from question_banks import QUESTION_BANKS, question_banks
+
+RESULT_KEYS = ("verdict", "short_feedback", "correction")
+
+
+class RecordError(ValueError):
+    """A record that can't be graded; reported in its output row."""
+
+
+def file_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def read_records(path: str) -> Iterator[Union[Dict[str, Any], RecordError]]:
+    """The input's records in order; a JSONL line that isn't a JSON object comes as a RecordError instead."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format(path) == "csv":
+            yield from csv.DictReader(f)
+            return
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield RecordError(f"line {lineno}: invalid JSON ({exc.msg})")
+                continue
+            if not isinstance(record, dict):
+                yield RecordError(f"line {lineno}: expected a JSON object, got {type(record).__name__}")
+                continue
+            yield record
+
+
+def resolve_question(record: Dict[str, Any]) -> Tuple[str, bool]:
+    """(question text, whether it's in the role's bank); RecordError for a bad id or index."""
+    role = record.get("role", "")
+    bank = QUESTION_BANKS.get(role, [])
+    question = record.get("question")
+    if not question and record.get("question_id") not in (None, ""):
+        found = question_banks.get(str(record["question_id"]))
+        if found is None:
+            raise RecordError(f"unknown question_id {record['question_id']!r}")
+        question = found.text
+    elif not question and record.get("question_index") not in (None, ""):
+        try:
+            index = int(record["question_index"])
+        except (TypeError, ValueError):
+            raise RecordError(f"question_index {record['question_index']!r} is not a number") from None
+        if not 0 <= index < len(bank):
+            raise RecordError(f"question_index {index} is out of range for role {role!r} ({len(bank)} questions)")
+        question = bank[index]
+    question = question or ""
+    return question, question in bank
+
+
+def count_done(path: str) -> int:
+    """Records already written to `path`; a torn trailing line is truncated away."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as f:
+        data_end = f.seek(0, os.SEEK_END)
+        if data_end == 0:
+            return 0
+        # walk back to the last newline so a half-written record is dropped
+        pos = data_end
+        while pos > 0:
+            f.seek(pos - 1)
+            if f.read(1) == b"\n":
+                break
+            pos -= 1
+        if pos != data_end:
+            f.truncate(pos)
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format(path) == "csv":
+            return max(0, sum(1 for _ in csv.reader(f)) - 1)   # minus header
+        return sum(1 for line in f if line.strip())
+
+
+class ResultWriter:
+    def __init__(self, f: TextIO, fmt: str, append: bool):
+        self.f = f
+        self.fmt = fmt
+        self._csv: Optional[csv.DictWriter] = None
+        self._header_written = append
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if self.fmt == "jsonl":
+            self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            return
+        if self._csv is None:
+            self._csv = csv.DictWriter(self.f, fieldnames=list(row), extrasaction="ignore")
+            if not self._header_written:
+                self._csv.writeheader()
+        self._csv.writerow(row)
+
+
+def make_executor(kind: str, workers: int) -> Executor:
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def run(input_path: str, output_path: str, workers: int = 8, executor: str = "thread",
+        window: Optional[int] = None, resume: bool = False, flush_every: int = 50) -> Dict[str, int]:
+    window = window or workers * 4
+    skip = count_done(output_path) if resume else 0
+    stats = {"graded": 0, "errors": 0, "skipped": skip, "off_bank": 0}
+    t0 = time.perf_counter()
+
+    with open(output_path, "a" if skip else "w", newline="", encoding="utf-8") as out, \
+            make_executor(executor, workers) as pool:
+        writer = ResultWriter(out, file_format(output_path), append=bool(skip))
+        # a Future for records being graded, the error message for ones that can't be
+        inflight: Deque[Tuple[int, Dict[str, Any], Union[Future, str]]] = deque()
+
+        def drain_one() -> None:
+            n, record, work = inflight.popleft()
+            result, error = dict.fromkeys(RESULT_KEYS, ""), work
+            if isinstance(work, Future):
+                try:
+                    result, error = work.result(), ""
+                except Exception as exc:
+                    error = f"{type(exc).__name__}: {exc}"
+            writer.write({**record, "record": n, **{k: result[k] for k in RESULT_KEYS}, "error": error})
+            stats["errors" if error else "graded"] += 1
+            if (stats["graded"] + stats["errors"]) % flush_every == 0:
+                out.flush()
+
+        for n, record in enumerate(read_records(input_path)):
+            if n < skip:
+                continue
+            try:
+                if isinstance(record, RecordError):
+                    raise record
+                question, in_bank = resolve_question(record)
+            except RecordError as exc:
+                inflight.append((n, record if isinstance(record, dict) else {}, str(exc)))
+            else:
+                if not in_bank:
+                    stats["off_bank"] += 1
+                inflight.append((n, record, pool.submit(call_openai_evaluator, question,
+                                                        str(record.get("answer") or ""))))
+            if len(inflight) >= window:
+                drain_one()
+        while inflight:
+            drain_one()
+        out.flush()
+
+    stats["seconds"] = round(time.perf_counter() - t0, 2)
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-grade interview transcripts.")
+    parser.add_argument("input", help="JSONL or CSV file of role/question/answer records")
+    parser.add_argument("-o", "--output", help="where to write results (default: <input>.graded.jsonl)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    parser.add_argument("--window", type=int, help="max records in flight (default: 4 x workers)")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.splitext(args.input)[0] + ".graded.jsonl"
+    stats = run(args.input, output, workers=args.workers, executor=args.executor,
+                window=args.window, resume=args.resume)
+    print(json.dumps(stats), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
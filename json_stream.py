@@ -0,0 +1,101 @@
+# json_stream.py
+import json
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class StreamingFieldParser:
+    """
+    Pulls top-level string fields out of a JSON object while it is still
+    being streamed, so e.g. `verdict` can be shown before the model has
+    written `correction`.
+
+        parser = StreamingFieldParser()
+        for chunk in chunks:
+            for field, delta in parser.feed(chunk):
+                ...
+
+    Text before the first `{` (prose, code fences) is skipped and anything
+    after the matching `}` is ignored. Non-string values are skipped.
+    `fields` holds what has been decoded so far and `complete` the fields
+    whose closing quote has been seen.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self.complete: Set[str] = set()
+        self.done = False
+        self._started = False
+        self._depth = 0
+        self._in_str = False
+        self._esc: Optional[str] = None
+        self._role = "other"           # what the current string is: key / value / other
+        self._key = ""
+        self._last_key = ""
+        self._expect_value = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        deltas: List[Tuple[str, str]] = []
+
+        def emit(text: str) -> None:
+            if self._role == "key":
+                self._key += text
+            elif self._role == "value":
+                self.fields[self._last_key] += text
+                if deltas and deltas[-1][0] == self._last_key:
+                    deltas[-1] = (self._last_key, deltas[-1][1] + text)
+                else:
+                    deltas.append((self._last_key, text))
+
+        for c in chunk:
+            if self.done:
+                break
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+            if self._in_str:
+                if self._esc is not None:
+                    self._esc += c
+                    if (self._esc[0] != "u" and len(self._esc) == 1) or len(self._esc) == 5:
+                        try:
+                            emit(json.loads('"\\' + self._esc + '"'))
+                        except ValueError:
+                            emit(self._esc)
+                        self._esc = None
+                elif c == "\\":
+                    self._esc = ""
+                elif c == '"':
+                    self._in_str = False
+                    if self._role == "key":
+                        self._last_key = self._key
+                    elif self._role == "value":
+                        self.complete.add(self._last_key)
+                else:
+                    emit(c)
+                continue
+            if c == '"':
+                self._in_str = True
+                if self._depth == 1 and self._expect_value:
+                    self._role = "value"
+                    self.fields[self._last_key] = ""
+                    self._expect_value = False
+                elif self._depth == 1:
+                    self._role = "key"
+                    self._key = ""
+                else:
+                    self._role = "other"
+            elif c == ":" and self._depth == 1:
+                self._expect_value = True
+            elif c in "{[":
+                self._depth += 1
+                self._expect_value = False
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.done = True
+            elif c == "," and self._depth == 1:
+                self._expect_value = False
+            elif self._expect_value and not c.isspace():
+                self._expect_value = False     # number / true / false / null
+        return deltas
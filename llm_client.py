@@ -0,0 +1,467 @@
+# llm_client.py
+import os
+import sys
+import time
+import random
+import asyncio
+import threading
+import importlib.util
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from metrics import LLM_ERRORS, LLM_HEDGES, LLM_LATENCY, LLM_RETRIES, LLM_SHED, LLM_TOKENS, Gauge, span
+
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))            # seconds per call, queueing and retries included
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "256"))          # calls waiting for a slot before new ones are shed
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))        # extra attempts after a retryable failure
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.2"))  # seconds; full jitter, doubling per attempt
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "2"))
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))      # seconds before a duplicate request; 0 = off
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))     # consecutive failures that open it
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))  # seconds open before a probe
+LLM_WARMUP = os.getenv("LLM_WARMUP", "1") == "1"                # open a pooled connection at startup
+DRAIN_POLL_INTERVAL = 0.05  # seconds
+
+# openai (and its thousand pydantic types) costs about a third of the app's import time, so it is only
+# imported when the first client is built: at warm-up, or by the first call.
+OPENAI_AVAILABLE = all(importlib.util.find_spec(m) is not None for m in ("httpx", "openai"))
+
+
+class LLMUnavailable(Exception):
+    """The model can't be asked right now; callers should use their local fallback."""
+
+
+class CircuitOpen(LLMUnavailable):
+    """The provider is considered down."""
+
+
+class LLMSaturated(LLMUnavailable):
+    """Every request slot is busy and LLM_MAX_QUEUE calls are already waiting for one."""
+
+
+class LLMQueueTimeout(LLMUnavailable):
+    """The call's deadline passed while it was still waiting for a request slot."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Timeouts, connection failures, 429 and 5xx; not bad requests or auth errors."""
+    if isinstance(exc, TimeoutError):
+        return True
+    openai, httpx = sys.modules.get("openai"), sys.modules.get("httpx")   # not imported: not one of theirs
+    if openai is not None:
+        if isinstance(exc, openai.APIConnectionError):   # includes APITimeoutError
+            return True
+        if isinstance(exc, openai.APIStatusError):
+            return exc.status_code == 429 or exc.status_code >= 500
+    if httpx is not None and isinstance(exc, httpx.TransportError):
+        return True
+    return False
+
+
+def retry_after(exc: BaseException) -> float:
+    """The server's Retry-After on a 429/503, in seconds (0 if absent)."""
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("retry-after", 0)) if response is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def backoff(attempt: int, base: float = LLM_BACKOFF_BASE, cap: float = LLM_BACKOFF_MAX) -> float:
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker shared by every caller of one provider.
+
+    closed:    calls go through; `failures` retryable failures in a row open it.
+    open:      calls fail fast with CircuitOpen for `cooldown` seconds.
+    half-open: one probe call is let through; success closes, failure re-opens.
+
+    Thread-safe, so the blocking client used by scripts and worker threads
+    shares it with the async one.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        if self.failures <= 0:
+            return True
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive = 0
+            self.state = self.CLOSED
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive += 1
+            if self.state == self.HALF_OPEN or self._consecutive >= self.failures:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def release_probe(self) -> None:
+        """A half-open probe ended without a verdict (e.g. a non-retryable error or cancellation)."""
+        with self._lock:
+            self._probing = False
+
+
+provider_breaker = CircuitBreaker()
+Gauge("llm_circuit_state", "Provider circuit breaker: 0 closed, 1 half-open, 2 open.",
+      fn=lambda: provider_breaker.state)
+
+
+def record_usage(op: str, usage: Any) -> None:
+    if usage is not None:
+        LLM_TOKENS.observe(usage.prompt_tokens, op, "prompt")
+        LLM_TOKENS.observe(usage.completion_tokens, op, "completion")
+
+
+class LLMClient:
+    """
+    The one place model calls are made from.
+
+    - Connection reuse: one pooled AsyncOpenAI client (and one blocking
+      client for scripts), created on first use; `warm_up` creates it ahead
+      of time, off the event loop.
+    - At most `max_concurrency` requests in flight, a global cap that keeps
+      us inside the provider's limits. Up to `max_queue` more calls wait for
+      a slot; past that they fail fast with LLMSaturated so the caller can
+      fall back instead of queueing. Every call is bounded by `timeout`
+      seconds in total, queueing and retries included; running out of time
+      in the queue raises LLMQueueTimeout. Both are local overload: counted
+      in llm_shed_total, never against the breaker.
+    - Retryable failures (timeouts, connection errors, 429, 5xx) are retried
+      up to `retries` times with full-jitter exponential backoff, honouring
+      Retry-After.
+    - A shared CircuitBreaker fails calls fast with CircuitOpen while the
+      provider is down, so callers go straight to their fallback.
+    - With `hedge_after` > 0, a call still unanswered after that many seconds
+      gets a duplicate request and the first success wins (async only).
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 max_connections: int = LLM_MAX_CONNECTIONS,
+                 timeout: float = LLM_TIMEOUT, retries: int = LLM_MAX_RETRIES, max_queue: int = LLM_MAX_QUEUE,
+                 hedge_after: float = LLM_HEDGE_AFTER, breaker: CircuitBreaker = provider_breaker,
+                 model: str = MODEL):
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retries = retries
+        self.hedge_after = hedge_after
+        self.breaker = breaker
+        self.model = model
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self._client: Optional[Any] = None
+        self._sync_client: Optional[Any] = None
+        self._sync_lock = threading.Lock()
+
+    def _limits(self):
+        import httpx
+        return httpx.Limits(max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_connections)
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._sync_lock:   # warm-up may be building it in a thread
+                if self._client is None:
+                    import openai
+                    self._client = openai.AsyncOpenAI(
+                        api_key=OPENAI_API_KEY,
+                        timeout=self.timeout,
+                        max_retries=0,
+                        http_client=openai.DefaultAsyncHttpxClient(limits=self._limits()),
+                    )
+        return self._client
+
+    @property
+    def sync_client(self):
+        with self._sync_lock:
+            if self._sync_client is None:
+                import openai
+                self._sync_client = openai.OpenAI(
+                    api_key=OPENAI_API_KEY,
+                    timeout=self.timeout,
+                    max_retries=0,
+                    http_client=openai.DefaultHttpxClient(limits=self._limits()),
+                )
+        return self._sync_client
+
+    def saturated(self, queue_fraction: float = 1.0) -> bool:
+        """True when every slot is taken and the wait queue is at least `queue_fraction` full."""
+        return self._sem.locked() and self.waiting >= self.max_queue * queue_fraction
+
+    async def _acquire(self) -> None:
+        if self.saturated():
+            raise LLMSaturated("All LLM request slots are busy")
+        self.waiting += 1
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    async def _slot(self, op: str, deadline: float) -> None:
+        """Take a request slot, waiting at most until `deadline` (loop time)."""
+        try:
+            await asyncio.wait_for(self._acquire(), max(0.0, deadline - asyncio.get_running_loop().time()))
+        except LLMSaturated:
+            LLM_SHED.inc(op, "saturated")
+            raise
+        except asyncio.TimeoutError:
+            LLM_SHED.inc(op, "queue_timeout")
+            raise LLMQueueTimeout("Timed out waiting for an LLM request slot") from None
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._sem.release()
+
+    def _request(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                 response_format: Optional[Dict[str, Any]] = None, **extra) -> Dict[str, Any]:
+        request = {"model": self.model, "messages": messages, "temperature": temperature,
+                   "max_tokens": max_tokens, **extra}
+        if response_format is not None:
+            request["response_format"] = response_format
+        return request
+
+    def _check_breaker(self, op: str) -> None:
+        if not self.breaker.allow():
+            LLM_ERRORS.inc(op, "CircuitOpen")
+            raise CircuitOpen("LLM provider circuit is open")
+
+    def _record(self, op: str, exc: Optional[BaseException]) -> None:
+        """Feed one attempt's outcome to the breaker and the error counter."""
+        if exc is None:
+            self.breaker.record_success()
+            return
+        LLM_ERRORS.inc(op, type(exc).__name__)
+        if is_retryable(exc):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release_probe()
+
+    async def _retrying(self, attempt_fn: Callable[[float], Awaitable[Any]], op: str) -> Any:
+        """Run `attempt_fn(time_left)` under the breaker, retrying retryable failures until the deadline."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        attempt = 0
+        while True:
+            self._check_breaker(op)
+            try:
+                result = await attempt_fn(deadline - loop.time())
+            except (asyncio.CancelledError, LLMUnavailable):
+                # cancelled, or never sent for want of a slot: nothing to hold against the provider
+                self.breaker.release_probe()
+                raise
+            except Exception as exc:
+                self._record(op, exc)
+                attempt += 1
+                delay = max(backoff(attempt), retry_after(exc))
+                if attempt > self.retries or not is_retryable(exc) or loop.time() + delay >= deadline:
+                    raise
+                LLM_RETRIES.inc(op)
+                await asyncio.sleep(delay)
+                continue
+            self._record(op, None)
+            return result
+
+    async def _hedged(self, call: Callable[[], Awaitable[Any]], op: str) -> Any:
+        """`call()`, plus one duplicate if it hasn't answered within `hedge_after`; first success wins."""
+        tasks = [asyncio.ensure_future(call())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if done:
+                return tasks[0].result()
+            LLM_HEDGES.inc(op)
+            tasks.append(asyncio.ensure_future(call()))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def chat(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                   op: str = "complete", response_format: Optional[Dict[str, Any]] = None) -> str:
+        """
+        The reply text. Raises CircuitOpen, TimeoutError or the provider's
+        error after retries. `response_format` is passed through (JSON mode).
+        """
+        loop = asyncio.get_running_loop()
+
+        async def call(deadline: float) -> str:
+            # the queue wait and the request each get their own timeout, so only
+            # a request that was actually sent can count as a provider failure
+            await self._slot(op, deadline)
+            try:
+                resp = await asyncio.wait_for(self.client.chat.completions.create(
+                    **self._request(messages, temperature, max_tokens, response_format)), deadline - loop.time())
+            finally:
+                self._release()
+            record_usage(op, resp.usage)
+            return resp.choices[0].message.content.strip()
+
+        async def attempt(time_left: float) -> str:
+            deadline = loop.time() + time_left
+            if self.hedge_after > 0 and self.breaker.state == CircuitBreaker.CLOSED:
+                return await self._hedged(lambda: call(deadline), op)
+            return await call(deadline)
+
+        t0 = time.perf_counter()
+        try:
+            with span("llm." + op):
+                return await self._retrying(attempt, op)
+        finally:
+            LLM_LATENCY.observe(time.perf_counter() - t0, op)
+
+    async def complete(self, prompt: str, temperature: float, max_tokens: int, op: str = "complete",
+                       response_format: Optional[Dict[str, Any]] = None) -> str:
+        return await self.chat([{"role": "user", "content": prompt}], temperature, max_tokens, op, response_format)
+
+    async def stream(self, prompt: str, temperature: float, max_tokens: int,
+                     op: str = "complete", response_format: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Yields text deltas as the model produces them. Opening the stream is
+        retried like `chat`; once text has been yielded a failure is raised
+        as is, since the caller has already used the partial output.
+        """
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        deadline = t0 + self.timeout
+
+        async def open_stream(time_left: float):
+            await self._slot(op, loop.time() + time_left)
+            try:
+                stream = await asyncio.wait_for(self.client.chat.completions.create(**self._request(
+                    [{"role": "user", "content": prompt}], temperature, max_tokens, response_format,
+                    stream=True, stream_options={"include_usage": True})), deadline - loop.time())
+            except BaseException:
+                self._release()
+                raise
+            return stream
+
+        try:
+            stream = await self._retrying(open_stream, op)
+            try:
+                chunks = stream.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), deadline - loop.time())
+                    except StopAsyncIteration:
+                        break
+                    record_usage(op, getattr(chunk, "usage", None))
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            except Exception as exc:
+                self._record(op, exc)
+                raise
+            finally:
+                self._release()
+                await stream.close()
+        finally:
+            LLM_LATENCY.observe(loop.time() - t0, op)
+
+    def chat_sync(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                  op: str = "complete", response_format: Optional[Dict[str, Any]] = None) -> str:
+        """Blocking `chat` for scripts and worker threads: same retries and breaker, no hedging."""
+        t0 = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        attempt = 0
+        try:
+            while True:
+                self._check_breaker(op)
+                try:
+                    resp = self.sync_client.chat.completions.create(
+                        **self._request(messages, temperature, max_tokens, response_format),
+                        timeout=max(0.001, deadline - time.monotonic()))
+                except Exception as exc:
+                    self._record(op, exc)
+                    attempt += 1
+                    delay = max(backoff(attempt), retry_after(exc))
+                    if attempt > self.retries or not is_retryable(exc) or time.monotonic() + delay >= deadline:
+                        raise
+                    LLM_RETRIES.inc(op)
+                    time.sleep(delay)
+                    continue
+                self._record(op, None)
+                record_usage(op, resp.usage)
+                return resp.choices[0].message.content.strip()
+        finally:
+            LLM_LATENCY.observe(time.perf_counter() - t0, op)
+
+    async def warm_up(self, timeout: float = 5.0) -> None:
+        """
+        Import openai and build the client in a thread, then open one pooled
+        connection (DNS, TCP, TLS) with a cheap model-list request, so the
+        first real call doesn't pay for any of it. Failures are ignored;
+        they don't count against the breaker.
+        """
+        if not OPENAI_AVAILABLE:
+            return
+        client = await asyncio.to_thread(lambda: self.client)
+        if not LLM_WARMUP:
+            return
+        try:
+            await asyncio.wait_for(client.models.list(), timeout)
+        except Exception:
+            pass
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for running and queued calls to finish; True if they all did."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (self.in_flight or self.waiting) and loop.time() < deadline:
+            await asyncio.sleep(DRAIN_POLL_INTERVAL)
+        return not (self.in_flight or self.waiting)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+llm = LLMClient()
+Gauge("llm_in_flight", "Model requests holding a slot.", fn=lambda: llm.in_flight)
+Gauge("llm_waiting", "Model calls queued for a slot.", fn=lambda: llm.waiting)
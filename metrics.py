@@ -0,0 +1,262 @@
+# metrics.py
+"""
+Process-local instrumentation with no dependencies: counters, gauges and
+histograms rendered in the Prometheus text format by `render()`, an ASGI
+middleware that times every request by route, and optional tracing spans.
+
+Everything here is updated from the event loop (or under the GIL from
+worker threads), so there are no locks; each worker process keeps its own
+numbers and a scraper should sum them across workers.
+"""
+import os
+import time
+import bisect
+import contextvars
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+TRACING = os.getenv("TRACING", "0") == "1"
+
+# seconds; covers a cache hit (~ms) up to a timed-out LLM call
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels.items():
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List["Metric"] = []
+
+    def register(self, metric: "Metric") -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        registry.register(self)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> Iterator[Sample]:
+        for key, value in self._values.items():
+            yield self.name, self._labels(key), value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+
+class Gauge(Metric):
+    """A settable value, or one computed by `fn` at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 fn: Optional[Callable[[], float]] = None, registry: Registry = REGISTRY):
+        super().__init__(name, help, labelnames, registry)
+        self.fn = fn
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def samples(self) -> Iterator[Sample]:
+        if self.fn is not None:
+            yield self.name, {}, float(self.fn())
+            return
+        yield from super().samples()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: Registry = REGISTRY):
+        super().__init__(name, help, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            # per-bucket counts (last slot is +Inf), then sum
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def samples(self) -> Iterator[Sample]:
+        for key, (counts, total) in self._values.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield self.name + "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield self.name + "_sum", labels, total
+            yield self.name + "_count", labels, cumulative
+
+
+class StatsGauges(Metric):
+    """Every numeric entry of a component's `metrics()` dict, as `<prefix>_<key>` gauges."""
+    kind = "gauge"
+
+    def __init__(self, prefix: str, help: str, fn: Callable[[], Dict[str, Any]], registry: Registry = REGISTRY):
+        super().__init__(prefix, help, (), registry)
+        self.fn = fn
+
+    def samples(self) -> Iterator[Sample]:
+        for key, value in self.fn().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield f"{self.name}_{key}", {}, value
+
+
+def resident_memory_bytes() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024   # peak, KiB on Linux
+
+
+# ---- the app's metrics -------------------------------------------------------
+
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "Request latency by route, until the body is sent.",
+                         ("method", "route", "status"))
+LLM_LATENCY = Histogram("llm_request_duration_seconds", "Model call latency, queueing for a slot included.",
+                        ("op",))
+LLM_TOKENS = Histogram("llm_tokens", "Tokens per model call.", ("op", "kind"), buckets=TOKEN_BUCKETS)
+LLM_ERRORS = Counter("llm_errors_total", "Failed model call attempts by exception type.", ("op", "error"))
+LLM_RETRIES = Counter("llm_retries_total", "Model calls retried after a retryable failure.", ("op",))
+LLM_SHED = Counter("llm_shed_total", "Model calls refused locally for want of a request slot (not provider errors).",
+                   ("op", "reason"))
+LLM_HEDGES = Counter("llm_hedged_requests_total", "Duplicate requests sent for slow model calls.", ("op",))
+GRADES = Counter("grades_total", "Gradings by where the verdict came from.", ("source",))
+PARSE_FAILURES = Counter("llm_parse_failures_total", "Model replies that weren't the JSON asked for.", ("op",))
+PARSE_REPAIRS = Counter("llm_parse_repairs_total", "Repair calls for unparseable replies, by outcome.",
+                        ("op", "outcome"))
+PROMPT_TOKENS = Histogram("prompt_tokens_estimated", "Locally counted prompt tokens, after compaction.", ("op",),
+                          buckets=TOKEN_BUCKETS)
+PROMPT_TOKENS_SAVED = Counter("prompt_tokens_saved_total", "Prompt tokens removed by compaction.", ("op",))
+SUMMARIES = Counter("summaries_total", "Interview summaries by where they came from.", ("source",))
+RATE_LIMITED = Counter("rate_limited_total", "Requests refused with 429.", ("route", "reason"))
+ADMISSION_WAIT = Histogram("admission_wait_seconds", "Time new interviews queued under overload before admission.")
+SESSIONS = Gauge("sessions_live", "Sessions in the store (updated on scrape).")
+MEMORY = Gauge("process_resident_memory_bytes", "Resident set size of this worker.", fn=resident_memory_bytes)
+SPANS = Histogram("trace_span_duration_seconds", "Tracing spans by name (only with TRACING=1).", ("span",))
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# ---- tracing -----------------------------------------------------------------
+
+# (name, seconds) list of the current request; None when tracing is off
+_trace: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar("trace", default=None)
+
+
+class span:
+    """
+    `with span("llm.evaluate"): ...` records how long the block took on the
+    current request's trace. A no-op outside a traced request; costs about a
+    microsecond when tracing is on. Tasks started inside the request (e.g.
+    `asyncio.gather`) inherit the trace.
+    """
+
+    __slots__ = ("name", "_spans", "_t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "span":
+        self._spans = _trace.get()
+        if self._spans is not None:
+            self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._spans is not None:
+            self._spans.append((self.name, time.perf_counter() - self._t0))
+
+
+def server_timing(spans: List[Tuple[str, float]]) -> bytes:
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in spans).encode()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: times each HTTP request into HTTP_LATENCY, labelled by
+    the matched route template rather than the raw path. With TRACING=1 it
+    also opens a trace, returns the spans finished before the response
+    started as a `Server-Timing` header, and feeds all of them into SPANS.
+    """
+
+    def __init__(self, app, tracing: bool = TRACING):
+        self.app = app
+        self.tracing = tracing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+        status = [500]
+        spans: Optional[List[Tuple[str, float]]] = [] if self.tracing else None
+        token = _trace.set(spans) if spans is not None else None
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if spans:
+                    message = {**message, "headers": list(message.get("headers", []))
+                               + [(b"server-timing", server_timing(spans))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_LATENCY.observe(time.perf_counter() - t0, scope["method"],
+                                 getattr(route, "path", "unmatched"), str(status[0]))
+            if spans is not None:
+                _trace.reset(token)
+                for name, seconds in spans:
+                    SPANS.observe(seconds, name)
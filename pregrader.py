@@ -0,0 +1,240 @@
+# pregrader.py
+import os
+import re
+import math
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from eval_cache import normalize_answer
+from question_banks import QuestionBanks, question_banks
+
+PREGRADER = os.getenv("PREGRADER", "1") == "1"
+# Coverage verdicts are opt-in: keyword overlap can't tell a paraphrase from a
+# miss or a swapped fact from a right one, so by default only non-answers are
+# settled locally.
+PREGRADE_COVERAGE = os.getenv("PREGRADE_COVERAGE", "0") == "1"
+PREGRADE_CORRECT = float(os.getenv("PREGRADE_CORRECT", "0.9"))      # coverage at/above -> Correct
+PREGRADE_INCORRECT = float(os.getenv("PREGRADE_INCORRECT", "-1"))   # coverage at/below -> Incorrect; -1 = never
+PREGRADE_MIN_WORDS = int(os.getenv("PREGRADE_MIN_WORDS", "8"))      # shorter answers can't be Correct
+
+_TOKEN = re.compile(r"[a-z0-9_]+[+#]*")
+STOPWORDS = frozenset("""
+a an the and or but if then else of to in on at by for with from as is are was were be been being it its
+this that these those there here what which who whom how why when where do does did done can could should
+would will shall may might must not no yes so than too very just also only such each other some any all
+both few more most own same into over under about between through during before after above below up down
+out off again further once i me my we our you your he she they them their his her us am has have had having
+use used using uses like e g eg etc one two three way ways thing things lot lots get gets make makes
+""".split())
+
+# "no" and "none" aren't here: they can be the right answer.
+DONT_KNOW = frozenset({
+    "", "i dont know", "dont know", "idk", "no idea", "i have no idea", "not sure", "im not sure",
+    "i am not sure", "i do not know", "pass", "skip", "na", "n/a", "?",
+})
+
+_VOWELS = frozenset("aeiouy")
+_CONSONANT_RUN = re.compile(r"[b-df-hj-np-tv-xz]{5,}")
+_TRIPLED = re.compile(r"(.)\1\1")
+
+
+def stem(word: str) -> str:
+    """Plural folding only; enough to match `classes`/`class`, `threads`/`thread`."""
+    if len(word) > 4 and word.endswith(("sses", "xes", "shes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(w) for w in _TOKEN.findall(text.lower())]
+
+
+def wordlike(token: str) -> bool:
+    """False for keyboard mash: no vowel, five consonants in a row, or a character tripled."""
+    if token.isdigit() or len(token) < 3:
+        return True
+    return bool(_VOWELS & set(token)) and not _CONSONANT_RUN.search(token) and not _TRIPLED.search(token)
+
+
+class PreGrader:
+    """
+    Microsecond local grader built on a reference answer per bank question.
+
+    Each reference is reduced to its content terms (minus stopwords and the
+    words of the question itself, so echoing the question earns nothing),
+    weighted by BM25 IDF across all references and stored CSR-style in flat
+    NumPy arrays. An answer's score for a question is the IDF-weighted share
+    of that reference's terms it mentions; `coverage_all` scores one answer
+    against the whole bank in a single vectorised pass.
+
+    `grade` only settles non-answers by default: blank, "I don't know" and
+    gibberish (mostly words the banks never use that don't look like words
+    either) are Incorrect, and everything else returns None, meaning "ask
+    the model". With `coverage` (PREGRADE_COVERAGE=1) it also calls
+    near-complete coverage of a long enough answer Correct and an answer
+    to a different question Incorrect (and, if PREGRADE_INCORRECT is set,
+    coverage at or below it); that trades accuracy for model calls, since
+    coverage is a bag of words.
+    """
+
+    def __init__(self, references: Dict[str, Dict[str, str]],
+                 correct_threshold: float = PREGRADE_CORRECT,
+                 incorrect_threshold: float = PREGRADE_INCORRECT,
+                 min_words: int = PREGRADE_MIN_WORDS,
+                 coverage: bool = PREGRADE_COVERAGE):
+        self._swap = threading.Lock()   # held while grading and while `rebuild` swaps tables
+        self.use_coverage = coverage
+        self.correct_threshold = correct_threshold
+        self.incorrect_threshold = incorrect_threshold
+        self.min_words = min_words
+        self.stats = {"graded": 0, "correct": 0, "incorrect": 0, "escalated": 0}
+
+        self.questions: List[str] = []
+        self.reference: List[str] = []
+        self.qindex: Dict[str, int] = {}
+        for bank in references.values():
+            for question, answer in bank.items():
+                if answer and question not in self.qindex:
+                    self.qindex[question] = len(self.questions)
+                    self.questions.append(question)
+                    self.reference.append(answer)
+
+        self.vocab: Dict[str, int] = {}
+        self.surface: List[str] = []
+        term_sets: List[List[int]] = []
+        self.known = set(STOPWORDS)
+        for question, answer in zip(self.questions, self.reference):
+            q_terms = set(tokenize(question))
+            self.known.update(q_terms)
+            terms = []
+            for raw in _TOKEN.findall(answer.lower()):
+                term = stem(raw)
+                self.known.add(term)
+                if term in STOPWORDS or term in q_terms or len(term) < 2:
+                    continue
+                if term not in self.vocab:
+                    self.vocab[term] = len(self.vocab)
+                    self.surface.append(raw)
+                if self.vocab[term] not in terms:
+                    terms.append(self.vocab[term])
+            term_sets.append(terms)
+
+        n = len(term_sets)
+        df = [0] * len(self.vocab)
+        for terms in term_sets:
+            for t in terms:
+                df[t] += 1
+        idf = [math.log(1 + (n - d + 0.5) / (d + 0.5)) for d in df]
+
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        self.indices = np.fromiter((t for terms in term_sets for t in terms), dtype=np.int32)
+        self.weights = np.array([idf[t] for t in self.indices], dtype=np.float32)
+        self.indptr[1:] = np.cumsum([len(terms) for terms in term_sets])
+        self.rows = np.repeat(np.arange(n), np.diff(self.indptr))   # reference of each entry; empty ones have none
+        sums = np.bincount(self.rows, self.weights, minlength=n)
+        self.norms = np.where(sums > 0, sums, 1.0).astype(np.float32)
+
+    def rebuild(self, references: Dict[str, Dict[str, str]]) -> None:
+        """
+        Swap in tables for new references (e.g. after a bank reload), keeping
+        settings and stats. Safe to call from another thread than `grade`'s.
+        """
+        fresh = PreGrader(references, self.correct_threshold, self.incorrect_threshold, self.min_words,
+                          self.use_coverage)
+        with self._swap:
+            fresh.stats = self.stats
+            fresh._swap = self._swap
+            self.__dict__ = fresh.__dict__
+
+    def _mask(self, answer: str) -> Tuple[np.ndarray, List[str]]:
+        tokens = tokenize(answer)
+        mask = np.zeros(len(self.vocab) + 1, dtype=bool)   # last slot absorbs unknown terms
+        ids = [self.vocab.get(t, len(self.vocab)) for t in tokens]
+        mask[ids] = True
+        mask[-1] = False
+        return mask, tokens
+
+    def coverage(self, question: str, answer: str) -> Optional[float]:
+        qi = self.qindex.get(question)
+        if qi is None:
+            return None
+        mask, _ = self._mask(answer)
+        s, e = self.indptr[qi], self.indptr[qi + 1]
+        return float((self.weights[s:e] * mask[self.indices[s:e]]).sum() / self.norms[qi])
+
+    def coverage_all(self, answer: str) -> np.ndarray:
+        """Coverage of `answer` against every reference in the bank at once."""
+        mask, _ = self._mask(answer)
+        hit = self.weights * mask[self.indices]
+        return np.bincount(self.rows, hit, minlength=len(self.norms)) / self.norms
+
+    def missing_terms(self, qi: int, mask: np.ndarray, limit: int = 3) -> List[str]:
+        s, e = self.indptr[qi], self.indptr[qi + 1]
+        idx, w = self.indices[s:e], self.weights[s:e]
+        order = np.argsort(-w)
+        return [self.surface[idx[k]] for k in order if not mask[idx[k]]][:limit]
+
+    def grade(self, question: str, answer: str) -> Optional[Dict[str, str]]:
+        self.stats["graded"] += 1
+        with self._swap:
+            result = self._grade(question, answer)
+        if result is None:
+            self.stats["escalated"] += 1
+        else:
+            self.stats["correct" if result["verdict"] == "Correct" else "incorrect"] += 1
+        return result
+
+    def _grade(self, question: str, answer: str) -> Optional[Dict[str, str]]:
+        qi = self.qindex.get(question)
+        correction = self.reference[qi] if qi is not None else \
+            "Try to mention the definition and 2–3 main features."
+
+        if normalize_answer(answer) in DONT_KNOW:
+            return {"verdict": "Incorrect", "short_feedback": "No answer given.", "correction": correction}
+
+        mask, tokens = self._mask(answer)
+        unknown = [t for t in tokens if t not in self.known]
+        if len(tokens) >= 3 and len(unknown) > 0.75 * len(tokens) \
+                and sum(not wordlike(t) for t in unknown) * 2 >= len(unknown):
+            return {"verdict": "Incorrect", "short_feedback": "The answer doesn't look like an attempt at the question.",
+                    "correction": correction}
+        if qi is None or not self.use_coverage:
+            return None
+
+        scores = self.coverage_all(answer)
+        own = float(scores[qi])
+        if own >= self.correct_threshold and len(answer.split()) >= self.min_words:
+            return {"verdict": "Correct", "short_feedback": "Covers the key points.", "correction": correction}
+        if own <= self.incorrect_threshold:
+            missing = self.missing_terms(qi, mask)
+            feedback = f"Missing key points: {', '.join(missing)}." if missing else "Missing key points."
+            return {"verdict": "Incorrect", "short_feedback": feedback, "correction": correction}
+        best = int(np.argmax(scores))
+        if best != qi and scores[best] >= self.correct_threshold and own < scores[best] / 3:
+            return {"verdict": "Incorrect", "short_feedback": "This answers a different question.",
+                    "correction": correction}
+        return None
+
+    def metrics(self) -> Dict[str, Any]:
+        graded = self.stats["graded"]
+        return {**self.stats,
+                "escalation_rate": self.stats["escalated"] / graded if graded else 0.0,
+                "coverage": int(self.use_coverage),
+                "correct_threshold": self.correct_threshold,
+                "incorrect_threshold": self.incorrect_threshold}
+
+
+def load_pregrader(banks: QuestionBanks = question_banks) -> Optional[PreGrader]:
+    """Pre-grader over the banks' reference answers, rebuilt whenever the banks reload."""
+    if not PREGRADER:
+        return None
+    grader = PreGrader(banks.references())
+    banks.on_reload(lambda b: grader.rebuild(b.references()))
+    return grader
+
+
+pregrader = load_pregrader()
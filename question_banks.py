@@ -0,0 +1,279 @@
+# question_banks.py
+import os
+import glob
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+BANKS_DIR = os.getenv("QUESTION_BANKS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "banks"))
+BANK_RELOAD_INTERVAL = float(os.getenv("BANK_RELOAD_INTERVAL", "5"))   # seconds between mtime checks; 0 = off
+SEEN_MAX_CANDIDATES = int(os.getenv("SEEN_MAX_CANDIDATES", "100000"))
+RETIRED_MAX_QUESTIONS = int(os.getenv("RETIRED_MAX_QUESTIONS", "10000"))   # dropped questions kept for get()
+
+logger = logging.getLogger(__name__)
+
+
+class Question(NamedTuple):
+    id: str
+    role: str
+    text: str
+    tags: Tuple[str, ...]
+    difficulty: int
+    reference: str
+
+
+class RoleBank:
+    """One role's questions as parallel arrays; position i is the same question everywhere."""
+
+    __slots__ = ("role", "ids", "texts", "tags", "references", "difficulty", "weights", "signature")
+
+    def __init__(self, role: str, items: List[dict]):
+        self.role = role
+        self.ids: List[str] = [q["id"] for q in items]
+        self.texts: List[str] = [q["text"] for q in items]
+        self.tags: List[Tuple[str, ...]] = [tuple(q.get("tags", ())) for q in items]
+        self.references: List[str] = [q.get("reference", "") for q in items]
+        self.difficulty = np.array([q.get("difficulty", 2) for q in items], dtype=np.int8)
+        self.weights = np.array([q.get("weight", 1.0) for q in items], dtype=np.float64)
+        self.signature = hash(tuple(self.ids))   # bitsets stay valid while this is unchanged
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def question(self, i: int) -> Question:
+        return Question(self.ids[i], self.role, self.texts[i], self.tags[i], int(self.difficulty[i]),
+                        self.references[i])
+
+    def sample(self, count: int, exclude: Optional[np.ndarray] = None,
+               rng: Optional[np.random.Generator] = None) -> List[int]:
+        """
+        `count` distinct positions drawn by weight (Efraimidis-Spirakis keys,
+        one vectorised pass), skipping `exclude`d positions while enough
+        others remain. Never repeats a question; returns fewer than `count`
+        only if the bank is smaller than that.
+        """
+        n = len(self)
+        count = min(count, n)
+        if count <= 0:
+            return []
+        rng = rng or np.random.default_rng()
+        weights = self.weights
+        if exclude is not None and np.count_nonzero(weights[~exclude]) >= count:
+            weights = np.where(exclude, 0.0, weights)
+        with np.errstate(divide="ignore"):
+            keys = np.log(rng.random(n)) / weights      # weight 0 -> -inf, never picked first
+        top = np.argpartition(-keys, count - 1)[:count]
+        return top[np.argsort(-keys[top])].tolist()
+
+
+class QuestionBankIndex:
+    """All roles plus a question-id lookup; immutable once built, swapped whole on reload."""
+
+    def __init__(self, roles: Dict[str, RoleBank], mtimes: Dict[str, float]):
+        self.roles = roles
+        self.mtimes = mtimes
+        self.by_id: Dict[str, Tuple[str, int]] = {
+            qid: (role, i) for role, bank in roles.items() for i, qid in enumerate(bank.ids)
+        }
+        self.id_by_text: Dict[str, str] = {
+            text: qid for bank in roles.values() for qid, text in zip(bank.ids, bank.texts)
+        }
+
+    def get(self, qid: str) -> Optional[Question]:
+        loc = self.by_id.get(qid)
+        if loc is None:
+            return None
+        return self.roles[loc[0]].question(loc[1])
+
+
+def bank_files(directory: str) -> Dict[str, float]:
+    return {path: os.path.getmtime(path) for path in sorted(glob.glob(os.path.join(directory, "*.json")))}
+
+
+def load_index(directory: str = BANKS_DIR) -> QuestionBankIndex:
+    """
+    Read every `*.json` bank in `directory`:
+        {"role": "...", "questions": [{"id", "text", "tags", "difficulty", "weight", "reference"}, ...]}
+    Several files may contribute to the same role. Ids must be unique.
+    """
+    mtimes = bank_files(directory)
+    items: Dict[str, List[dict]] = {}
+    seen_ids = set()
+    for path in mtimes:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for q in data["questions"]:
+            if q["id"] in seen_ids:
+                raise ValueError(f"Duplicate question id {q['id']} in {path}")
+            seen_ids.add(q["id"])
+        items.setdefault(data["role"], []).extend(data["questions"])
+    return QuestionBankIndex({role: RoleBank(role, qs) for role, qs in items.items()}, mtimes)
+
+
+class SeenTracker:
+    """
+    Per-candidate, per-role bitsets (packed uint8, one bit per question) of
+    questions already asked, so new interviews avoid repeats. When too few
+    unseen questions remain the bitset starts over. Bounded LRU over
+    candidates; a bitset is dropped if its role's question list changes.
+    """
+
+    def __init__(self, max_candidates: int = SEEN_MAX_CANDIDATES):
+        self.max_candidates = max_candidates
+        self._bits: "OrderedDict[Tuple[str, str], Tuple[int, np.ndarray]]" = OrderedDict()
+
+    def exclusion(self, candidate: str, bank: RoleBank) -> Optional[np.ndarray]:
+        entry = self._bits.get((candidate, bank.role))
+        if entry is None or entry[0] != bank.signature:
+            return None
+        return np.unpackbits(entry[1], count=len(bank)).astype(bool)
+
+    def mark(self, candidate: str, bank: RoleBank, positions: List[int]) -> None:
+        key = (candidate, bank.role)
+        seen = self.exclusion(candidate, bank)
+        if seen is None or np.count_nonzero(~seen) < len(positions):
+            seen = np.zeros(len(bank), dtype=bool)
+        seen[positions] = True
+        self._bits[key] = (bank.signature, np.packbits(seen))
+        self._bits.move_to_end(key)
+        while len(self._bits) > self.max_candidates:
+            self._bits.popitem(last=False)
+
+
+class QuestionBanks:
+    """
+    Loads the banks from `directory` and hot-reloads them: at most every
+    `reload_interval` seconds a background thread checks the file mtimes
+    and, if any changed, builds a new index, swaps it in and runs the
+    `on_reload` listeners. Requests never wait for that and keep using the
+    old index meanwhile; a bank that fails to load (say, half-saved) is
+    logged and skipped until its files change again. Sessions refer to
+    questions by id, so questions dropped by a reload stay resolvable
+    through `get` (they're just never picked again), up to the
+    `retired_max` most recently used.
+    """
+
+    def __init__(self, directory: str = BANKS_DIR, reload_interval: float = BANK_RELOAD_INTERVAL,
+                 retired_max: int = RETIRED_MAX_QUESTIONS):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.retired_max = retired_max
+        self.seen = SeenTracker()
+        self._index = load_index(directory)
+        self._checked = time.monotonic()
+        self._failed: Optional[Dict[str, float]] = None   # mtimes of the last bank set that didn't load
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[["QuestionBanks"], None]] = []
+        self._retired: "OrderedDict[str, Question]" = OrderedDict()   # LRU of questions dropped by reloads
+        self._retired_lock = threading.Lock()
+
+    @property
+    def index(self) -> QuestionBankIndex:
+        if self.reload_interval > 0 and time.monotonic() - self._checked > self.reload_interval \
+                and self._lock.acquire(blocking=False):
+            self._checked = time.monotonic()
+            threading.Thread(target=self._background_reload, name="bank-reload", daemon=True).start()
+        return self._index
+
+    def _background_reload(self) -> None:
+        try:
+            self._reload(force=False)
+        except Exception:
+            logger.exception("Reloading question banks from %s failed; still serving the previous banks",
+                             self.directory)
+        finally:
+            self._lock.release()
+
+    def reload(self, force: bool = False) -> bool:
+        """Rebuild the index now if a bank file changed (or `force`); True if it did. Raises if loading fails."""
+        with self._lock:
+            return self._reload(force)
+
+    def _reload(self, force: bool) -> bool:
+        self._checked = time.monotonic()
+        mtimes = bank_files(self.directory)
+        if not force and (mtimes == self._index.mtimes or mtimes == self._failed):
+            return False
+        try:
+            fresh = load_index(self.directory)
+        except Exception:
+            self._failed = mtimes
+            raise
+        self._failed = None
+        old, self._index = self._index, fresh
+        with self._retired_lock:
+            for qid in fresh.by_id.keys() & self._retired.keys():
+                del self._retired[qid]
+            for qid in old.by_id.keys() - fresh.by_id.keys():
+                self._retired[qid] = old.get(qid)
+            while len(self._retired) > self.retired_max:
+                self._retired.popitem(last=False)
+        for listener in self._listeners:
+            try:
+                listener(self)
+            except Exception:
+                logger.exception("Question bank reload listener %r failed", listener)
+        return True
+
+    def on_reload(self, listener: Callable[["QuestionBanks"], None]) -> None:
+        """Call `listener(banks)` after each reload, on the reloading thread."""
+        self._listeners.append(listener)
+
+    def roles(self) -> List[str]:
+        return list(self.index.roles)
+
+    def get(self, qid: str) -> Optional[Question]:
+        question = self.index.get(qid)
+        if question is not None:
+            return question
+        with self._retired_lock:
+            question = self._retired.get(qid)
+            if question is not None:
+                self._retired.move_to_end(qid)
+        return question
+
+    def id_for(self, text: str) -> Optional[str]:
+        """The bank id of a question, by its text (sessions only keep the text)."""
+        return self.index.id_by_text.get(text)
+
+    def pick(self, role: str, count: int, candidate_id: Optional[str] = None) -> List[Question]:
+        bank = self.index.roles.get(role)
+        if bank is None:
+            return []
+        exclude = self.seen.exclusion(candidate_id, bank) if candidate_id else None
+        positions = bank.sample(count, exclude)
+        if candidate_id:
+            self.seen.mark(candidate_id, bank, positions)
+        return [bank.question(i) for i in positions]
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        return {role: list(bank.texts) for role, bank in self.index.roles.items()}
+
+    def references(self) -> Dict[str, Dict[str, str]]:
+        return {role: dict(zip(bank.texts, bank.references)) for role, bank in self.index.roles.items()}
+
+
+question_banks = QuestionBanks()
+
+# role -> question texts; kept up to date across reloads for callers that want the plain view.
+QUESTION_BANKS: Dict[str, List[str]] = question_banks.as_dict()
+
+
+def _refresh_plain_view(banks: QuestionBanks) -> None:
+    # update in place, never empty, since readers may be on another thread
+    fresh = banks.as_dict()
+    QUESTION_BANKS.update(fresh)
+    for role in QUESTION_BANKS.keys() - fresh.keys():
+        QUESTION_BANKS.pop(role, None)
+
+
+question_banks.on_reload(_refresh_plain_view)
+
+
+def pick_questions_for_role(role: str, count: int = 5, candidate_id: Optional[str] = None) -> List[str]:
+    return [q.text for q in question_banks.pick(role, count, candidate_id)]
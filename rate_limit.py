@@ -0,0 +1,128 @@
+# rate_limit.py
+import os
+import math
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from metrics import ADMISSION_WAIT, RATE_LIMITED
+
+# rate is tokens per second, burst the bucket size; a rate of 0 turns that limit off
+START_RATE_PER_IP = float(os.getenv("START_RATE_PER_IP", "0.2"))
+START_BURST_PER_IP = float(os.getenv("START_BURST_PER_IP", "5"))
+ANSWER_RATE_PER_IP = float(os.getenv("ANSWER_RATE_PER_IP", "5"))
+ANSWER_BURST_PER_IP = float(os.getenv("ANSWER_BURST_PER_IP", "20"))
+ANSWER_RATE_PER_SESSION = float(os.getenv("ANSWER_RATE_PER_SESSION", "0.5"))
+ANSWER_BURST_PER_SESSION = float(os.getenv("ANSWER_BURST_PER_SESSION", "3"))
+BATCH_RATE_PER_IP = float(os.getenv("BATCH_RATE_PER_IP", "2"))        # /grade/batch, in items
+BATCH_BURST_PER_IP = float(os.getenv("BATCH_BURST_PER_IP", "500"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "0") == "1"   # behind a proxy that sets it
+
+START_QUEUE_TIMEOUT = float(os.getenv("START_QUEUE_TIMEOUT", "2"))   # seconds a /start may wait under overload
+START_MAX_QUEUE = int(os.getenv("START_MAX_QUEUE", "100"))
+ADMISSION_POLL_INTERVAL = 0.05  # seconds
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by client or session, `rate` tokens per second up to
+    `burst`. Buckets live in a bounded LRU; an evicted bucket was idle long
+    enough that starting it full again is harmless.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """Take `cost` tokens from `key`'s bucket: 0.0 if allowed, else seconds until it would be."""
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class AdmissionControl:
+    """
+    Gate for work that creates future load (new interviews). While
+    `overloaded()` is true, callers queue for up to `queue_timeout` seconds
+    waiting for it to clear; past that, or with `max_queue` already
+    waiting, they're shed and told when to retry.
+    """
+
+    def __init__(self, overloaded: Callable[[], bool], queue_timeout: float = START_QUEUE_TIMEOUT,
+                 max_queue: int = START_MAX_QUEUE):
+        self.overloaded = overloaded
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.waiting = 0
+
+    async def admit(self) -> float:
+        """0.0 once admitted, else a Retry-After in seconds."""
+        if not self.overloaded():
+            return 0.0
+        if self.waiting >= self.max_queue or self.queue_timeout <= 0:
+            return max(1.0, self.queue_timeout)
+        self.waiting += 1
+        t0 = time.monotonic()
+        try:
+            while time.monotonic() - t0 < self.queue_timeout:
+                await asyncio.sleep(ADMISSION_POLL_INTERVAL)
+                if not self.overloaded():
+                    ADMISSION_WAIT.observe(time.monotonic() - t0)
+                    return 0.0
+        finally:
+            self.waiting -= 1
+        return max(1.0, self.queue_timeout)
+
+
+def client_key(request: Request) -> str:
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def too_many_requests(retry_after: float, route: str, reason: str) -> JSONResponse:
+    RATE_LIMITED.inc(route, reason)
+    return JSONResponse({"error": "Too many requests, try again later"}, status_code=429,
+                        headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+
+start_limiter = RateLimiter(START_RATE_PER_IP, START_BURST_PER_IP)
+answer_limiter = RateLimiter(ANSWER_RATE_PER_IP, ANSWER_BURST_PER_IP)
+session_limiter = RateLimiter(ANSWER_RATE_PER_SESSION, ANSWER_BURST_PER_SESSION)
+batch_limiter = RateLimiter(BATCH_RATE_PER_IP, BATCH_BURST_PER_IP)
+
+
+def check_answer_rate(request: Request, sid: str, route: str) -> Optional[JSONResponse]:
+    """The 429 to send if this client or session is answering too fast, else None."""
+    wait = answer_limiter.acquire(client_key(request))
+    if wait:
+        return too_many_requests(wait, route, "client")
+    wait = session_limiter.acquire(sid)
+    if wait:
+        return too_many_requests(wait, route, "session")
+    return None
@@ -0,0 +1,275 @@
+# result_log.py
+import os
+import time
+import queue
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from eval_cache import question_id
+from metrics import StatsGauges
+from question_banks import QuestionBanks, question_banks
+from session import VERDICT_LABELS, Session
+
+RESULT_LOG = os.getenv("RESULT_LOG", "")                         # SQLite path; empty (default) = don't keep results
+RESULT_LOG_BATCH = int(os.getenv("RESULT_LOG_BATCH", "500"))      # interviews per transaction, at most
+RESULT_LOG_LINGER = float(os.getenv("RESULT_LOG_LINGER", "0.2"))  # seconds to wait for a batch to fill
+RESULT_LOG_MAX_PENDING = int(os.getenv("RESULT_LOG_MAX_PENDING", "100000"))
+
+VERDICTS = VERDICT_LABELS   # stored as their index, the same as session.Verdict
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interviews (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    candidate_id TEXT,
+    role TEXT NOT NULL,
+    started REAL,
+    finished REAL NOT NULL,
+    questions INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    partial INTEGER NOT NULL,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS interviews_candidate ON interviews (candidate_id, finished)
+    WHERE candidate_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS interviews_role ON interviews (role, finished);
+
+CREATE TABLE IF NOT EXISTS answers (
+    interview_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    question_id TEXT NOT NULL,
+    verdict INTEGER NOT NULL,
+    user_answer TEXT NOT NULL,
+    feedback TEXT,
+    PRIMARY KEY (interview_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS answers_question ON answers (question_id, verdict);
+
+CREATE TABLE IF NOT EXISTS questions (
+    question_id TEXT PRIMARY KEY,
+    role TEXT NOT NULL,
+    text TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS question_stats (
+    question_id TEXT PRIMARY KEY,
+    role TEXT NOT NULL,
+    answers INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    partial INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS question_stats_role ON question_stats (role);
+"""
+
+
+def rates(answers: int, correct: int, partial: int) -> Dict[str, Any]:
+    """pass_rate counts only Correct; score gives half credit for Partially correct."""
+    return {
+        "answers": answers, "correct": correct, "partial": partial,
+        "pass_rate": correct / answers if answers else 0.0,
+        "score": (correct + 0.5 * partial) / answers if answers else 0.0,
+    }
+
+
+class ResultLog:
+    """
+    Finished interviews, kept forever in SQLite (WAL).
+
+    `interviews` and `answers` are append-only; `question_stats` is a
+    per-question rollup updated in the same transaction, so pass-rate
+    queries read a few hundred rows however many answers are logged
+    (`rebuild_stats` recomputes it from the log). Candidate history is an
+    index range scan.
+
+    `record` only puts the session on a bounded queue and never blocks or
+    touches the disk; a background thread writes whatever has queued up in
+    one transaction. If the queue is full the interview is dropped and
+    counted rather than slowing a request down.
+    """
+
+    def __init__(self, path: str, banks: QuestionBanks = question_banks, batch_size: int = RESULT_LOG_BATCH,
+                 linger: float = RESULT_LOG_LINGER, max_pending: int = RESULT_LOG_MAX_PENDING):
+        self.path = path
+        self.banks = banks
+        self.batch_size = batch_size
+        self.linger = linger
+        self.stats = {"recorded": 0, "written": 0, "dropped": 0, "batches": 0, "errors": 0}
+        self._queue: "queue.Queue[Optional[Tuple[str, Session, str, float]]]" = queue.Queue(max_pending)
+        self._read_lock = threading.Lock()
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+        self._reader = self._connect()
+        self._thread = threading.Thread(target=self._run, name="result-log-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # ---- writing -------------------------------------------------------------
+
+    def record(self, sid: str, session: Session, summary: str) -> bool:
+        """Queue a finished interview for writing. O(1); False if it had to be dropped."""
+        try:
+            self._queue.put_nowait((sid, session, summary, time.time()))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["recorded"] += 1
+        return True
+
+    def _run(self) -> None:
+        db = self._connect()
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write_batch(db, batch)
+        db.close()
+
+    def _write_batch(self, db: sqlite3.Connection, batch: List[Tuple[str, Session, str, float]]) -> None:
+        """Write `batch` in one transaction, or one interview at a time if that fails; never raises."""
+        try:
+            self._write(db, batch)
+        except Exception:   # an exception here must not stop the writer thread
+            if len(batch) == 1:
+                logger.exception("Result log: dropped interview %s", batch[0][0])
+                self.stats["errors"] += 1   # interviews that couldn't be written
+                return
+        else:
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+            return
+        for item in batch:
+            self._write_batch(db, [item])
+
+    def _question(self, qid: str) -> Tuple[str, str]:
+        """(id, text) to log; sessions from before question ids carry the text as their id."""
+        question = self.banks.get(qid)
+        if question is not None:
+            return qid, question.text
+        return "q-" + question_id(qid)[:16], qid
+
+    def _write(self, db: sqlite3.Connection, batch: List[Tuple[str, Session, str, float]]) -> None:
+        questions: Dict[str, Tuple[str, str]] = {}
+        rollup: Dict[str, List[int]] = {}   # question_id -> [answers, correct, partial]
+        with db:
+            for sid, session, summary, finished in batch:
+                answers = session.answers
+                codes = [int(a.verdict) for a in answers]
+                cur = db.execute(
+                    "INSERT INTO interviews (session_id, candidate_id, role, started, finished, questions,"
+                    " correct, partial, summary) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (sid, session.candidate_id, session.role, session.started, finished,
+                     len(answers), codes.count(2), codes.count(1), summary))
+                rows = []
+                for pos, (a, code) in enumerate(zip(answers, codes)):
+                    qid, text = self._question(a.question_id)
+                    questions[qid] = (session.role, text)
+                    counts = rollup.setdefault(qid, [0, 0, 0])
+                    counts[0] += 1
+                    counts[1] += code == 2
+                    counts[2] += code == 1
+                    rows.append((cur.lastrowid, pos, qid, code, a.text, a.feedback))
+                db.executemany("INSERT INTO answers (interview_id, position, question_id, verdict, user_answer,"
+                               " feedback) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            db.executemany("INSERT OR IGNORE INTO questions (question_id, role, text) VALUES (?, ?, ?)",
+                           [(qid, role, text) for qid, (role, text) in questions.items()])
+            db.executemany(
+                "INSERT INTO question_stats (question_id, role, answers, correct, partial) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (question_id) DO UPDATE SET answers = answers + excluded.answers,"
+                " correct = correct + excluded.correct, partial = partial + excluded.partial",
+                [(qid, questions[qid][0], *counts) for qid, counts in rollup.items()])
+
+    def flush(self, timeout: float = 10.0) -> None:
+        """Wait until everything recorded so far is on disk (for scripts and benchmarks)."""
+        deadline = time.monotonic() + timeout
+        while self.stats["written"] + self.stats["errors"] < self.stats["recorded"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Write what's queued, then stop the writer; gives up after `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass   # the writer is far behind or stuck; it's a daemon thread, so don't wait on it
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        self._reader.close()
+
+    # ---- queries (blocking; call through asyncio.to_thread from handlers) -----
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[tuple]:
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    def role_pass_rates(self) -> List[Dict[str, Any]]:
+        rows = self._query("SELECT role, SUM(answers), SUM(correct), SUM(partial) FROM question_stats"
+                           " GROUP BY role ORDER BY role")
+        return [{"role": role, **rates(n, c, p)} for role, n, c, p in rows]
+
+    def question_pass_rates(self, role: Optional[str] = None, min_answers: int = 1,
+                            limit: int = 100) -> List[Dict[str, Any]]:
+        """Per-question rates, hardest (lowest score) first."""
+        sql = ("SELECT s.question_id, s.role, q.text, s.answers, s.correct, s.partial"
+               " FROM question_stats s JOIN questions q USING (question_id) WHERE s.answers >= ?")
+        params: Tuple = (min_answers,)
+        if role is not None:
+            sql += " AND s.role = ?"
+            params += (role,)
+        sql += " ORDER BY (s.correct + 0.5 * s.partial) * 1.0 / s.answers, s.question_id LIMIT ?"
+        rows = self._query(sql, params + (limit,))
+        return [{"question_id": qid, "role": r, "question": text, **rates(n, c, p)}
+                for qid, r, text, n, c, p in rows]
+
+    def question_stats(self) -> Dict[str, Tuple[int, int, int]]:
+        """question_id -> (answers, correct, partial), for every question ever answered."""
+        return {qid: (n, c, p) for qid, n, c, p in
+                self._query("SELECT question_id, answers, correct, partial FROM question_stats")}
+
+    def candidate_history(self, candidate_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """The candidate's interviews, newest first."""
+        rows = self._query(
+            "SELECT session_id, role, started, finished, questions, correct, partial, summary FROM interviews"
+            " WHERE candidate_id = ? ORDER BY finished DESC LIMIT ?", (candidate_id, limit))
+        return [{"session_id": sid, "role": role, "started": started, "finished": finished,
+                 "summary": summary, **rates(n, c, p)}
+                for sid, role, started, finished, n, c, p, summary in rows]
+
+    def rebuild_stats(self) -> None:
+        """Recompute the `question_stats` rollup from the answer log."""
+        with self._connect() as db:
+            db.execute("DELETE FROM question_stats")
+            db.execute(
+                "INSERT INTO question_stats (question_id, role, answers, correct, partial)"
+                " SELECT a.question_id, q.role, COUNT(*), SUM(a.verdict = 2), SUM(a.verdict = 1)"
+                " FROM answers a JOIN questions q USING (question_id) GROUP BY a.question_id")
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": self._queue.qsize()}
+
+
+def make_result_log(path: str = RESULT_LOG) -> Optional[ResultLog]:
+    if not path:
+        return None
+    log = ResultLog(path)
+    StatsGauges("result_log", "Interview result log writer counters.", log.metrics)
+    return log
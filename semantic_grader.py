@@ -0,0 +1,256 @@
+# semantic_grader.py
+import os
+import json
+import zlib
+import hashlib
+import tempfile
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pregrader import STOPWORDS, tokenize
+from question_banks import QuestionBanks, question_banks
+
+SEMANTIC_GRADER = os.getenv("SEMANTIC_GRADER", "0") == "1"
+SEMANTIC_INDEX_DIR = os.getenv("SEMANTIC_INDEX_DIR",   # a rebuildable cache, kept out of the source tree
+                               os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+                                            "interview-agent", "semantic_index"))
+SEMANTIC_DIM = int(os.getenv("SEMANTIC_DIM", "4096"))                 # hashed feature buckets, a power of two
+SEMANTIC_CORRECT = float(os.getenv("SEMANTIC_CORRECT", "0.45"))       # cosine at/above -> Correct
+SEMANTIC_INCORRECT = float(os.getenv("SEMANTIC_INCORRECT", "0.12"))   # cosine below -> Incorrect
+VECTORIZER_VERSION = "2"   # bump when `features` or the file layout changes, so stale indexes are rebuilt
+PREFIX_LEN = 5             # a word's first letters as an extra feature: collection ~ collector
+
+
+def features(text: str) -> Counter:
+    """Content words, their prefixes and adjacent word pairs, counted."""
+    words = [t for t in tokenize(text) if t not in STOPWORDS and len(t) > 1]
+    grams = Counter(words)
+    grams.update("~" + w[:PREFIX_LEN] for w in words if len(w) > PREFIX_LEN)
+    grams.update(a + " " + b for a, b in zip(words, words[1:]))
+    return grams
+
+
+class HashingVectorizer:
+    """
+    Text to a sparse vector in `dim` buckets by hashing its features
+    (crc32, stable across processes, with a sign bit to cancel collisions
+    on average), log-scaled counts times bucket IDF, L2-normalised. No
+    vocabulary to store or load.
+    """
+
+    def __init__(self, dim: int = SEMANTIC_DIM, idf: Optional[np.ndarray] = None):
+        if dim & (dim - 1):
+            raise ValueError("dim must be a power of two")
+        self.dim = dim
+        self.idf = idf
+
+    def sparse(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(bucket indices, values); duplicate buckets are summed."""
+        grams = features(text)
+        if not grams:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.int64, count=len(grams))
+        counts = np.fromiter(grams.values(), dtype=np.float32, count=len(grams))
+        idx = hashes & (self.dim - 1)
+        vals = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32) * (1.0 + np.log(counts))
+        idx, inverse = np.unique(idx, return_inverse=True)
+        vals = np.bincount(inverse, weights=vals).astype(np.float32)
+        if self.idf is not None:
+            vals *= self.idf[idx]
+        norm = float(np.sqrt(np.dot(vals, vals)))
+        return idx, (vals / norm if norm else vals)
+
+    def dense(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        idx, vals = self.sparse(text)
+        vec[idx] = vals
+        return vec
+
+
+def index_signature(references: Dict[str, Dict[str, str]], dim: int) -> str:
+    h = hashlib.sha256(f"{VECTORIZER_VERSION}\0{dim}\0".encode())
+    for role in sorted(references):
+        for question, answer in references[role].items():
+            h.update(f"{role}\0{question}\0{answer}\0".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def build_index(references: Dict[str, Dict[str, str]], directory: str, dim: int = SEMANTIC_DIM) -> None:
+    """
+    Write the reference matrix (`vectors.npy`, float32, one row per hash
+    bucket and one column per question with a reference, columns grouped by
+    role), bucket IDF (`idf.npy`) and `meta.json` into `directory`, each
+    replaced atomically.
+    """
+    rows: List[Tuple[str, str, str]] = [(role, q, a) for role in sorted(references)
+                                        for q, a in references[role].items() if a]
+    plain = HashingVectorizer(dim)
+    df = np.zeros(dim, dtype=np.float64)
+    for _, _, answer in rows:
+        df[plain.sparse(answer)[0]] += 1
+    idf = (np.log((1 + len(rows)) / (1 + df)) + 1.0).astype(np.float32)
+    vectorizer = HashingVectorizer(dim, idf)
+    matrix = np.zeros((dim, len(rows)), dtype=np.float32)
+    roles: Dict[str, List[int]] = {}
+    key_terms: List[List[str]] = []
+    for i, (role, question, answer) in enumerate(rows):
+        matrix[:, i] = vectorizer.dense(answer)
+        span = roles.setdefault(role, [i, i])
+        span[1] = i + 1
+        asked = set(tokenize(question))
+        words = [w for w in dict.fromkeys(tokenize(answer))
+                 if w not in STOPWORDS and len(w) > 2 and w not in asked]
+        words.sort(key=lambda w: -idf[zlib.crc32(w.encode("utf-8")) & (dim - 1)])
+        key_terms.append(words[:8])
+    meta = {"signature": index_signature(references, dim), "dim": dim,
+            "questions": [q for _, q, _ in rows], "roles": roles, "key_terms": key_terms}
+
+    os.makedirs(directory, exist_ok=True)
+    for name, write in (("vectors.npy", lambda f: np.save(f, matrix)), ("idf.npy", lambda f: np.save(f, idf)),
+                        ("meta.json", lambda f: f.write(json.dumps(meta).encode("utf-8")))):
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=name + ".")
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, os.path.join(directory, name))
+
+
+class SemanticGrader:
+    """
+    Grades an answer by cosine similarity to its question's reference
+    answer, both hashed into the same vector space.
+
+    The reference matrix is precomputed on disk and opened with
+    `mmap_mode="r"`: startup reads only `meta.json`, and grading touches the
+    few pages it compares against. The matrix is stored bucket-major, so
+    comparing an answer with every reference of its role gathers one
+    contiguous slice per bucket the answer uses, and one dot product scores
+    them all: an answer that fits another question better than its own is
+    caught too.
+
+    Every score maps to a verdict (unlike the pre-grader, which only answers
+    when confident); the correction is the reference answer, so grading
+    needs no model call at all. Questions without a reference return None.
+    """
+
+    def __init__(self, directory: str = SEMANTIC_INDEX_DIR, banks: QuestionBanks = question_banks,
+                 correct: float = SEMANTIC_CORRECT, incorrect: float = SEMANTIC_INCORRECT):
+        self.directory = directory
+        self.banks = banks
+        self.correct = correct
+        self.incorrect = incorrect
+        self.stats = {"graded": 0, "correct": 0, "partial": 0, "incorrect": 0, "skipped": 0}
+        self._swap = threading.Lock()   # held while grading and while `load` swaps the index in
+        self.load()
+
+    def load(self) -> None:
+        """(Re)open the index; safe to call from another thread than `grade`'s."""
+        with open(os.path.join(self.directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        questions: List[str] = meta["questions"]
+        role_of_row = np.empty(len(questions), dtype=np.int32)
+        spans: List[Tuple[int, int]] = []
+        for n, (start, end) in enumerate(meta["roles"].values()):
+            role_of_row[start:end] = n
+            spans.append((start, end))
+        state = {
+            "signature": meta["signature"],
+            "matrix": np.load(os.path.join(self.directory, "vectors.npy"), mmap_mode="r"),
+            "vectorizer": HashingVectorizer(meta["dim"], np.load(os.path.join(self.directory, "idf.npy"),
+                                                                 mmap_mode="r")),
+            "questions": questions,
+            "row": {q: i for i, q in enumerate(questions)},
+            "role_of_row": role_of_row,
+            "spans": spans,
+            "key_terms": meta["key_terms"],
+        }
+        with self._swap:
+            self.__dict__.update(state)
+
+    def similarities(self, question: str, answer: str) -> Optional[Tuple[float, float]]:
+        """(cosine to this question's reference, best cosine to another reference of the role)."""
+        i = self.row.get(question)
+        if i is None:
+            return None
+        idx, vals = self.vectorizer.sparse(answer)
+        if not len(idx):
+            return 0.0, 0.0
+        start, end = self.spans[self.role_of_row[i]]
+        scores = vals @ self.matrix[idx, start:end]
+        own = float(scores[i - start])
+        scores[i - start] = -1.0
+        return own, float(scores.max()) if len(scores) > 1 else 0.0
+
+    def grade(self, question: str, answer: str) -> Optional[Dict[str, str]]:
+        with self._swap:
+            return self._grade(question, answer)
+
+    def _grade(self, question: str, answer: str) -> Optional[Dict[str, str]]:
+        sims = self.similarities(question, answer)
+        qid = self.banks.id_for(question)
+        if sims is None or qid is None:
+            self.stats["skipped"] += 1
+            return None
+        reference = self.banks.get(qid).reference
+        own, other = sims
+        self.stats["graded"] += 1
+        if own >= self.correct and own >= other:
+            self.stats["correct"] += 1
+            return {"verdict": "Correct", "short_feedback": "Close to the reference answer.",
+                    "correction": reference}
+        if own < self.incorrect or other >= self.correct and own < other / 2:
+            self.stats["incorrect"] += 1
+            feedback = ("This answers a different question." if other >= self.correct
+                        else self._missing("Missing key points", question, answer))
+            return {"verdict": "Incorrect", "short_feedback": feedback, "correction": reference}
+        self.stats["partial"] += 1
+        return {"verdict": "Partially correct", "short_feedback": self._missing("Also cover", question, answer),
+                "correction": reference}
+
+    def _missing(self, lead: str, question: str, answer: str, limit: int = 3) -> str:
+        said = set(tokenize(answer))
+        missing = [w for w in self.key_terms[self.row[question]] if w not in said][:limit]
+        return f"{lead}: {', '.join(missing)}." if missing else "Some key points are missing."
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "questions": len(self.questions), "matrix_bytes": self.matrix.nbytes}
+
+
+def load_semantic_grader(banks: QuestionBanks = question_banks, directory: str = SEMANTIC_INDEX_DIR,
+                         dim: int = SEMANTIC_DIM) -> Optional[SemanticGrader]:
+    """
+    The grader over the banks' reference answers, when SEMANTIC_GRADER=1.
+    The index is (re)built only if missing or built from other references;
+    bank reloads rebuild it and re-map the files.
+    """
+    if not SEMANTIC_GRADER:
+        return None
+
+    def ensure(b: QuestionBanks) -> None:
+        references = b.references()
+        try:
+            with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+                current = json.load(f)["signature"] == index_signature(references, dim)
+        except (OSError, ValueError, KeyError):
+            current = False
+        if not current:
+            build_index(references, directory, dim)
+
+    ensure(banks)
+    grader = SemanticGrader(directory, banks)
+
+    def on_reload(b: QuestionBanks) -> None:
+        ensure(b)
+        grader.load()
+
+    banks.on_reload(on_reload)
+    return grader
+
+
+semantic_grader = load_semantic_grader()
+
+if __name__ == "__main__":
+    build_index(question_banks.references(), SEMANTIC_INDEX_DIR)
+    print(f"semantic index written to {SEMANTIC_INDEX_DIR}")
@@ -0,0 +1,69 @@
+# serve.py
+"""
+Production entry point: several uvicorn worker processes on one port.
+
+    python serve.py --workers 4 [--host 0.0.0.0] [--port 8000]
+
+Any worker can serve any request of an interview, so sessions have to live
+in shared storage: with more than one worker SESSION_STORE defaults to a
+SQLite file in the user's state dir, ~/.local/state/interview-agent/
+sessions.db (use redis://... to spread workers over hosts).
+LLM_MAX_CONCURRENCY and LLM_MAX_QUEUE are read as totals for the whole
+server and split between the workers, so the provider sees the same cap
+however many processes run.
+
+Each worker starts accepting connections right away and warms up (question
+banks, LLM connection, compressed assets; App.warm_up) concurrently; until
+that's done GET /healthz returns 503 "starting", so point load balancer and
+readiness checks at it. On SIGTERM/SIGINT workers stop
+accepting, finish in-flight requests, let running LLM calls end, and save
+running summaries to the session store, for up to --drain seconds.
+"""
+import os
+import sys
+import math
+import argparse
+
+import uvicorn
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(os.getenv("XDG_STATE_HOME", os.path.expanduser("~/.local/state")), "interview-agent")
+DEFAULT_SHARED_STORE = "sqlite:///" + os.path.join(STATE_DIR, "sessions.db")   # outside the source tree
+
+
+def worker_env(workers: int, env: dict) -> dict:
+    """Environment overrides for `workers` processes sharing one server's settings."""
+    store = env.get("SESSION_STORE", "memory" if workers == 1 else DEFAULT_SHARED_STORE)
+    if workers > 1 and store == "memory":
+        raise SystemExit("SESSION_STORE=memory can't be shared between workers; use sqlite:///... or redis://...")
+    overrides = {"SESSION_STORE": store}
+    for name, default in (("LLM_MAX_CONCURRENCY", 64), ("LLM_MAX_QUEUE", 256)):
+        total = int(env.get(name, default))
+        overrides[name] = str(max(1, math.ceil(total / workers)))
+    return overrides
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run the interview app with several worker processes.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--drain", type=float, default=float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "20")),
+                        help="seconds to finish in-flight work on shutdown")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", action="store_true")
+    args = parser.parse_args(argv)
+
+    os.environ.update(worker_env(args.workers, dict(os.environ)))
+    if os.environ["SESSION_STORE"] == DEFAULT_SHARED_STORE:
+        os.makedirs(STATE_DIR, exist_ok=True)
+    os.environ["SHUTDOWN_DRAIN_TIMEOUT"] = str(args.drain)
+    print(f"serve: {args.workers} worker(s) on {args.host}:{args.port}, sessions in {os.environ['SESSION_STORE']}, "
+          f"{os.environ['LLM_MAX_CONCURRENCY']} LLM calls per worker", file=sys.stderr)
+    uvicorn.run("App:app", app_dir=HERE, host=args.host, port=args.port, workers=args.workers,
+                timeout_graceful_shutdown=args.drain, log_level=args.log_level,
+                access_log=not args.no_access_log, proxy_headers=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# session.py
+"""
+The interview session: what /start creates and every /answer reads and
+writes back through the session store.
+
+A worker holds tens of thousands of these, so they are kept small:
+questions are bank ids (the text is looked up when needed), verdicts are
+small ints, answers are capped at SESSION_ANSWER_MAX characters and long
+ones zlib-compressed, and a correction that is just the question's
+reference answer isn't stored at all. `dumps`/`loads` are a positional
+encoding for the shared stores (msgpack when installed, JSON otherwise);
+sessions saved as the old JSON dicts still load.
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import base64
+from enum import IntEnum
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from question_banks import question_banks
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except Exception:
+    MSGPACK_AVAILABLE = False
+
+SESSION_ANSWER_MAX = int(os.getenv("SESSION_ANSWER_MAX", "2000"))      # answer characters kept per answer
+SESSION_TEXT_MAX = int(os.getenv("SESSION_TEXT_MAX", "600"))           # feedback/correction characters kept
+SESSION_COMPRESS_MIN = int(os.getenv("SESSION_COMPRESS_MIN", "400"))   # compress answers this long; 0 = never
+FORMAT_VERSION = 1
+ELLIPSIS = "…"
+
+VERDICT_LABELS = ("Incorrect", "Partially correct", "Correct")
+
+
+class Verdict(IntEnum):
+    INCORRECT = 0
+    PARTIAL = 1
+    CORRECT = 2
+
+    @property
+    def label(self) -> str:
+        return VERDICT_LABELS[self]
+
+    @classmethod
+    def of(cls, label: str) -> "Verdict":
+        return _BY_LABEL.get(label, cls.INCORRECT)
+
+
+_BY_LABEL = {label: Verdict(i) for i, label in enumerate(VERDICT_LABELS)}
+
+
+def cap(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1] + ELLIPSIS
+
+
+def question_text(qid: str) -> str:
+    """The question's text; ids that aren't in the banks are the text itself (old sessions)."""
+    question = question_banks.get(qid)
+    return question.text if question is not None else qid
+
+
+def _reference(qid: str) -> str:
+    question = question_banks.get(qid)
+    return question.reference if question is not None else ""
+
+
+class Answer:
+    """One graded answer. Read `text` and `correction` through the properties."""
+
+    __slots__ = ("question_id", "verdict", "_text", "feedback", "_correction")
+
+    def __init__(self, question_id: str, verdict: Verdict, text: Union[str, bytes], feedback: str = "",
+                 correction: Optional[str] = None):
+        self.question_id = question_id
+        self.verdict = verdict
+        self._text = text              # str, or zlib-compressed UTF-8
+        self.feedback = feedback
+        self._correction = correction  # None: the question's reference answer
+
+    @classmethod
+    def graded(cls, question_id: str, user_answer: str, grading: Dict[str, str]) -> "Answer":
+        text: Union[str, bytes] = cap(user_answer, SESSION_ANSWER_MAX)
+        if SESSION_COMPRESS_MIN and len(text) >= SESSION_COMPRESS_MIN:
+            text = zlib.compress(text.encode("utf-8"))
+        correction: Optional[str] = grading.get("correction") or ""
+        if correction == _reference(question_id):
+            correction = None
+        return cls(question_id, Verdict.of(grading["verdict"]), text,
+                   cap(grading.get("short_feedback") or "", SESSION_TEXT_MAX),
+                   None if correction is None else cap(correction, SESSION_TEXT_MAX))
+
+    @property
+    def text(self) -> str:
+        return zlib.decompress(self._text).decode("utf-8") if isinstance(self._text, bytes) else self._text
+
+    @property
+    def correction(self) -> str:
+        return _reference(self.question_id) if self._correction is None else self._correction
+
+    def as_dict(self) -> Dict[str, str]:
+        """The shape the API's `log` and the summary prompts use."""
+        return {"question": question_text(self.question_id), "user_answer": self.text,
+                "verdict": self.verdict.label, "feedback": self.feedback, "correction": self.correction}
+
+
+class Session:
+    """
+    One interview. `question_ids[current]` is the question being asked;
+    adaptive sessions append the next id after each answer, and `total` is
+    how many questions the interview has (or will have).
+    """
+
+    __slots__ = ("role", "candidate_id", "started", "question_ids", "current", "total", "adaptive", "ability",
+                 "answers", "summary_state")
+
+    def __init__(self, role: str, question_ids: Iterable[str], candidate_id: Optional[str] = None,
+                 total: Optional[int] = None, adaptive: bool = False, started: Optional[float] = None):
+        self.role = sys.intern(role)
+        self.candidate_id = candidate_id
+        self.started = time.time() if started is None else started
+        self.question_ids: List[str] = list(question_ids)
+        self.current = 0
+        self.total = len(self.question_ids) if total is None else total
+        self.adaptive = adaptive
+        self.ability = 0.0
+        self.answers: List[Answer] = []
+        self.summary_state: Optional[Dict[str, Any]] = None   # see SummaryPipeline
+
+    @property
+    def question(self) -> str:
+        return question_text(self.question_ids[self.current])
+
+    @property
+    def finished(self) -> bool:
+        return self.current >= self.total
+
+    def add_answer(self, user_answer: str, grading: Dict[str, str]) -> Answer:
+        """Record the grading of the current question and move on to the next."""
+        answer = Answer.graded(self.question_ids[self.current], user_answer, grading)
+        self.answers.append(answer)
+        self.current += 1
+        return answer
+
+    def log(self, start: int = 0) -> List[Dict[str, str]]:
+        return [a.as_dict() for a in self.answers[start:]]
+
+    # ---- serialisation -----------------------------------------------------
+
+    def to_row(self, binary: bool) -> list:
+        state = self.summary_state
+        answers = []
+        for a in self.answers:
+            text = a._text
+            compressed = isinstance(text, bytes)
+            if compressed and not binary:
+                text = base64.b64encode(text).decode("ascii")
+            answers.append([a.question_id, int(a.verdict), text, compressed, a.feedback, a._correction])
+        return [FORMAT_VERSION, self.role, self.candidate_id, self.started, self.question_ids, self.current,
+                self.total, self.adaptive, self.ability,
+                None if state is None else [state["text"], state["upto"], state.get("tokens", 0)], answers]
+
+    @classmethod
+    def from_row(cls, row: list) -> "Session":
+        _, role, candidate_id, started, ids, current, total, adaptive, ability, state, answers = row
+        session = cls(role, (sys.intern(q) for q in ids), candidate_id, total, adaptive, started)
+        session.current = current
+        session.ability = ability
+        if state is not None:
+            session.summary_state = {"text": state[0], "upto": state[1], "tokens": state[2]}
+        for qid, verdict, text, compressed, feedback, correction in answers:
+            if compressed and isinstance(text, str):
+                text = base64.b64decode(text)
+            session.answers.append(Answer(sys.intern(qid), Verdict(verdict), text, feedback, correction))
+        return session
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Session":
+        """A session saved by an older version, as a dict with question texts."""
+        ids = data.get("question_ids") or [question_banks.id_for(t) or t for t in data["questions"]]
+        session = cls(data["role"], ids, data.get("candidate_id"), data.get("total", len(ids)),
+                      data.get("adaptive", False), data.get("started"))
+        session.current = data["current"]
+        session.ability = data.get("ability", 0.0)
+        session.summary_state = data.get("summary_state")
+        for i, a in enumerate(data["answers"]):
+            session.answers.append(Answer.graded(ids[i], a["user_answer"], {
+                "verdict": a["verdict"], "short_feedback": a.get("feedback", ""),
+                "correction": a.get("correction", "")}))
+        return session
+
+    def dumps(self) -> bytes:
+        if MSGPACK_AVAILABLE:
+            return msgpack.packb(self.to_row(binary=True), use_bin_type=True)
+        return json.dumps(self.to_row(binary=False), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    @classmethod
+    def loads(cls, data: Union[bytes, str]) -> "Session":
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if data[:1] == b"{":
+            return cls.from_dict(json.loads(data))
+        if data[:1] == b"[":
+            return cls.from_row(json.loads(data))
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("session was saved with msgpack, which isn't installed")
+        return cls.from_row(msgpack.unpackb(data, raw=False))
@@ -0,0 +1,225 @@
+# session_store.py
+import os
+import time
+import sqlite3
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from session import Session
+
+SESSION_STORE_URL = os.getenv("SESSION_STORE", "memory")
+SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))          # seconds since last activity
+SESSION_MAX = int(os.getenv("SESSION_MAX", "100000"))          # in-memory store only
+
+
+class SessionStore:
+    """
+    Where interview sessions live between requests.
+
+    Sessions are `Session` objects; shared stores keep them as
+    `Session.dumps()` bytes. Callers must `put` a session back after
+    changing it; shared stores don't see in-place edits.
+    Every `get`/`put` refreshes the session's TTL.
+    """
+
+    async def get(self, sid: str) -> Optional[Session]:
+        raise NotImplementedError
+
+    async def put(self, sid: str, session: Session) -> None:
+        raise NotImplementedError
+
+    async def delete(self, sid: str) -> None:
+        raise NotImplementedError
+
+    async def count(self) -> int:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Per-process LRU with idle TTL. Holds at most `max_sessions`; the least
+    recently used session is dropped first. Because the LRU order is also
+    last-access order, expired sessions are always at the front and are
+    purged in amortised O(1) on each write.
+    """
+
+    def __init__(self, max_sessions: int = SESSION_MAX, ttl: float = SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # sid -> (last_access, session)
+
+    def _purge_expired(self, now: float) -> None:
+        cutoff = now - self.ttl
+        while self._data:
+            sid, (ts, _) = next(iter(self._data.items()))
+            if ts > cutoff:
+                break
+            del self._data[sid]
+
+    async def get(self, sid: str) -> Optional[Session]:
+        entry = self._data.get(sid)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if now - entry[0] > self.ttl:
+            del self._data[sid]
+            return None
+        self._data[sid] = (now, entry[1])
+        self._data.move_to_end(sid)
+        return entry[1]
+
+    async def put(self, sid: str, session: Session) -> None:
+        now = time.monotonic()
+        self._data[sid] = (now, session)
+        self._data.move_to_end(sid)
+        self._purge_expired(now)
+        while len(self._data) > self.max_sessions:
+            self._data.popitem(last=False)
+
+    async def delete(self, sid: str) -> None:
+        self._data.pop(sid, None)
+
+    async def count(self) -> int:
+        self._purge_expired(time.monotonic())
+        return len(self._data)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in a local SQLite file in WAL mode, so every uvicorn worker on
+    the host sees the same sessions. Expired rows are deleted every
+    `purge_every` writes.
+
+    sqlite3 calls block (up to the busy timeout while another worker holds
+    the write lock), so they run on one dedicated thread, never on the
+    event loop; that thread also serialises use of the connection.
+    """
+
+    def __init__(self, path: str, ttl: float = SESSION_TTL, purge_every: int = 1000):
+        self.path = path
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self._writes = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-store")
+        self._db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires)")
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _get(self, sid: str) -> Optional[Session]:
+        row = self._db.execute(
+            "SELECT data FROM sessions WHERE sid = ? AND expires > ?", (sid, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return Session.loads(row[0])
+
+    def _put(self, sid: str, data: bytes) -> None:
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)",
+            (sid, data, now + self.ttl),
+        )
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            self._db.execute("DELETE FROM sessions WHERE expires <= ?", (now,))
+
+    def _delete(self, sid: str) -> None:
+        self._db.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def _count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM sessions WHERE expires > ?", (time.time(),)).fetchone()[0]
+
+    async def get(self, sid: str) -> Optional[Session]:
+        return await self._run(self._get, sid)
+
+    async def put(self, sid: str, session: Session) -> None:
+        # serialised here, so later in-place edits by the caller can't race the write
+        await self._run(self._put, sid, session.dumps())
+
+    async def delete(self, sid: str) -> None:
+        await self._run(self._delete, sid)
+
+    async def count(self) -> int:
+        return await self._run(self._count)
+
+    async def close(self) -> None:
+        await self._run(self._db.close)
+        self._executor.shutdown()
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Sessions in Redis (or anything speaking its protocol: Valkey, KeyDB,
+    Dragonfly) for workers spread over several hosts. Expiry is native
+    key TTL. Needs the `redis` package.
+
+    Live sessions are also kept in a sorted set scored by expiry time, so
+    `count` (scraped by every worker) is a ZCARD rather than a keyspace SCAN.
+    """
+
+    def __init__(self, url: str, ttl: float = SESSION_TTL, prefix: str = "interview:session:"):
+        import redis.asyncio as aioredis
+        self.ttl = int(ttl)
+        self.prefix = prefix
+        self.index_key = prefix + "_expires"
+        self._redis = aioredis.from_url(url)
+
+    async def get(self, sid: str) -> Optional[Session]:
+        key = self.prefix + sid
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.getex(key, ex=self.ttl)
+            pipe.zadd(self.index_key, {sid: time.time() + self.ttl}, xx=True)
+            data, _ = await pipe.execute()
+        if data is None:
+            return None
+        return Session.loads(data)
+
+    async def put(self, sid: str, session: Session) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.set(self.prefix + sid, session.dumps(), ex=self.ttl)
+            pipe.zadd(self.index_key, {sid: time.time() + self.ttl})
+            await pipe.execute()
+
+    async def delete(self, sid: str) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.delete(self.prefix + sid)
+            pipe.zrem(self.index_key, sid)
+            await pipe.execute()
+
+    async def count(self) -> int:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(self.index_key, "-inf", time.time())
+            pipe.zcard(self.index_key)
+            _, n = await pipe.execute()
+        return n
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def make_session_store(url: str = SESSION_STORE_URL) -> SessionStore:
+    """
+    Build a store from a URL:
+        memory                     per-process LRU + TTL (default)
+        sqlite:///path/to/file.db  shared between workers on one host
+        redis://host:6379/0        shared between hosts
+    """
+    if url == "memory":
+        return MemorySessionStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteSessionStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSessionStore(url)
+    raise ValueError(f"Unknown SESSION_STORE: {url}")
@@ -0,0 +1,116 @@
+# static_assets.py
+import gzip
+import hashlib
+import threading
+from typing import Callable, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except Exception:
+    BROTLI_AVAILABLE = False
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """`gzip, br;q=0.9, *;q=0` -> {"gzip": 1.0, "br": 0.9, "*": 0.0}"""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+class StaticAsset:
+    """
+    One file held in memory with everything a response needs computed up
+    front: the identity body, gzip/brotli variants when they're actually
+    smaller, and a strong ETag per variant.
+    """
+
+    __slots__ = ("media_type", "cache_control", "variants", "etags")
+
+    def __init__(self, body: bytes, media_type: str, cache_control: str = "no-cache"):
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.variants: Dict[str, bytes] = {"identity": body}
+        compressed = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if BROTLI_AVAILABLE:
+            compressed["br"] = brotli.compress(body, quality=11)
+        for coding, data in compressed.items():
+            if len(data) < len(body):
+                self.variants[coding] = data
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etags = {coding: f'"{digest}"' if coding == "identity" else f'"{digest}-{coding}"'
+                      for coding in self.variants}
+
+    def choose(self, accept_encoding: str) -> str:
+        if not accept_encoding:
+            return "identity"
+        accepted = parse_accept_encoding(accept_encoding)
+        for coding in ("br", "gzip"):
+            if coding in self.variants and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+                return coding
+        return "identity"
+
+    def not_modified(self, if_none_match: str) -> bool:
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or not tags.isdisjoint(self.etags.values())
+
+    def response(self, request: Request) -> Response:
+        coding = self.choose(request.headers.get("accept-encoding", ""))
+        headers = {"ETag": self.etags[coding], "Cache-Control": self.cache_control}
+        if len(self.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        if self.not_modified(request.headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(self.variants[coding], media_type=self.media_type, headers=headers)
+
+
+class StaticAssets:
+    """
+    Named in-memory assets, read once (at import) and served without
+    touching the disk. Compressing them (brotli at quality 11 is slow) is
+    left to `preload` at startup, or to the first request for each one.
+    """
+
+    def __init__(self):
+        self._assets: Dict[str, StaticAsset] = {}
+        self._pending: Dict[str, Callable[[], StaticAsset]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, body: bytes, media_type: str, cache_control: str = "no-cache") -> None:
+        self._pending[name] = lambda: StaticAsset(body, media_type, cache_control)
+
+    def add_file(self, name: str, path: str, media_type: str, cache_control: str = "no-cache") -> None:
+        with open(path, "rb") as f:
+            self.add(name, f.read(), media_type, cache_control)
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        asset = self._assets.get(name)
+        if asset is None and name in self._pending:
+            with self._lock:
+                asset = self._assets.get(name)
+                if asset is None:
+                    asset = self._assets[name] = self._pending.pop(name)()
+        return asset
+
+    def preload(self) -> None:
+        for name in list(self._pending):
+            self.get(name)
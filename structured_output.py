@@ -0,0 +1,204 @@
+# structured_output.py
+"""
+Getting a grading out of whatever the model actually wrote.
+
+Models asked for "ONLY valid JSON" still wrap it in code fences, add a
+sentence before or after, emit a second object, leave a trailing comma,
+use Python quoting, or get cut off by max_tokens. `parse_grading` recovers
+every one of those locally, in order of cost:
+
+1. each JSON value in the text, decoded in place (`raw_decode`), first one
+   that validates as a `Grading` wins;
+2. the same after light clean-up (smart quotes, trailing commas, Python
+   literals);
+3. a truncated object, as long as its `verdict` was written in full (read
+   with the same StreamingFieldParser the streaming endpoint uses).
+
+Only if all of that fails is a model repair call worth paying for
+(`build_repair_prompt`). `response_format` asks the provider for JSON in
+the first place when LLM_RESPONSE_FORMAT allows.
+"""
+import os
+import re
+import ast
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel, ValidationError, field_validator
+
+from json_stream import StreamingFieldParser
+
+# "json_schema" (strict structured outputs), "json_object" (JSON mode) or "off" for providers without either
+LLM_RESPONSE_FORMAT = os.getenv("LLM_RESPONSE_FORMAT", "json_object")
+
+VERDICTS = ("Correct", "Partially correct", "Incorrect")
+_VERDICT_ALIASES = {
+    "correct": "Correct", "right": "Correct", "pass": "Correct",
+    "partially correct": "Partially correct", "partial": "Partially correct", "partly correct": "Partially correct",
+    "partially": "Partially correct", "somewhat correct": "Partially correct",
+    "incorrect": "Incorrect", "wrong": "Incorrect", "fail": "Incorrect", "not correct": "Incorrect",
+}
+_DECODER = json.JSONDecoder()
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class ParseError(ValueError):
+    """The model's reply has no usable grading in it."""
+
+
+class Grading(BaseModel):
+    """One graded answer, as the model is asked to return it."""
+
+    verdict: str
+    short_feedback: str = ""
+    correction: str = ""
+
+    @field_validator("verdict", mode="before")
+    @classmethod
+    def _verdict(cls, value: Any) -> str:
+        key = re.sub(r"[\s_\-.!]+", " ", str(value)).strip().lower()
+        if key not in _VERDICT_ALIASES:
+            raise ValueError(f"unknown verdict {value!r}")
+        return _VERDICT_ALIASES[key]
+
+    @field_validator("short_feedback", "correction", mode="before")
+    @classmethod
+    def _text(cls, value: Any) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, list):
+            return " ".join(str(v) for v in value)
+        return str(value)
+
+    @classmethod
+    def from_obj(cls, obj: Any) -> Optional["Grading"]:
+        if not isinstance(obj, dict):
+            return None
+        if "short_feedback" not in obj and "feedback" in obj:
+            obj = {**obj, "short_feedback": obj["feedback"]}
+        try:
+            return cls.model_validate(obj)
+        except ValidationError:
+            return None
+
+
+GRADING_SCHEMA = {
+    "name": "grading",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "verdict": {"type": "string", "enum": list(VERDICTS)},
+            "short_feedback": {"type": "string"},
+            "correction": {"type": "string"},
+        },
+        "required": ["verdict", "short_feedback", "correction"],
+        "additionalProperties": False,
+    },
+}
+
+
+def response_format(mode: str = LLM_RESPONSE_FORMAT) -> Optional[Dict[str, Any]]:
+    """The `response_format` request field for a single grading, or None to not send one."""
+    if mode == "json_schema":
+        return {"type": "json_schema", "json_schema": GRADING_SCHEMA}
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return None
+
+
+def iter_json_values(text: str, openers: str = "{[") -> Iterator[Any]:
+    """Every JSON object/array embedded in `text`, left to right, skipping anything that isn't JSON."""
+    pos = 0
+    while True:
+        starts = [i for i in (text.find(c, pos) for c in openers) if i != -1]
+        if not starts:
+            return
+        start = min(starts)
+        try:
+            value, end = _DECODER.raw_decode(text, start)
+        except ValueError:
+            pos = start + 1
+            continue
+        yield value
+        pos = end
+
+
+def _cleaned(text: str) -> str:
+    return _TRAILING_COMMA.sub(r"\1", text.translate(_SMART_QUOTES))
+
+
+def _python_literals(text: str) -> Iterator[Any]:
+    """Dicts written with Python syntax ('single quotes', True/None)."""
+    start = text.find("{")
+    while start != -1:
+        end = text.find("}", start)
+        while end != -1:
+            try:
+                yield ast.literal_eval(text[start:end + 1])
+                break
+            except (ValueError, SyntaxError, MemoryError, RecursionError):
+                end = text.find("}", end + 1)
+        start = text.find("{", start + 1)
+
+
+def _objects(text: str) -> Iterator[Any]:
+    """Candidate objects in the text, unwrapping arrays and one level of nesting, cheapest recovery first."""
+    for attempt in (lambda: iter_json_values(text), lambda: iter_json_values(_cleaned(text)),
+                    lambda: _python_literals(_cleaned(text))):
+        for value in attempt():
+            if isinstance(value, list):
+                yield from value
+            elif isinstance(value, dict) and "verdict" not in value:
+                yield from (v for v in value.values() if isinstance(v, dict))   # {"result": {...}}
+            else:
+                yield value
+
+
+def truncated_grading(text: str) -> Optional[Grading]:
+    """A grading from an object cut off mid-way, if its verdict is complete."""
+    parser = StreamingFieldParser()
+    parser.feed(text)
+    if "verdict" not in parser.complete:
+        return None
+    return Grading.from_obj(parser.fields)
+
+
+def parse_grading(text: str) -> Grading:
+    """The first valid grading in the model's reply. Raises ParseError if there is none."""
+    for obj in _objects(text):
+        grading = Grading.from_obj(obj)
+        if grading is not None:
+            return grading
+    grading = truncated_grading(text)
+    if grading is None:
+        raise ParseError("no grading in model output")
+    return grading
+
+
+def parse_grading_list(text: str) -> List[Dict[str, Any]]:
+    """
+    The objects of the first JSON array in `text` (or of an array-valued
+    field such as {"items": [...]}, for models in JSON mode), cleaned up
+    like `parse_grading`. Empty if there is none.
+    """
+    for clean in (text, _cleaned(text)):
+        for value in iter_json_values(clean):
+            if isinstance(value, dict):
+                value = next((v for v in value.values() if isinstance(v, list)), None)
+            if isinstance(value, list):
+                return [v for v in value if isinstance(v, dict)]
+    return []
+
+
+def build_repair_prompt(text: str, max_chars: int = 2000) -> str:
+    """Ask the model to turn its own malformed reply into the JSON we wanted; short and cheap."""
+    return f"""
+Rewrite the text below as a JSON object with exactly three string keys: verdict, short_feedback, correction.
+verdict must be one of "Correct", "Partially correct", or "Incorrect". Keep the original wording.
+Return ONLY the JSON object.
+
+Text:
+{text[:max_chars]}
+"""
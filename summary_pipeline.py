@@ -0,0 +1,164 @@
+# summary_pipeline.py
+import os
+import time
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+
+from evaluator import OPENAI_AVAILABLE, AsyncEvaluator, compact_summary_prompt
+from metrics import SUMMARIES
+from session import Session
+from session_store import SessionStore
+from token_budget import count_tokens, final_budget, step_budget
+
+SUMMARY_PIPELINE = os.getenv("SUMMARY_PIPELINE", "1") == "1" and OPENAI_AVAILABLE
+SUMMARY_TASK_TTL = float(os.getenv("SESSION_TTL", "3600"))
+SUMMARY_FINAL_WAIT = float(os.getenv("SUMMARY_FINAL_WAIT", "5"))   # seconds the last answer waits for a running step
+
+
+class SummaryPipeline:
+    """
+    Builds each session's end-of-interview summary in the background.
+
+    After every non-final answer, `schedule` starts a task that folds the new
+    answers into a running summary (`{"text", "upto", "tokens"}`, tokens
+    being the prompt tokens spent so far). The next request for
+    the session picks up a finished result with `collect`, which stores it on
+    the session as `summary_state`, so it survives a hop to another worker.
+    At the end, `final_input` waits for the step still running (it has been
+    running while the last answer was graded) and returns the running
+    summary plus whichever answers it doesn't cover yet. When that is just
+    the last answer, `folded` appends its verdict and the tally to the
+    running summary, so the final /answer makes no summary call at all;
+    otherwise the final summary call only has to extend it.
+
+    Every step's prompt is compacted to the token budget, and steps stop
+    once the session's budget is used up (see token_budget.py), so a long
+    interview costs a bounded number of summary tokens.
+
+    Tasks are process-local; a session served by another worker simply
+    covers fewer answers and the finalize step sends the rest verbatim.
+    """
+
+    def __init__(self, evaluator: AsyncEvaluator, enabled: bool = SUMMARY_PIPELINE,
+                 task_ttl: float = SUMMARY_TASK_TTL, final_wait: float = SUMMARY_FINAL_WAIT):
+        self.evaluator = evaluator
+        self.enabled = enabled
+        self.task_ttl = task_ttl
+        self.final_wait = final_wait
+        self._tasks: Dict[str, Tuple[float, asyncio.Task, Optional[asyncio.Task]]] = {}   # sid -> (started, step, previous step)
+        self._scheduled = 0
+
+    @staticmethod
+    def state(session: Session) -> Dict[str, Any]:
+        return session.summary_state or {"text": "", "upto": 0, "tokens": 0}
+
+    def collect(self, sid: str, session: Session) -> None:
+        """Fold a finished background result into `session`. Never waits."""
+        entry = self._tasks.get(sid)
+        if entry is None or not entry[1].done() or entry[1].cancelled() or entry[1].exception() is not None:
+            return
+        result = entry[1].result()
+        if result["upto"] > self.state(session)["upto"]:
+            session.summary_state = result
+
+    def schedule(self, sid: str, session: Session) -> None:
+        """Start extending the running summary with the session's newest answers."""
+        if not self.enabled:
+            return
+        self._scheduled += 1
+        if self._scheduled % 1000 == 0:
+            self._purge()
+        prev = self._tasks.get(sid)
+        prev_task = prev[1] if prev is not None else None
+        start = dict(self.state(session))
+        role = session.role
+        answers = session.log()
+
+        async def run() -> Dict[str, Any]:
+            state = start
+            if prev_task is not None:
+                try:
+                    done = await prev_task
+                    if done["upto"] > state["upto"]:
+                        state = done
+                except Exception:
+                    pass
+            spent = state.get("tokens", 0)
+            budget = step_budget(spent)
+            if state["upto"] >= len(answers) or not budget or self.evaluator.llm.saturated(0.5):
+                return state   # the final summary covers whatever this step would have
+            prompt = compact_summary_prompt(role, answers[state["upto"]:], state["text"], budget, op="summary_step")
+            try:
+                text = await self.evaluator.complete(prompt, 0.5, 150, op="summary_step")
+            except Exception:
+                return state
+            return {"text": text, "upto": len(answers), "tokens": spent + count_tokens(prompt)}
+
+        self._tasks[sid] = (time.monotonic(), asyncio.ensure_future(run()), prev_task)
+
+    async def final_input(self, sid: str, session: Session) -> Tuple[str, List[Dict[str, Any]], int]:
+        """
+        (running summary, answers it doesn't cover, prompt token budget) for
+        the final summary call, once the last answer is graded. If the
+        session's background step has its model call in flight, waits up to
+        `final_wait` seconds for it (less than a summary call of its own);
+        a step still queued behind an earlier one isn't waited for. Drops it.
+        """
+        entry = self._tasks.get(sid)
+        if entry is not None and not entry[1].done() and (entry[2] is None or entry[2].done()):
+            await asyncio.wait({entry[1]}, timeout=self.final_wait)
+        self.collect(sid, session)
+        self.discard(sid)
+        state = self.state(session)
+        rest = session.log(state["upto"])
+        return state["text"], rest, final_budget(state.get("tokens", 0))
+
+    def folded(self, notes: str, rest: List[Dict[str, Any]], session: Session) -> Optional[str]:
+        """
+        The final summary without a model call, if the running summary covers
+        every answer but the last: the summary, the last verdict and the tally.
+        None if the final summary call is still needed.
+        """
+        if not self.enabled or not notes or len(rest) != 1:
+            return None
+        verdicts = [a.verdict.label for a in session.answers]
+        tally = ", ".join(f"{verdicts.count(label)} {label.lower()}"
+                          for label in ("Correct", "Partially correct", "Incorrect") if label in verdicts)
+        SUMMARIES.inc("folded")
+        return f"{notes.strip()} The last answer was graded {rest[0]['verdict'].lower()}; overall {tally}."
+
+    def discard(self, sid: str) -> None:
+        entry = self._tasks.pop(sid, None)
+        if entry is not None and not entry[1].done():
+            entry[1].cancel()
+
+    def _purge(self) -> None:
+        cutoff = time.monotonic() - self.task_ttl
+        for sid in [sid for sid, (ts, _, _) in self._tasks.items() if ts < cutoff]:
+            self.discard(sid)
+
+    async def handoff(self, store: SessionStore, timeout: float) -> int:
+        """
+        For shutdown: give running steps up to `timeout` seconds, then save
+        every finished running summary into its session in `store`, so the
+        worker that serves the session next starts from it instead of
+        re-summarising. Returns how many sessions were updated.
+        """
+        running = [task for _, task, _ in self._tasks.values() if not task.done()]
+        if running:
+            await asyncio.wait(running, timeout=timeout)
+        saved = 0
+        for sid in list(self._tasks):
+            session = await store.get(sid)
+            if session is None:
+                continue
+            upto = self.state(session)["upto"]
+            self.collect(sid, session)
+            if self.state(session)["upto"] > upto:
+                await store.put(sid, session)
+                saved += 1
+        return saved
+
+    async def close(self) -> None:
+        for sid in list(self._tasks):
+            self.discard(sid)
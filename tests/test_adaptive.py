@@ -0,0 +1,47 @@
+# test_adaptive.py
+import json
+
+import numpy as np
+import pytest
+
+from adaptive import AdaptiveEngine
+from question_banks import QuestionBanks
+
+ROLE = "Tester"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    items = [{"id": f"q{d}{i}", "text": f"Level {d} question {i}?", "difficulty": d}
+             for d in (1, 2, 3) for i in range(5)]
+    (tmp_path / "tester.json").write_text(json.dumps({"role": ROLE, "questions": items}), encoding="utf-8")
+    return AdaptiveEngine(QuestionBanks(str(tmp_path), reload_interval=0), top_k=3,
+                          rng=np.random.default_rng(0))
+
+
+def test_next_question_matches_ability_and_never_repeats(engine):
+    assert engine.next_question(ROLE, -1.0).difficulty == 1
+    assert engine.next_question(ROLE, 1.0).difficulty == 3
+    asked = []
+    for _ in range(15):
+        q = engine.next_question(ROLE, 0.0, asked)
+        assert q.id not in asked
+        asked.append(q.id)
+    assert engine.next_question(ROLE, 0.0, asked) is None
+
+
+def test_verdicts_move_ability_and_difficulty_in_opposite_directions(engine):
+    before = engine.difficulty("q20")
+    up = engine.update(ROLE, "q20", 0.0, 0, "Correct")
+    assert up > 0 and engine.difficulty("q20") < before
+    down = engine.update(ROLE, "q20", 0.0, 0, "Incorrect")
+    assert down < 0
+    later = engine.update(ROLE, "q21", 0.0, 8, "Correct")
+    assert 0 < later < up   # steps shrink as the session accumulates answers
+    assert engine.update(ROLE, "unknown", 0.3, 0, "Correct") == 0.3
+
+
+def test_seed_from_history_shrinks_towards_the_bank_prior(engine):
+    assert engine.seed({"q10": (1000, 50, 0), "q30": (2, 2, 0), "missing": (5, 5, 0)}) == 2
+    assert engine.difficulty("q10") > 1.5      # an "easy" question almost everyone fails is hard
+    assert 0 < engine.difficulty("q30") < 1.0  # two correct answers barely move a hard prior
@@ -0,0 +1,67 @@
+# test_eval_cache.py
+import asyncio
+
+import pytest
+
+import eval_cache
+from eval_cache import EvalCache, normalize_answer
+
+Q = "What is a decorator?"
+GRADE = {"verdict": "Correct", "short_feedback": "Good.", "correction": ""}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    t = {"now": 1000.0}
+    monkeypatch.setattr(eval_cache.time, "time", lambda: t["now"])
+    return t
+
+
+def test_equivalent_answers_share_an_entry():
+    cache = EvalCache("fp", max_entries=10, path="")
+    cache.put(Q, "It's a  Wrapper.", GRADE)
+    assert normalize_answer("  its a wrapper ") == "its a wrapper"
+    assert cache.get(Q, "its a wrapper") == GRADE
+    assert cache.get(Q, "a != b") is None
+    assert cache.get("Another question?", "its a wrapper") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = EvalCache("fp", max_entries=2, path="")
+    cache.put(Q, "one", GRADE)
+    cache.put(Q, "two", GRADE)
+    cache.get(Q, "one")
+    cache.put(Q, "three", GRADE)
+    assert cache.get(Q, "two") is None
+    assert cache.get(Q, "one") == GRADE and cache.get(Q, "three") == GRADE
+    assert cache.stats["evictions"] == 1
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = EvalCache("fp", max_entries=10, ttl=60, path="")
+    cache.put(Q, "answer", GRADE)
+    clock["now"] += 59
+    assert cache.get(Q, "answer") == GRADE
+    clock["now"] += 2
+    assert cache.get(Q, "answer") is None
+
+
+def test_disk_tier_is_shared_and_dropped_when_the_fingerprint_changes(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = EvalCache("fp-1", max_entries=10, path=path)
+    first.put(Q, "answer", GRADE)
+    first.get(Q, "not cached")   # runs after the queued write on the cache's thread
+
+    second = EvalCache("fp-1", max_entries=10, path=path)
+    assert asyncio.run(second.aget(Q, "answer")) == GRADE
+    assert second.stats["disk_hits"] == 1
+
+    changed = EvalCache("fp-2", max_entries=10, path=path)
+    assert changed.get(Q, "answer") is None
+    assert EvalCache("fp-1", max_entries=10, path=path).get(Q, "answer") is None
+
+
+def test_size_zero_disables_the_cache():
+    cache = EvalCache("fp", max_entries=0, path="")
+    cache.put(Q, "answer", GRADE)
+    assert not cache.enabled and cache.get(Q, "answer") is None
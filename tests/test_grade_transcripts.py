@@ -0,0 +1,61 @@
+# test_grade_transcripts.py
+import json
+
+import pytest
+
+import grade_transcripts
+from question_banks import question_banks
+
+ROLE = "Python Developer"
+
+
+@pytest.fixture(autouse=True)
+def fake_grader(monkeypatch):
+    calls = []
+
+    def grade(question, answer):
+        calls.append((question, answer))
+        return {"verdict": "Correct", "short_feedback": "Fine.", "correction": ""}
+
+    monkeypatch.setattr(grade_transcripts, "call_openai_evaluator", grade)
+    return calls
+
+
+def write_jsonl(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def read_rows(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_bad_lines_get_error_rows_and_the_run_carries_on(tmp_path):
+    question = question_banks.pick(ROLE, 1)[0]
+    good = json.dumps({"role": ROLE, "question_id": question.id, "answer": "an answer"})
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_jsonl(src, [good, '{"role": "oops"', '["x"]', json.dumps({"role": ROLE, "question_index": 999}), good])
+
+    stats = grade_transcripts.run(str(src), str(out), workers=2)
+
+    rows = read_rows(out)
+    assert [r["record"] for r in rows] == [0, 1, 2, 3, 4]
+    assert [r["verdict"] for r in rows] == ["Correct", "", "", "", "Correct"]
+    assert rows[1]["error"].startswith("line 2: invalid JSON")
+    assert rows[2]["error"] == "line 3: expected a JSON object, got list"
+    assert "out of range" in rows[3]["error"]
+    assert (stats["graded"], stats["errors"]) == (2, 3)
+
+
+def test_resume_skips_written_records_and_drops_a_torn_line(tmp_path, fake_grader):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_jsonl(src, [json.dumps({"role": ROLE, "question": f"Q{i}", "answer": f"A{i}"}) for i in range(5)])
+    grade_transcripts.run(str(src), str(out), workers=1)
+    lines = out.read_text(encoding="utf-8").splitlines(keepends=True)
+    out.write_text("".join(lines[:2]) + lines[2][:10], encoding="utf-8")   # interrupted mid-write
+    fake_grader.clear()
+
+    stats = grade_transcripts.run(str(src), str(out), workers=1, resume=True)
+
+    assert stats["skipped"] == 2
+    assert [answer for _, answer in fake_grader] == ["A2", "A3", "A4"]
+    assert [r["record"] for r in read_rows(out)] == [0, 1, 2, 3, 4]
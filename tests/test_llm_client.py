@@ -0,0 +1,90 @@
+# test_llm_client.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import llm_client
+from llm_client import CircuitBreaker, LLMClient, LLMQueueTimeout
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    t = {"now": 0.0}
+    monkeypatch.setattr(llm_client.time, "monotonic", lambda: t["now"])
+    return t
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_after_cooldown(clock):
+    breaker = CircuitBreaker(failures=3, cooldown=10)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()            # a success resets the streak
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.allow() and breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    clock["now"] = 10.0
+    assert breaker.allow() and breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()          # one probe at a time
+    breaker.release_probe()
+    assert breaker.allow()
+    breaker.record_failure()            # failed probe: open again
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    clock["now"] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_breaker_disabled_with_zero_failures():
+    breaker = CircuitBreaker(failures=0)
+    for _ in range(10):
+        breaker.record_failure()
+    assert breaker.allow()
+
+
+class SlowProvider:
+    """Stands in for AsyncOpenAI: every completion takes `delay` seconds."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **request):
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content=" ok "))])
+
+
+def test_waiting_for_a_local_slot_never_trips_the_breaker():
+    breaker = CircuitBreaker(failures=100, cooldown=60)
+    client = LLMClient(max_concurrency=1, timeout=0.3, retries=0, hedge_after=0, breaker=breaker)
+    client._client = SlowProvider(0.1)
+
+    async def run():
+        return await asyncio.gather(*(client.complete("hi", 0.0, 10) for _ in range(8)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    kinds = [r if r == "ok" else type(r) for r in results]
+    assert kinds.count("ok") >= 2 and kinds.count(LLMQueueTimeout) >= 4
+    assert set(kinds) <= {"ok", LLMQueueTimeout, asyncio.TimeoutError}
+    # only calls that reached the provider (and timed out there) count as failures
+    assert breaker._consecutive == kinds.count(asyncio.TimeoutError)
+    assert client.in_flight == 0 and client.waiting == 0
+
+
+def test_upstream_timeouts_do_trip_the_breaker():
+    breaker = CircuitBreaker(failures=2, cooldown=60)
+    client = LLMClient(max_concurrency=4, timeout=0.05, retries=0, hedge_after=0, breaker=breaker)
+    client._client = SlowProvider(1.0)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await client.complete("hi", 0.0, 10)
+
+    asyncio.run(run())
+    assert breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,36 @@
+# test_pregrader.py
+import pytest
+
+from pregrader import PreGrader
+
+REFERENCES = {"Python Developer": {
+    "What is a decorator?": "A decorator wraps a function to extend its behaviour without modifying its code.",
+    "What is a generator?": "A generator yields values lazily, one at a time, keeping its state between calls.",
+}}
+
+
+@pytest.mark.parametrize("last", ["It is what it is.", "A decorator."])
+def test_a_reference_without_content_terms_is_handled(last):
+    # the last reference's terms are all stopwords or question words: its row in the tables is empty
+    references = {"Python Developer": {**REFERENCES["Python Developer"], "What is a decorator, really?": last}}
+    grader = PreGrader(references, coverage=True)
+    scores = grader.coverage_all("a decorator wraps a function to extend behaviour without modifying code")
+    assert len(scores) == 3 and scores[2] == 0.0 and scores[0] > 0.9
+    assert grader.coverage("What is a decorator, really?", "anything at all") == 0.0
+    assert grader.grade("What is a decorator, really?", "It wraps a function in another one.") is None
+
+
+def test_non_answers_are_settled_and_real_answers_escalate_by_default():
+    grader = PreGrader(REFERENCES)
+    assert grader.grade("What is a decorator?", "I don't know")["verdict"] == "Incorrect"
+    assert grader.grade("What is a decorator?", "asdkj qwpoe zxmnv lkjhg")["verdict"] == "Incorrect"
+    full = "A decorator wraps a function to extend its behaviour without modifying its code."
+    assert grader.grade("What is a decorator?", full) is None   # coverage grading is opt-in
+    assert grader.grade("What is a decorator?", "No.") is None
+
+
+def test_coverage_grading_when_enabled():
+    grader = PreGrader(REFERENCES, coverage=True)
+    full = "A decorator wraps a function to extend its behaviour without modifying its code."
+    assert grader.grade("What is a decorator?", full)["verdict"] == "Correct"
+    assert grader.grade("What is a decorator?", "It wraps a function.") is None   # too short to call Correct
@@ -0,0 +1,84 @@
+# test_question_banks.py
+import json
+
+import numpy as np
+import pytest
+
+from question_banks import QuestionBanks, RoleBank
+
+ROLE = "Tester"
+
+
+def bank_items(n: int, prefix: str = "t", **extra) -> list:
+    return [{"id": f"{prefix}{i}", "text": f"Question {prefix}{i}?", "reference": f"Answer {i}.", **extra}
+            for i in range(n)]
+
+
+def write_bank(directory, items, name: str = "tester.json") -> None:
+    (directory / name).write_text(json.dumps({"role": ROLE, "questions": items}), encoding="utf-8")
+
+
+@pytest.fixture
+def banks(tmp_path):
+    write_bank(tmp_path, bank_items(10))
+    return QuestionBanks(str(tmp_path), reload_interval=0)
+
+
+def test_sample_is_distinct_and_skips_excluded_and_zero_weight():
+    bank = RoleBank(ROLE, bank_items(6))
+    bank.weights[5] = 0.0
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        picked = bank.sample(4, rng=rng)
+        assert len(set(picked)) == 4 and 5 not in picked
+    exclude = np.array([True, True, False, False, False, False])
+    for _ in range(50):
+        assert set(bank.sample(3, exclude, rng)) == {2, 3, 4}
+    assert len(bank.sample(10, rng=rng)) == 6
+
+
+def test_a_candidate_sees_every_question_before_any_repeats(banks):
+    seen = [q.id for _ in range(3) for q in banks.pick(ROLE, 3, candidate_id="c-1")]
+    assert len(set(seen)) == 9
+    assert len({q.id for q in banks.pick(ROLE, 3, candidate_id="c-2")}) == 3   # others start afresh
+
+
+def test_seen_questions_reset_when_the_bank_changes(banks, tmp_path):
+    banks.pick(ROLE, 9, candidate_id="c-1")
+    write_bank(tmp_path, bank_items(10, prefix="n"))
+    assert banks.reload(force=True)
+    assert banks.seen.exclusion("c-1", banks.index.roles[ROLE]) is None
+
+
+def test_reload_swaps_the_index_and_keeps_dropped_questions_resolvable(banks, tmp_path):
+    calls = []
+    banks.on_reload(lambda b: calls.append(len(b.index.by_id)))
+    assert not banks.reload()
+    write_bank(tmp_path, bank_items(3, prefix="n"))
+    assert banks.reload(force=True)
+    assert calls == [3] and banks.roles() == [ROLE]
+    assert banks.get("n0").text == "Question n0?"
+    assert banks.get("t0").text == "Question t0?"   # dropped, still resolvable for live sessions
+    assert all(q.id.startswith("n") for q in banks.pick(ROLE, 3))
+
+
+def test_a_bank_that_fails_to_load_keeps_the_old_index(banks, tmp_path):
+    (tmp_path / "tester.json").write_text("{ half saved", encoding="utf-8")
+    with pytest.raises(ValueError):
+        banks.reload(force=True)
+    assert len(banks.index.by_id) == 10
+
+
+def test_dropped_questions_are_kept_in_a_bounded_lru(tmp_path):
+    write_bank(tmp_path, bank_items(3, prefix="a"))
+    banks = QuestionBanks(str(tmp_path), reload_interval=0, retired_max=4)
+    for prefix in "bc":
+        write_bank(tmp_path, bank_items(3, prefix=prefix))
+        banks.reload(force=True)
+        if prefix == "b":
+            banks.get("a0")   # still in use
+    assert banks.get("a0") is not None and banks.get("b2") is not None
+    assert banks.get("a1") is None and banks.get("a2") is None
+    write_bank(tmp_path, bank_items(3, prefix="a"))
+    banks.reload(force=True)
+    assert "a0" not in banks._retired and len(banks._retired) <= 4
@@ -0,0 +1,84 @@
+# test_rate_limit.py
+import asyncio
+
+import pytest
+
+import rate_limit
+from rate_limit import AdmissionControl, RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    t = {"now": 100.0}
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: t["now"])
+    return t
+
+
+def test_bucket_allows_the_burst_then_refills_at_the_rate(clock):
+    limiter = RateLimiter(rate=2, burst=3)
+    assert [limiter.acquire("ip") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("ip") == pytest.approx(0.5)
+    clock["now"] += 0.5
+    assert limiter.acquire("ip") == 0.0
+    assert limiter.acquire("other") == 0.0   # buckets are per key
+
+
+def test_cost_is_charged_in_one_go(clock):
+    limiter = RateLimiter(rate=1, burst=10)
+    assert limiter.acquire("ip", cost=8) == 0.0
+    assert limiter.acquire("ip", cost=4) == pytest.approx(2.0)
+    assert limiter.acquire("ip", cost=2) == 0.0   # a refused request takes nothing
+
+
+def test_idle_buckets_are_evicted_and_start_full(clock):
+    limiter = RateLimiter(rate=1, burst=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.acquire(key)
+    assert list(limiter._buckets) == ["b", "c"]
+    assert limiter.acquire("a") == 0.0
+
+
+def test_zero_rate_disables_the_limit():
+    limiter = RateLimiter(rate=0, burst=0)
+    assert not limiter.enabled
+    assert all(limiter.acquire("ip") == 0.0 for _ in range(100))
+
+
+def test_admission_waits_for_overload_to_clear_then_sheds():
+    state = {"overloaded": True}
+    gate = AdmissionControl(lambda: state["overloaded"], queue_timeout=0.3, max_queue=1)
+
+    async def run():
+        waiting = asyncio.ensure_future(gate.admit())
+        await asyncio.sleep(0)
+        assert gate.waiting == 1
+        assert await gate.admit() == 1.0   # queue full: shed at once
+        await asyncio.sleep(0.1)
+        state["overloaded"] = False
+        assert await waiting == 0.0
+        state["overloaded"] = True
+        return await gate.admit()
+
+    assert asyncio.run(run()) == 1.0   # timed out waiting
+
+
+def test_batch_grading_is_charged_per_item_and_questions_are_capped(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import App
+
+    async def grade_batch(pairs, mode):
+        return [{"verdict": "Correct"} for _ in pairs]
+
+    monkeypatch.setattr(App, "grade_batch", grade_batch)
+    monkeypatch.setattr(App, "batch_limiter", RateLimiter(rate=0.01, burst=10))
+    client = TestClient(App.app)
+    items = [{"question": "Q?", "answer": "A."}] * 6
+
+    assert client.post("/grade/batch", json={"items": items}).status_code == 200
+    limited = client.post("/grade/batch", json={"items": items})
+    assert limited.status_code == 429 and int(limited.headers["Retry-After"]) >= 1
+    assert client.post("/grade/batch", json={"items": items[:4]}).status_code == 200
+
+    huge = [{"question": "Q" * (App.QUESTION_MAX_CHARS + 1), "answer": "A."}]
+    assert client.post("/grade/batch", json={"items": huge}).status_code == 422
@@ -0,0 +1,56 @@
+# test_result_log.py
+import pytest
+
+from question_banks import question_banks
+from result_log import ResultLog, make_result_log
+from session import Session
+
+ROLE = "Python Developer"
+
+
+def interview(*verdicts: str, candidate: str = "c-1") -> Session:
+    s = Session(ROLE, [q.id for q in question_banks.pick(ROLE, len(verdicts))], candidate_id=candidate)
+    for v in verdicts:
+        s.add_answer("an answer", {"verdict": v, "short_feedback": "Feedback.", "correction": ""})
+    return s
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = ResultLog(str(tmp_path / "results.db"), batch_size=50, linger=0.05)
+    yield log
+    log.close()
+
+
+def test_interviews_are_written_in_batches_and_rolled_up(log):
+    for i in range(120):
+        assert log.record(f"s{i}", interview("Correct", "Partially correct", "Incorrect"), "Summary.")
+    log.flush()
+    assert log.stats["written"] == 120 and log.stats["errors"] == 0
+    assert 3 <= log.stats["batches"] < 120
+    [role] = log.role_pass_rates()
+    assert (role["role"], role["answers"], role["correct"], role["partial"]) == (ROLE, 360, 120, 120)
+    assert len(log.candidate_history("c-1", limit=5)) == 5
+
+
+def test_a_full_queue_drops_instead_of_blocking(tmp_path):
+    log = ResultLog(str(tmp_path / "results.db"), max_pending=2)
+    log.close()   # no writer: nothing leaves the queue
+    accepted = [log.record(f"s{i}", interview("Correct"), "") for i in range(5)]
+    assert accepted == [True, True, False, False, False]
+    assert (log.stats["recorded"], log.stats["dropped"]) == (2, 3)
+
+
+def test_a_bad_interview_is_counted_and_does_not_sink_its_batch(log):
+    log.record("good-1", interview("Correct"), "")
+    log._queue.put(("bad", None, "", 0.0))   # not a session: fails to write
+    log.stats["recorded"] += 1
+    log.record("good-2", interview("Correct"), "")
+    log.flush()
+    assert (log.stats["written"], log.stats["errors"]) == (2, 1)
+    assert log._thread.is_alive()
+    assert {h["session_id"] for h in log.candidate_history("c-1")} == {"good-1", "good-2"}
+
+
+def test_the_log_is_off_without_a_path():
+    assert make_result_log("") is None
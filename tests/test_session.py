@@ -0,0 +1,64 @@
+# test_session.py
+import json
+
+import pytest
+
+from question_banks import question_banks
+import session as session_module
+from session import Session, Verdict
+
+ROLE = "Python Developer"
+
+
+def grading(verdict: str, correction: str = "A different correction.") -> dict:
+    return {"verdict": verdict, "short_feedback": "Feedback.", "correction": correction}
+
+
+@pytest.fixture
+def questions():
+    return question_banks.pick(ROLE, 3)
+
+
+def answered(questions) -> Session:
+    s = Session(ROLE, [q.id for q in questions], candidate_id="c-1")
+    s.add_answer("short answer", grading("Correct", questions[0].reference))
+    s.add_answer("long answer " * 100, grading("Partially correct"))
+    s.summary_state = {"text": "So far so good.", "upto": 2, "tokens": 120}
+    return s
+
+
+def test_round_trip(questions):
+    s = answered(questions)
+    back = Session.loads(s.dumps())
+    assert back.dumps() == s.dumps()
+    assert back.log() == s.log()
+    assert (back.role, back.candidate_id, back.current, back.total) == (ROLE, "c-1", 2, 3)
+    assert back.summary_state == s.summary_state
+    assert back.question == questions[2].text and not back.finished
+
+
+def test_json_fallback_round_trip(questions, monkeypatch):
+    monkeypatch.setattr(session_module, "MSGPACK_AVAILABLE", False)
+    s = answered(questions)
+    data = s.dumps()
+    assert data[:1] == b"["
+    assert Session.loads(data).log() == s.log()
+
+
+def test_compact_fields(questions):
+    s = answered(questions)
+    short, long = s.answers
+    assert short._correction is None and short.correction == questions[0].reference
+    assert isinstance(long._text, bytes) and long.text == "long answer " * 100
+    assert [a.verdict for a in s.answers] == [Verdict.CORRECT, Verdict.PARTIAL]
+    assert s.log()[1]["verdict"] == "Partially correct"
+
+
+def test_old_dict_sessions_still_load(questions):
+    old = {"role": ROLE, "questions": [q.text for q in questions] + ["Not a bank question?"], "current": 1,
+           "answers": [{"question": questions[0].text, "user_answer": "x", "verdict": "Incorrect",
+                        "feedback": "f", "correction": "c"}]}
+    s = Session.loads(json.dumps(old))
+    assert s.question_ids == [q.id for q in questions] + ["Not a bank question?"]
+    assert s.total == 4 and s.question == questions[1].text
+    assert s.log() == [{**old["answers"][0], "question": questions[0].text}]
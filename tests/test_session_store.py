@@ -0,0 +1,117 @@
+# test_session_store.py
+import os
+import time
+import asyncio
+import uuid
+
+import pytest
+
+import session_store
+from question_banks import question_banks
+from session import Session
+from session_store import MemorySessionStore, SQLiteSessionStore, make_session_store
+
+ROLE = "Python Developer"
+
+
+def new_session() -> Session:
+    return Session(ROLE, [q.id for q in question_banks.pick(ROLE, 2)])
+
+
+def redis_store(ttl: float):
+    url = os.getenv("TEST_REDIS_URL")
+    if not url:
+        pytest.skip("set TEST_REDIS_URL to test the Redis store")
+    pytest.importorskip("redis")
+    return session_store.RedisSessionStore(url, ttl=ttl, prefix=f"test:{uuid.uuid4().hex}:")
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_store(request, tmp_path):
+    def make(ttl: float = 60):
+        if request.param == "memory":
+            return MemorySessionStore(ttl=ttl)
+        if request.param == "sqlite":
+            return SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl=ttl)
+        return redis_store(ttl)
+    return make
+
+
+def test_put_get_delete_count(make_store):
+    async def run():
+        store = make_store()
+        s = new_session()
+        s.add_answer("an answer", {"verdict": "Correct", "short_feedback": "Ok.", "correction": ""})
+        await store.put("a", s)
+        await store.put("b", new_session())
+        back = await store.get("a")
+        assert back is not None and back.log() == s.log()
+        assert await store.count() == 2
+        await store.delete("a")
+        assert await store.get("a") is None and await store.count() == 1
+        assert await store.get("missing") is None
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_idle_sessions_expire(make_store):
+    async def run():
+        store = make_store(ttl=1)
+        await store.put("a", new_session())
+        await asyncio.sleep(1.1)
+        assert await store.get("a") is None
+        assert await store.count() == 0
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_memory_store_drops_the_least_recently_used_session():
+    async def run():
+        store = MemorySessionStore(max_sessions=2)
+        for sid in ("a", "b"):
+            await store.put(sid, new_session())
+        await store.get("a")
+        await store.put("c", new_session())
+        assert await store.get("b") is None
+        assert await store.get("a") is not None and await store.get("c") is not None
+
+    asyncio.run(run())
+
+
+def test_sqlite_calls_run_off_the_event_loop(tmp_path):
+    async def run():
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+        original = store._put
+
+        def slow_put(sid, data):
+            time.sleep(0.2)   # as if waiting on another worker's write lock
+            original(sid, data)
+
+        store._put = slow_put
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        tick = asyncio.ensure_future(ticker())
+        await store.put("a", new_session())
+        tick.cancel()
+        assert ticks >= 5   # the loop kept running while the write blocked
+        assert await store.get("a") is not None
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_make_session_store_urls(tmp_path):
+    assert isinstance(make_session_store("memory"), MemorySessionStore)
+    store = make_session_store(f"sqlite:///{tmp_path / 's.db'}")
+    assert isinstance(store, SQLiteSessionStore)
+    asyncio.run(store.close())
+    with pytest.raises(ValueError):
+        make_session_store("postgres://nowhere")
@@ -0,0 +1,65 @@
+# test_structured_output.py
+import os
+import json
+
+import pytest
+
+from json_stream import StreamingFieldParser
+from structured_output import ParseError, parse_grading, parse_grading_list, truncated_grading
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks",
+                      "malformed_outputs.jsonl")
+
+with open(CORPUS, encoding="utf-8") as f:
+    CASES = [json.loads(line) for line in f if line.strip()]
+
+GRADING = {"verdict": "Partially correct", "short_feedback": "Says \"hashing\" but not collisions.",
+           "correction": "Buckets by hash; collisions are chained — or probed.\nSee é."}
+
+
+@pytest.mark.parametrize("case", [c for c in CASES if c["verdict"] is not None], ids=lambda c: c["case"])
+def test_recoverable_replies_parse_to_the_expected_verdict(case):
+    assert parse_grading(case["text"]).verdict == case["verdict"]
+
+
+@pytest.mark.parametrize("case", [c for c in CASES if c["verdict"] is None], ids=lambda c: c["case"])
+def test_replies_without_a_verdict_are_left_for_a_repair_call(case):
+    with pytest.raises(ParseError):
+        parse_grading(case["text"])
+
+
+def test_truncated_reply_keeps_what_was_written():
+    text = json.dumps(GRADING)
+    grading = truncated_grading(text[:text.index("collisions are")])
+    assert grading.verdict == "Partially correct"
+    assert grading.short_feedback == GRADING["short_feedback"]
+    assert GRADING["correction"].startswith(grading.correction)
+
+
+def test_grading_list_from_array_or_wrapped_array():
+    items = [{"id": 1, **GRADING}, {"id": 2, "verdict": "Correct"}]
+    assert parse_grading_list("Here you go:\n" + json.dumps(items)) == items
+    assert parse_grading_list(json.dumps({"items": items})) == items
+    assert parse_grading_list("[{\"id\": 1, \"verdict\": \"Correct\"},]") == [{"id": 1, "verdict": "Correct"}]
+    assert parse_grading_list("no array here") == []
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 7, 1000])
+def test_streaming_parser_matches_json_whatever_the_chunking(chunk):
+    text = "```json\n" + json.dumps({**GRADING, "score": 3, "tags": ["a", "b"]}) + "\n```"
+    parser = StreamingFieldParser()
+    streamed = {}
+    for i in range(0, len(text), chunk):
+        for field, delta in parser.feed(text[i:i + chunk]):
+            streamed[field] = streamed.get(field, "") + delta
+    assert parser.done
+    assert parser.fields == GRADING == streamed
+    assert parser.complete == set(GRADING)
+
+
+def test_streaming_parser_marks_a_field_complete_only_at_its_closing_quote():
+    parser = StreamingFieldParser()
+    parser.feed('{"verdict": "Partially corr')
+    assert parser.fields == {"verdict": "Partially corr"} and not parser.complete
+    parser.feed('ect", "short_feedback": "x')
+    assert parser.complete == {"verdict"} and not parser.done
@@ -0,0 +1,54 @@
+# test_summary_pipeline.py
+import asyncio
+
+from question_banks import question_banks
+from session import Session
+from summary_pipeline import SummaryPipeline
+
+ROLE = "Python Developer"
+
+
+def finished(*verdicts: str) -> Session:
+    s = Session(ROLE, [q.id for q in question_banks.pick(ROLE, len(verdicts))])
+    for v in verdicts:
+        s.add_answer("an answer", {"verdict": v, "short_feedback": "Feedback.", "correction": ""})
+    return s
+
+
+def test_last_verdict_is_folded_into_the_running_summary():
+    s = finished("Correct", "Incorrect", "Correct")
+    s.summary_state = {"text": "Solid basics. ", "upto": 2, "tokens": 100}
+    pipeline = SummaryPipeline(evaluator=None, enabled=True)
+    notes, rest, _ = asyncio.run(pipeline.final_input("sid", s))
+    assert pipeline.folded(notes, rest, s) == \
+        "Solid basics. The last answer was graded correct; overall 2 correct, 1 incorrect."
+
+
+def test_summary_call_still_needed_when_more_than_the_last_answer_is_left():
+    s = finished("Correct", "Incorrect", "Correct")
+    s.summary_state = {"text": "Solid basics.", "upto": 1, "tokens": 100}
+    pipeline = SummaryPipeline(evaluator=None, enabled=True)
+    notes, rest, _ = asyncio.run(pipeline.final_input("sid", s))
+    assert len(rest) == 2 and pipeline.folded(notes, rest, s) is None
+    assert SummaryPipeline(evaluator=None, enabled=False).folded("Solid basics.", rest[1:], s) is None
+    assert pipeline.folded("", rest[1:], s) is None
+
+
+def test_final_input_waits_for_a_step_in_flight_but_not_one_queued_behind_another():
+    async def run(queued: bool):
+        s = finished("Correct", "Correct")
+        pipeline = SummaryPipeline(evaluator=None, enabled=True, final_wait=5)
+
+        async def step():
+            await asyncio.sleep(0.05)
+            return {"text": "Notes.", "upto": 1, "tokens": 10}
+
+        blocker = asyncio.ensure_future(asyncio.sleep(1)) if queued else None
+        pipeline._tasks["sid"] = (0.0, asyncio.ensure_future(step()), blocker)
+        notes, rest, _ = await pipeline.final_input("sid", s)
+        if blocker is not None:
+            blocker.cancel()
+        return notes, len(rest)
+
+    assert asyncio.run(run(queued=False)) == ("Notes.", 1)
+    assert asyncio.run(run(queued=True)) == ("", 2)
@@ -0,0 +1,47 @@
+# test_token_budget.py
+from evaluator import compact_summary_prompt
+from token_budget import (MIN_ANSWER_TOKENS, MIN_SUMMARY_BUDGET, SESSION_TOKEN_BUDGET, SUMMARY_TOKEN_BUDGET, allot,
+                          compact_answers, count_tokens, extract, final_budget, step_budget, truncate_tokens)
+
+QUESTION = "What does the Python garbage collector do?"
+ON_TOPIC = "The garbage collector frees objects in reference cycles that reference counting cannot free."
+LONG = " ".join(["My weekend was spent hiking in the hills with friends and family."] * 30 + [ON_TOPIC])
+
+
+def test_truncation_stays_within_the_limit():
+    cut = truncate_tokens(LONG, 20)
+    assert cut.endswith("…") and count_tokens(cut) <= 20
+    assert truncate_tokens("short", 20) == "short"
+
+
+def test_extract_keeps_the_on_topic_sentence():
+    out = extract(LONG, 40, QUESTION)
+    assert ON_TOPIC in out and count_tokens(out) <= 40
+
+
+def test_allot_fills_short_items_first_and_respects_the_floor():
+    assert allot([10, 500, 500], 310) == [10, 150, 150]
+    assert allot([100, 100], 4) == [MIN_ANSWER_TOKENS, MIN_ANSWER_TOKENS]
+
+
+def test_compacted_answers_fit_and_keep_question_and_verdict():
+    answers = [{"question": QUESTION, "user_answer": LONG, "verdict": "Correct"} for _ in range(5)]
+    compacted, saved = compact_answers(answers, 300)
+    assert saved > 0
+    assert sum(count_tokens(a["user_answer"]) for a in compacted) <= 300 + len(answers)
+    assert all(a["question"] == QUESTION and a["verdict"] == "Correct" for a in compacted)
+    assert compact_answers(answers[:1], 10_000) == (answers[:1], 0)
+
+
+def test_summary_prompt_is_compacted_to_the_budget():
+    answers = [{"question": QUESTION, "user_answer": LONG, "verdict": "Incorrect"} for _ in range(8)]
+    prompt = compact_summary_prompt("Python Developer", answers, budget=800)
+    assert count_tokens(prompt) <= 800 * 1.1
+    assert prompt.count("Result: Incorrect") == 8
+
+
+def test_session_budget_holds_back_the_final_call():
+    assert step_budget(0) == min(SUMMARY_TOKEN_BUDGET, SESSION_TOKEN_BUDGET - MIN_SUMMARY_BUDGET)
+    assert step_budget(SESSION_TOKEN_BUDGET) == 0
+    assert final_budget(SESSION_TOKEN_BUDGET * 2) == MIN_SUMMARY_BUDGET
+    assert final_budget(0) == SUMMARY_TOKEN_BUDGET
@@ -0,0 +1,111 @@
+# token_budget.py
+import os
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+from pregrader import STOPWORDS, tokenize
+
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "1200"))   # prompt tokens per summary call
+SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "6000"))   # summary prompt tokens per interview
+MIN_SUMMARY_BUDGET = 300  # the final summary always gets at least this, even over the session budget
+MIN_ANSWER_TOKENS = 12    # never squeeze an answer below this; the verdict still carries the signal
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Local approximation of a BPE token count: one token per punctuation
+    mark and per short word, plus one per ~6 extra characters of longer
+    words. Close enough to a real tokenizer for budgeting, with no dependency.
+    """
+    return sum(1 + (len(p) - 1) // 6 if p[0].isalnum() or p[0] == "_" else 1 for p in _PIECE.findall(text))
+
+
+def truncate_tokens(text: str, limit: int) -> str:
+    """The longest word-aligned prefix of `text` within `limit` tokens, with an ellipsis if cut."""
+    if count_tokens(text) <= limit:
+        return text
+    used, end = 1, 0   # the ellipsis costs a token
+    for m in _PIECE.finditer(text):
+        p = m.group()
+        cost = 1 + (len(p) - 1) // 6 if p[0].isalnum() or p[0] == "_" else 1
+        if used + cost > limit:
+            break
+        used += cost
+        end = m.end()
+    return text[:end].rstrip() + "…"
+
+
+def extract(text: str, limit: int, question: str = "") -> str:
+    """
+    Extractive summary of `text` within `limit` tokens: the sentences that
+    share the most content words with the question (earlier ones first on
+    ties), kept in their original order. Falls back to truncation when not
+    even one sentence fits.
+    """
+    if count_tokens(text) <= limit:
+        return text
+    sentences = [s.strip() for s in _SENTENCE.split(text) if s.strip()]
+    topic = {t for t in tokenize(question) if t not in STOPWORDS}
+    scored = []
+    for i, sentence in enumerate(sentences):
+        words = [t for t in tokenize(sentence) if t not in STOPWORDS]
+        overlap = sum(t in topic for t in words)
+        scored.append((-(overlap + len(set(words)) / (len(words) + 1)), i))
+    chosen, used = [], 1
+    for _, i in sorted(scored):
+        cost = count_tokens(sentences[i]) + 1
+        if used + cost <= limit:
+            chosen.append(i)
+            used += cost
+    if not chosen:
+        return truncate_tokens(text, limit)
+    return " … ".join(sentences[i] for i in sorted(chosen))
+
+
+def allot(sizes: Sequence[int], budget: int, floor: int = MIN_ANSWER_TOKENS) -> List[int]:
+    """
+    Split `budget` across items of the given sizes (water-filling): items
+    under the fair share keep all they need and the rest is shared by the
+    longer ones. Every item gets at least `floor`.
+    """
+    limits = [0] * len(sizes)
+    remaining = budget
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    for n, i in enumerate(order):
+        share = max(floor, remaining // (len(order) - n))
+        limits[i] = min(sizes[i], share)
+        remaining -= limits[i]
+    return limits
+
+
+def compact_answers(answers: List[Dict[str, Any]], budget: int) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Shrink the `user_answer`s so together they fit `budget` tokens, keeping
+    question and verdict. Returns (compacted answers, tokens saved).
+    """
+    sizes = [count_tokens(a["user_answer"]) for a in answers]
+    if sum(sizes) <= budget:
+        return answers, 0
+    compacted = []
+    for a, size, limit in zip(answers, sizes, allot(sizes, budget)):
+        if size > limit:
+            a = {**a, "user_answer": extract(a["user_answer"], limit, a["question"])}
+        compacted.append(a)
+    return compacted, sum(sizes) - sum(count_tokens(a["user_answer"]) for a in compacted)
+
+
+def step_budget(spent: int) -> int:
+    """
+    Prompt budget for a background summary step after `spent` tokens, with
+    MIN_SUMMARY_BUDGET held back for the final call; below that, 0 (skip).
+    """
+    budget = min(SUMMARY_TOKEN_BUDGET, SESSION_TOKEN_BUDGET - spent - MIN_SUMMARY_BUDGET)
+    return budget if budget >= MIN_SUMMARY_BUDGET else 0
+
+
+def final_budget(spent: int) -> int:
+    """Prompt budget for the end-of-interview summary after `spent` tokens."""
+    return min(SUMMARY_TOKEN_BUDGET, max(MIN_SUMMARY_BUDGET, SESSION_TOKEN_BUDGET - spent))